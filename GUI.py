@@ -2,12 +2,37 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import json
 import os
-import subprocess
 from PIL import Image, ImageTk
 import glob
 import time
 import shutil  # Pour créer le dossier profiles si besoin
 from datetime import datetime  # Pour trier les profils par date
+import gcode_cache
+import generation  # Génération en processus (plus de sous-processus main_tkinter.py)
+import main_tkinter
+import mode_registry  # Description des modes (paramètres, images, sections de config.json)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+NC_DIR = os.path.join(APP_DIR, "NC")
+
+
+def open_program_cache():
+    """Cache des corps de programme (None si le dossier est inutilisable)."""
+    try:
+        return gcode_cache.GcodeCache(os.path.join(APP_DIR, "cache", "gcode"))
+    except OSError as e:
+        print(f"Débogage: Cache des programmes indisponible : {str(e)}")
+        return None
+
+
+# Regénérer avec des paramètres inchangés ne fait que recopier le corps en cache
+program_cache = open_program_cache()
+
+
+def generate(request, hooks=None):
+    """Génère le programme de `request` dans le dossier NC, via le cache des programmes."""
+    return generation.generate_program(request, output_dir=NC_DIR, hooks=hooks, cache=program_cache)
+
 
 # Classe ToolTip pour les info-bulles
 class ToolTip:
@@ -77,14 +102,7 @@ units_options = {
     "es": ["mm", "in"]
 }
 
-mode_acronyms = {
-    "1": "SRC",
-    "2": "CDR",
-    "3": "MTX",
-    "4": "RDS",
-    "5": "OBL",
-    "6": "THR"
-}
+mode_acronyms = {spec.mode_id: spec.acronym for spec in mode_registry.all_modes()}
 
 def convert_legacy_to_fixed_id(value, mapping, lang):
     """Convertit une valeur traduite en identifiant fixe."""
@@ -113,13 +131,14 @@ def load_config():
             if config.get("language", "fr") not in valid_languages:
                 config["language"] = "fr"
             lang = config.get("language", "fr")
-            for section in ["surfacing", "contour_drilling", "corner_radius", "oblong_hole", "matrix_drilling", "threading"]:
+            for spec in mode_registry.all_modes():
+                section = spec.section
                 if section in config:
                     if "path_type" in config[section]:
-                        # Forcer conventional pour modes 2, 4, 5 si alternate est détecté
-                        if section in ["contour_drilling", "corner_radius", "oblong_hole"] and config[section]["path_type"] == "alternate":
-                            config[section]["path_type"] = "conventional"
-                            print(f"Débogage: {section} - path_type 'alternate' non autorisé, forcé à 'conventional'")
+                        # Forcer le sens par défaut du mode si alternate n'est pas proposé
+                        if config[section]["path_type"] == "alternate" and "alternate" not in spec.path_types:
+                            config[section]["path_type"] = spec.path_types[0]
+                            print(f"Débogage: {section} - path_type 'alternate' non autorisé, forcé à '{spec.path_types[0]}'")
                         config[section]["path_type"] = convert_legacy_to_fixed_id(config[section]["path_type"], path_type_map, lang)
                     if "drilling_type" in config[section]:
                         config[section]["drilling_type"] = convert_legacy_to_fixed_id(config[section]["drilling_type"], drilling_type_map, lang)
@@ -205,7 +224,7 @@ def load_profile(mode_id, profile_name):
         #global_feed_rate_base = config.get("global_feed_rate_base", 1800)
 
         # Pourcentage sélectionné (affiché dans la combobox)
-        percent_value = config.get("global_feed_rate_percent", "25%")
+        percent_value = config.get("global_feed_rate_percent", f"{generation.DEFAULT_PERCENT}%")
         global_feed_drill_var = tk.StringVar(value=percent_value)
         global_units_var.set(data["general"].get("global_units", global_units_var.get()))
     
@@ -219,55 +238,29 @@ def load_profile(mode_id, profile_name):
     print(f"Débogage: Profil chargé : {profile_name} pour mode {mode_id}")
     messagebox.showinfo("Succès", f"Profil '{profile_name}' chargé pour le mode {mode_id}.")
 
-def generate_image_filename(mode, path_type, corner_type=None, drilling_type=None, x_coord=None, y_coord=None, thread_type=None):
-    filename = f"images/mode{mode}"
-    print(f"Débogage: Génération du nom de fichier pour mode={mode}, path_type={path_type}, corner_type={corner_type}, drilling_type={drilling_type}, x_coord={x_coord}, y_coord={y_coord}, thread_type={thread_type}")
-    
-    if mode == "1":
-        path_index = path_type_map.get(path_type, path_type_map["conventional"]).get("index", 1)
-        filename += f"{path_index}0"
-        print(f"Débogage: Mode 1, path_index={path_index}, filename={filename}")
-    elif mode == "2":
-        path_index = path_type_map.get(path_type, path_type_map["conventional"]).get("index", 1)
-        drilling_index = drilling_type_map.get(drilling_type, drilling_type_map["contour"]).get("index", 1)
-        filename += f"{path_index}{drilling_index}"
-        print(f"Débogage: Mode 2, path_index={path_index}, drilling_index={drilling_index}, filename={filename}")
-    elif mode == "6":
-        path_index = path_type_map.get(path_type, path_type_map["right"]).get("index", 1)
-        thread_index = thread_type_map.get(thread_type, thread_type_map["nut_internal"]).get("index", 1)
-        filename += f"{path_index}{thread_index}"
-        print(f"Débogage: Mode 6, path_index={path_index}, thread_index={thread_index}, filename={filename}")
-    elif mode == "3":
-        filename += "00"
-        print(f"Débogage: Mode 3, filename={filename}")
-    elif mode == "4":
-        path_index = path_type_map.get(path_type, path_type_map["conventional"]).get("index", 1)
-        corner_index = corner_type_map.get(corner_type, corner_type_map["front_left"]).get("index", 1)
-        filename += f"{corner_index}{path_index}"
-        print(f"Débogage: Mode 4, path_index={path_index}, corner_index={corner_index}, filename={filename}")
-    elif mode == "5":
-        path_index = path_type_map.get(path_type, path_type_map["conventional"]).get("index", 1)
-        print(f"Débogage: Mode 5, path_type={path_type}, path_index={path_index}, x_coord={x_coord}, y_coord={y_coord}")
-        if path_type in ["conventional", "climb"]:
-            if x_coord == 0 and y_coord == 0:
-                filename += f"{path_index}3"
-                print("Débogage: Mode 5 -> both 0: 13 or 23")
-            elif x_coord == 0:
-                filename += f"{path_index}1"
-                print("Débogage: Mode 5 -> x=0: 11 or 21")
-            elif y_coord == 0:
-                filename += f"{path_index}2"
-                print("Débogage: Mode 5 -> y=0: 12 or 22")
-            else:
-                filename += f"{path_index}4"
-                print("Débogage: Mode 5 -> both >0: 14 or 24")
+def collect_params(mode, lang):
+    """Lit les champs du formulaire et convertit les listes déroulantes en identifiants fixes."""
+    spec = mode_registry.get_mode(mode)
+    params = {}
+    for k, v in entry_vars.items():
+        if k == "path_type":
+            params[k] = convert_legacy_to_fixed_id(v.get(), path_type_map, lang)
+            # Forcer le sens par défaut du mode si la valeur n'est pas proposée (ex. alternate)
+            if params[k] not in spec.path_types:
+                print(f"Débogage: Mode {mode} - path_type '{params[k]}' non autorisé, forcé à '{spec.path_types[0]}'")
+                params[k] = spec.path_types[0]
+        elif k == "drilling_type":
+            params[k] = convert_legacy_to_fixed_id(v.get(), drilling_type_map, lang)
+        elif k == "corner_type":
+            params[k] = convert_legacy_to_fixed_id(v.get(), corner_type_map, lang)
+        elif k == "thread_type":
+            params[k] = convert_legacy_to_fixed_id(v.get(), thread_type_map, lang)
         else:
-            filename += f"14"
-            print("Débogage: Mode 5 -> path_type non valide, fallback: 14")
-    
-    filename += ".png"
-    print(f"Débogage: Nom de fichier final : {filename}")
-    return filename
+            try:
+                params[k] = float(v.get())
+            except ValueError:
+                params[k] = v.get()
+    return params
 
 def update_image():
     print("Débogage: update_image called")
@@ -276,41 +269,9 @@ def update_image():
     lang = language_var.get()
     try:
         print(f"Débogage: Valeurs brutes des combobox : {{ {', '.join(f'{k}: {v.get()}' for k, v in entry_vars.items())} }}")
-        if selected_mode_id == "1":
-            path_type = convert_legacy_to_fixed_id(entry_vars["path_type"].get(), path_type_map, lang)
-            filename = generate_image_filename(selected_mode_id, path_type)
-        elif selected_mode_id == "2":
-            path_type = convert_legacy_to_fixed_id(entry_vars["path_type"].get(), path_type_map, lang)
-            drilling_type = convert_legacy_to_fixed_id(entry_vars["drilling_type"].get(), drilling_type_map, lang)
-            print(f"Débogage: Mode 2 - path_type={path_type}, drilling_type={drilling_type}")
-            filename = generate_image_filename(selected_mode_id, path_type, drilling_type=drilling_type)
-        elif selected_mode_id == "6":
-            path_type = convert_legacy_to_fixed_id(entry_vars["path_type"].get(), path_type_map, lang)
-            thread_type = convert_legacy_to_fixed_id(entry_vars["thread_type"].get(), thread_type_map, lang)
-            print(f"Débogage: Mode 6 - path_type={path_type}, thread_type={thread_type}")
-            filename = generate_image_filename(selected_mode_id, path_type, thread_type=thread_type)
-        elif selected_mode_id == "3":
-            filename = generate_image_filename(selected_mode_id, "conventional")
-        elif selected_mode_id == "4":
-            path_type = convert_legacy_to_fixed_id(entry_vars["path_type"].get(), path_type_map, lang)
-            corner_type = convert_legacy_to_fixed_id(entry_vars["corner_type"].get(), corner_type_map, lang)
-            print(f"Débogage: Mode 4 - path_type={path_type}, corner_type={corner_type}")
-            filename = generate_image_filename(selected_mode_id, path_type, corner_type=corner_type)
-        elif selected_mode_id == "5":
-            path_type = convert_legacy_to_fixed_id(entry_vars["path_type"].get(), path_type_map, lang)
-            raw_x = entry_vars["length_x"].get()
-            raw_y = entry_vars["length_y"].get()
-            print(f"Débogage: Mode 5 - raw length_x='{raw_x}', length_y='{raw_y}', path_type={path_type}")
-            try:
-                x_coord = float(raw_x or 0)
-                y_coord = float(raw_y or 0)
-            except ValueError:
-                x_coord = y_coord = 0
-                print(f"Débogage: Mode 5 - Conversion échouée, x_coord={x_coord}, y_coord={y_coord}")
-            print(f"Débogage: Mode 5 - parsed x_coord={x_coord}, y_coord={y_coord}")
-            filename = generate_image_filename(selected_mode_id, path_type, x_coord=x_coord, y_coord=y_coord)
-        else:
-            raise KeyError("Mode non supporté")
+        params = collect_params(selected_mode_id, lang)
+        print(f"Débogage: Mode {selected_mode_id} - paramètres convertis : {params}")
+        filename = mode_registry.get_mode(selected_mode_id).image_filename(params)
         
         image_path = os.path.join(os.path.dirname(__file__), filename)
         print(f"Débogage: Tentative de chargement de l'image : {image_path}")
@@ -341,8 +302,8 @@ def update_image():
         photo = ImageTk.PhotoImage(img)
         image_label.configure(image=photo)
         image_label.image = photo
-    except KeyError as e:
-        print(f"Débogage: KeyError dans update_image : {e}")
+    except (KeyError, ValueError) as e:
+        print(f"Débogage: Mode ou champ introuvable dans update_image : {e}")
         image_path = os.path.join(os.path.dirname(__file__), f"images/mode{selected_mode_id}.png")
         print(f"Débogage: Tentative de chargement de l'image de secours : {image_path}")
         try:
@@ -371,116 +332,23 @@ def update_fields(event=None):
     clear_fields()
 
     print(f"Débogage: Mise à jour des champs pour le mode : {selected_mode_id}")
-    mode_params = {
-        "1": [
-            ("start_x", "start_x", 0.0),
-            ("start_y", "start_y", 0.0),
-            ("start_z", "start_z", 10.0),
-            ("clearance_height", "clearance_height", 5.0),
-            ("tool_diameter", "tool_diameter", 10.0),
-            ("overlap_percent", "overlap_percent", 50.0),
-            ("width_x", "width_x", 100.0),
-            ("length_y", "length_y", 100.0),
-            ("total_depth", "total_depth", 1.0),
-            ("depth_per_pass", "depth_per_pass", 1.0),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 1000),
-            ("path_type", "path_type", "conventional")
-        ],
-        "2": [
-            ("start_x", "start_x", 0.0),
-            ("start_y", "start_y", 0.0),
-            ("start_z", "start_z", 0.0),
-            ("clearance_height", "clearance_height", 5.0),
-            ("tool_diameter", "tool_diameter", 10.0),
-            ("hole_diameter", "hole_diameter", 30.0),
-            ("total_depth", "total_depth", 2.0),
-            ("depth_per_pass", "depth_per_pass", 1.0),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 24000),
-            ("path_type", "path_type", "conventional"),
-            ("drilling_type", "drilling_type", "contour"),
-            ("overlap_percent", "overlap_percent", 50.0)
-        ],
-        "3": [
-            ("start_x", "start_x", 0.0),
-            ("start_y", "start_y", 0.0),
-            ("start_z", "start_z", 0.0),
-            ("clearance_height", "clearance_height", 5.0),
-            ("spacing_x", "spacing_x", 20.0),
-            ("spacing_y", "spacing_y", 20.0),
-            ("num_rows", "num_rows", 5),
-            ("num_cols", "num_cols", 5),
-            ("total_depth", "total_depth", 10.0),
-            ("depth_per_pass", "depth_per_pass", 1.0),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 1000)
-        ],
-        "4": [
-            ("start_z", "start_z", 0.0),
-            ("clearance_height", "clearance_height", 5.0),
-            ("radius", "radius", 10.0),
-            ("tool_diameter", "tool_diameter", 10.0),
-            ("total_depth", "total_depth", 2.0),
-            ("depth_per_pass", "depth_per_pass", 0.5),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 24000),
-            ("path_type", "path_type", "conventional"),
-            ("corner_type", "corner_type", "front_left")
-        ],
-        "5": [
-            ("start_x", "start_x", 0.0),
-            ("start_y", "start_y", 0.0),
-            ("start_z", "start_z", 0.0),
-            ("length_x", "length_x", 20.0),
-            ("length_y", "length_y", 20.0),
-            ("width", "width", 10.0),
-            ("tool_diameter", "tool_diameter", 5.0),
-            ("path_type", "path_type", "conventional"),
-            ("total_depth", "total_depth", 2.0),
-            ("depth_per_pass", "depth_per_pass", 0.5),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 24000)
-        ],
-        "6": [
-            ("start_x", "start_x", 0.0),
-            ("start_y", "start_y", 0.0),
-            ("start_z", "start_z", 0.0),
-            ("clearance_height", "clearance_height", 5.0),
-            ("tool_diameter", "tool_diameter", 10.0),
-            ("hole_diameter", "hole_diameter", 30.0),
-            ("total_depth", "total_depth", 2.0),
-            ("depth_per_pass", "depth_per_pass", 0.5),
-            ("feed_rate", "feed_rate", 1800),
-            ("spindle_speed", "spindle_speed", 24000),
-            ("path_type", "path_type", "right"),
-            ("thread_type", "thread_type", "nut_internal"),
-            ("overlap_percent", "overlap_percent", 50.0),
-            ("thread_pitch", "thread_pitch", 10.0),
-            ("thread_number", "thread_number", 6)
-        ]
-    }
-
-    params = config.get({"1": "surfacing", "2": "contour_drilling", "3": "matrix_drilling", 
-                         "4": "corner_radius", "5": "oblong_hole", "6": "threading"}.get(selected_mode_id, "surfacing"), {})
+    try:
+        spec = mode_registry.get_mode(selected_mode_id)
+    except ValueError:
+        spec = mode_registry.get_mode("1")
+    params = config.get(spec.section, {})
     
-    for i, (key, label_key, default) in enumerate(mode_params.get(selected_mode_id, [])):
+    for i, (key, default) in enumerate(spec.schema):
+        label_key = key
         var_value = params.get(key, str(default))
         label_text = translations["translations"][lang]["fields"].get(label_key, label_key)
         
         tooltip_text = translations["translations"][lang]["tooltips"].get(label_key, f"Description pour {label_key}")
         
         if key == "path_type":
-            if selected_mode_id == "6":
-                options = [path_type_map[id][lang] for id in ["right", "left"]]
-                default_value = path_type_map.get(var_value, path_type_map["right"]).get(lang, "Droite")
-            elif selected_mode_id == "1":
-                options = [path_type_map[id][lang] for id in ["conventional", "climb", "alternate"]]
-                default_value = path_type_map.get(var_value, path_type_map["conventional"]).get(lang, "Opposition")
-            else:  # Modes 2, 3, 4, 5 : limiter à conventional et climb
-                options = [path_type_map[id][lang] for id in ["conventional", "climb"]]
-                # Si var_value est "alternate", forcer conventional comme valeur par défaut
-                default_value = path_type_map.get(var_value if var_value in ["conventional", "climb"] else "conventional", path_type_map["conventional"]).get(lang, "Opposition")
+            # Sens proposés par le mode ; une valeur non proposée (ex. alternate) revient au premier
+            options = [path_type_map[id][lang] for id in spec.path_types]
+            default_value = path_type_map[var_value if var_value in spec.path_types else spec.path_types[0]][lang]
             var = tk.StringVar(value=default_value)
             cb = ttk.Combobox(frame, values=options, textvariable=var, state="readonly", style="TCombobox", width=30)
             cb.grid(row=i, column=1, padx=5, pady=2, sticky="ew")
@@ -608,66 +476,32 @@ def save_and_generate():
     config["language"] = lang
 
     print(f"Débogage: Paramètres enregistrés : {entry_vars.keys()}")
-    params = {}
-    for k, v in entry_vars.items():
-        if k == "path_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), path_type_map, lang)
-            # Forcer conventional pour modes 2, 4, 5 si alternate est détecté
-            if mode in ["2", "4", "5"] and params[k] == "alternate":
-                params[k] = "conventional"
-                print(f"Débogage: Mode {mode} - path_type 'alternate' non autorisé, forcé à 'conventional'")
-        elif k == "drilling_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), drilling_type_map, lang)
-        elif k == "corner_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), corner_type_map, lang)
-        elif k == "thread_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), thread_type_map, lang)
-        else:
-            try:
-                params[k] = float(v.get()) if k not in ["path_type", "drilling_type", "corner_type", "thread_type"] else v.get()
-            except ValueError:
-                params[k] = v.get()
-
-    if mode == "1":
-        config["surfacing"] = params
-    elif mode == "2":
-        config["contour_drilling"] = params
-        config["contour_drilling"]["is_blind_hole"] = params["drilling_type"] == "blind"
-    elif mode == "6":
-        config["threading"] = params
-    elif mode == "3":
-        config["matrix_drilling"] = params
-    elif mode == "4":
-        config["corner_radius"] = params
-    elif mode == "5":
-        config["oblong_hole"] = params
+    params = collect_params(mode, lang)
+    if "drilling_type" in params:
+        params["is_blind_hole"] = params["drilling_type"] == "blind"
+    config[mode_registry.get_mode(mode).section] = params
 
+    # config.json ne sert qu'à mémoriser les derniers paramètres ; la génération
+    # reçoit directement une requête, dans ce processus.
     save_config(config)
+    request = generation.GenerationRequest(
+        mode=mode,
+        params=params,
+        project_name=config["project_name"],
+        machine=config["machine"],
+        units=config["global_units"] if config["global_units"] in ["mm", "in"] else "mm",
+        percent=generation.parse_percent(config["global_feed_rate_percent"]),
+        language=lang,
+    )
     try:
-        main_script_path = os.path.join(os.path.dirname(__file__), "main_tkinter.py")
-        if os.path.exists(main_script_path):
-            subprocess.run(["python", main_script_path], check=True, cwd=os.path.dirname(__file__))
-            project_name = project_name_var.get()
-            gcode_pattern = os.path.join(os.path.dirname(__file__), f"NC/{mode}_{project_name}_*.nc")
-            gcode_files = glob.glob(gcode_pattern)
-            if gcode_files:
-                latest_file = max(gcode_files, key=os.path.getmtime)
-                gcode_filename = os.path.basename(latest_file)
-                #messagebox.showinfo(
-                #    translations["translations"][lang]["success"],
-                #    translations["translations"][lang]["success_with_file"].format(filename=gcode_filename)
-                #)
-            else:
-                messagebox.showinfo(
-                    translations["translations"][lang]["success"],
-                    translations["translations"][lang]["success"]
-                )
-        else:
-            messagebox.showerror(
-                translations["translations"][lang]["error"],
-                translations["translations"][lang]["script_not_found"].format(path=main_script_path)
-            )
-    except subprocess.CalledProcessError as e:
+        result = generate(request)
+        print(f"Débogage: G-code sauvegardé dans {result.filename}")
+        messagebox.showinfo(
+            translations["translations"][lang]["success"],
+            translations["translations"][lang]["success_with_file"].format(filename=result.filename)
+        )
+        main_tkinter.launch_viewer(result.filename)
+    except ValueError as e:
         messagebox.showerror(
             translations["translations"][lang]["error"],
             translations["translations"][lang]["generation_failed"].format(error=str(e))
@@ -688,23 +522,7 @@ def on_save_profile():
         return  # Annulé
     
     # Récupère les params actuels (comme dans save_and_generate)
-    params = {}
-    for k, v in entry_vars.items():
-        if k == "path_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), path_type_map, lang)
-            if mode_id in ["2", "4", "5"] and params[k] == "alternate":
-                params[k] = "conventional"
-        elif k == "drilling_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), drilling_type_map, lang)
-        elif k == "corner_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), corner_type_map, lang)
-        elif k == "thread_type":
-            params[k] = convert_legacy_to_fixed_id(v.get(), thread_type_map, lang)
-        else:
-            try:
-                params[k] = float(v.get())
-            except ValueError:
-                params[k] = v.get()
+    params = collect_params(mode_id, lang)
     
     general_params = {
         "project_name": project_name_var.get(),
@@ -743,143 +561,144 @@ def on_load_profile():
     
     ttk.Button(profile_window, text="Charger", command=confirm_load).pack(pady=10)
 
-# Initialisation de la fenêtre
-root = tk.Tk()
-translations = load_translations()
-config = load_config()
-language_var = tk.StringVar(value=config.get("language", "fr"))
-
-root.title(translations["translations"][language_var.get()]["title"])
-root.geometry("850x700+100+100")
-
-# Style
-style = ttk.Style()
-style.configure("TFrame", borderwidth=2, relief="groove")
-style.configure("TLabel", borderwidth=1, relief="flat")
-style.configure("TEntry", borderwidth=1, relief="solid")
-style.configure("TCombobox", borderwidth=1, relief="solid")
-
-# Variables
-entry_vars = {}
-mode_options = {
-    "fr": [
-        ("1", "Surfaçage"),
-        ("2", "Perçages par détourage"),
-        ("3", "Matrice perçages"),
-        ("4", "Rayon sur 90°"),
-        ("5", "Trou oblong"),
-        ("6", "Filetage")
-    ],
-    "en": [
-        ("1", "Surfacing"),
-        ("2", "Contour drilling"),
-        ("3", "Matrix drilling"),
-        ("4", "90° corner radius"),
-        ("5", "Oblong hole"),
-        ("6", "Threading")
-    ],
-    "de": [
-        ("1", "Flächenbearbeitung"),
-        ("2", "Konturbohren"),
-        ("3", "Matrixbohren"),
-        ("4", "90°-Eckenradius"),
-        ("5", "Langloch"),
-        ("6", "Gewinde")
-    ],
-    "es": [
-        ("1", "Alisado de superficie"),
-        ("2", "Taladrado de contorno"),
-        ("3", "Taladrado matricial"),
-        ("4", "Radio de esquina de 90°"),
-        ("5", "Agujero oblongo"),
-        ("6", "Rosca")
-    ]
-}
-mode_var = tk.StringVar(value=config.get("last_operation", "1"))
-project_name_var = tk.StringVar(value=config.get("project_name", "test"))
-machine_var = tk.StringVar(value=config.get("machine", "CNC_450x800"))
-global_feed_drill_var = tk.StringVar(value=str(config.get("global_feed_rate_drill", 1800)))
-global_units_var = tk.StringVar(value=config.get("global_units", "mm"))
-
-# Frame pour les champs généraux
-general_frame = ttk.LabelFrame(
-    root,
-    text=translations["translations"][language_var.get()].get("general_settings", "General Settings"),
-    style="TFrame"
-)
-general_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-general_frame.grid_columnconfigure(1, minsize=250)
-
-# Sélection de la langue
-language_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["language_label"], style="TLabel")
-language_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
-language_combo = ttk.Combobox(general_frame, values=list(language_display_names.values()), state="readonly", style="TCombobox", width=30)
-language_combo.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
-language_combo.set(language_display_names.get(language_var.get(), "Français"))
-language_combo.bind("<<ComboboxSelected>>", on_language_select)
-
-# Mode sélection
-mode_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["select_mode"], style="TLabel")
-mode_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
-combo = ttk.Combobox(general_frame, values=[name for _, name in mode_options[language_var.get()]], state="readonly", style="TCombobox", width=30)
-combo.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
-initial_mode = next((name for id, name in mode_options[language_var.get()] if id == mode_var.get()), mode_options[language_var.get()][0][1])
-combo.set(initial_mode)
-combo.bind("<<ComboboxSelected>>", on_mode_select)
-
-# Champs projet et machine
-project_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["project_name"], style="TLabel")
-project_label.grid(row=2, column=0, padx=5, pady=5, sticky="e")
-ttk.Entry(general_frame, textvariable=project_name_var, style="TEntry", width=30).grid(row=2, column=1, padx=5, pady=5, sticky="ew")
-machine_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["machine"], style="TLabel")
-machine_label.grid(row=3, column=0, padx=5, pady=5, sticky="e")
-ttk.Entry(general_frame, textvariable=machine_var, style="TEntry", width=30).grid(row=3, column=1, padx=5, pady=5, sticky="ew")
-
-# Nouveaux champs généraux : Vitesse de descente et Unités (mm/inch)
-global_feed_drill_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["fields"].get("feed_rate_drill", "Vitesse de descente"), style="TLabel")
-global_feed_drill_label.grid(row=4, column=0, padx=5, pady=5, sticky="e")
-
-# Combobox pour pourcentages
-feed_drill_combo = ttk.Combobox(general_frame, textvariable=global_feed_drill_var, state="readonly", width=30)
-feed_drill_combo['values'] = ('25%', '50%', '75%', '100%')
-feed_drill_combo.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
-feed_drill_combo.set('50%')  # Valeur par défaut
-ToolTip(feed_drill_combo, translations["translations"][language_var.get()]["tooltips"].get("feed_rate_drill", "Pourcentage de la vitesse de descente (par rapport à la vitesse de base)"))
-
-global_units_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["fields"].get("units", "Unités (mm/inch)"), style="TLabel")
-global_units_label.grid(row=5, column=0, padx=5, pady=5, sticky="e")
-units_combo = ttk.Combobox(general_frame, values=units_options[language_var.get()], textvariable=global_units_var, state="readonly", style="TCombobox", width=30)
-units_combo.grid(row=5, column=1, padx=5, pady=5, sticky="ew")
-units_combo.set(global_units_var.get())
-ToolTip(units_combo, translations["translations"][language_var.get()]["tooltips"].get("units", "Unités de mesure pour le projet (mm ou pouces)"))
-
-# Frame pour les champs contextuels
-frame = ttk.Frame(root, style="TFrame")
-frame.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
-frame.grid_columnconfigure(1, minsize=250)
-
-# Label pour l'image
-image_label = tk.Label(root, borderwidth=2, relief="groove")
-image_label.grid(row=0, column=2, rowspan=2, padx=5, pady=5, sticky="nsew")
-
-# Bouton de génération
-generate_button = ttk.Button(root, text=translations["translations"][language_var.get()]["generate_button"], command=save_and_generate)
-generate_button.grid(row=2, column=0, columnspan=3, pady=10)
-
-# Frame pour les boutons de profils
-profile_frame = ttk.Frame(root, style="TFrame")
-profile_frame.grid(row=3, column=0, columnspan=3, pady=5, sticky="ew")
-
-ttk.Button(profile_frame, text="Sauvegarder Profil", command=on_save_profile).grid(row=0, column=0, padx=5)
-ttk.Button(profile_frame, text="Charger Profil", command=on_load_profile).grid(row=0, column=1, padx=5)
-
-# Configurer la grille
-root.grid_columnconfigure(0, minsize=150, weight=1)
-root.grid_columnconfigure(1, minsize=150, weight=1)
-root.grid_columnconfigure(2, weight=1)
-root.grid_rowconfigure(1, weight=1)
-
-# Initialisation
-update_fields()
-
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    # Initialisation de la fenêtre
+    root = tk.Tk()
+    translations = load_translations()
+    config = load_config()
+    language_var = tk.StringVar(value=config.get("language", "fr"))
+
+    root.title(translations["translations"][language_var.get()]["title"])
+    root.geometry("850x700+100+100")
+
+    # Style
+    style = ttk.Style()
+    style.configure("TFrame", borderwidth=2, relief="groove")
+    style.configure("TLabel", borderwidth=1, relief="flat")
+    style.configure("TEntry", borderwidth=1, relief="solid")
+    style.configure("TCombobox", borderwidth=1, relief="solid")
+
+    # Variables
+    entry_vars = {}
+    mode_options = {
+        "fr": [
+            ("1", "Surfaçage"),
+            ("2", "Perçages par détourage"),
+            ("3", "Matrice perçages"),
+            ("4", "Rayon sur 90°"),
+            ("5", "Trou oblong"),
+            ("6", "Filetage")
+        ],
+        "en": [
+            ("1", "Surfacing"),
+            ("2", "Contour drilling"),
+            ("3", "Matrix drilling"),
+            ("4", "90° corner radius"),
+            ("5", "Oblong hole"),
+            ("6", "Threading")
+        ],
+        "de": [
+            ("1", "Flächenbearbeitung"),
+            ("2", "Konturbohren"),
+            ("3", "Matrixbohren"),
+            ("4", "90°-Eckenradius"),
+            ("5", "Langloch"),
+            ("6", "Gewinde")
+        ],
+        "es": [
+            ("1", "Alisado de superficie"),
+            ("2", "Taladrado de contorno"),
+            ("3", "Taladrado matricial"),
+            ("4", "Radio de esquina de 90°"),
+            ("5", "Agujero oblongo"),
+            ("6", "Rosca")
+        ]
+    }
+    mode_var = tk.StringVar(value=config.get("last_operation", "1"))
+    project_name_var = tk.StringVar(value=config.get("project_name", "test"))
+    machine_var = tk.StringVar(value=config.get("machine", "CNC_450x800"))
+    global_feed_drill_var = tk.StringVar(value=str(config.get("global_feed_rate_drill", 1800)))
+    global_units_var = tk.StringVar(value=config.get("global_units", "mm"))
+
+    # Frame pour les champs généraux
+    general_frame = ttk.LabelFrame(
+        root,
+        text=translations["translations"][language_var.get()].get("general_settings", "General Settings"),
+        style="TFrame"
+    )
+    general_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+    general_frame.grid_columnconfigure(1, minsize=250)
+
+    # Sélection de la langue
+    language_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["language_label"], style="TLabel")
+    language_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
+    language_combo = ttk.Combobox(general_frame, values=list(language_display_names.values()), state="readonly", style="TCombobox", width=30)
+    language_combo.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+    language_combo.set(language_display_names.get(language_var.get(), "Français"))
+    language_combo.bind("<<ComboboxSelected>>", on_language_select)
+
+    # Mode sélection
+    mode_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["select_mode"], style="TLabel")
+    mode_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
+    combo = ttk.Combobox(general_frame, values=[name for _, name in mode_options[language_var.get()]], state="readonly", style="TCombobox", width=30)
+    combo.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+    initial_mode = next((name for id, name in mode_options[language_var.get()] if id == mode_var.get()), mode_options[language_var.get()][0][1])
+    combo.set(initial_mode)
+    combo.bind("<<ComboboxSelected>>", on_mode_select)
+
+    # Champs projet et machine
+    project_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["project_name"], style="TLabel")
+    project_label.grid(row=2, column=0, padx=5, pady=5, sticky="e")
+    ttk.Entry(general_frame, textvariable=project_name_var, style="TEntry", width=30).grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+    machine_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["machine"], style="TLabel")
+    machine_label.grid(row=3, column=0, padx=5, pady=5, sticky="e")
+    ttk.Entry(general_frame, textvariable=machine_var, style="TEntry", width=30).grid(row=3, column=1, padx=5, pady=5, sticky="ew")
+
+    # Nouveaux champs généraux : Vitesse de descente et Unités (mm/inch)
+    global_feed_drill_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["fields"].get("feed_rate_drill", "Vitesse de descente"), style="TLabel")
+    global_feed_drill_label.grid(row=4, column=0, padx=5, pady=5, sticky="e")
+
+    # Combobox pour pourcentages
+    feed_drill_combo = ttk.Combobox(general_frame, textvariable=global_feed_drill_var, state="readonly", width=30)
+    feed_drill_combo['values'] = ('25%', '50%', '75%', '100%')
+    feed_drill_combo.grid(row=4, column=1, padx=5, pady=5, sticky="ew")
+    feed_drill_combo.set('50%')  # Valeur par défaut
+    ToolTip(feed_drill_combo, translations["translations"][language_var.get()]["tooltips"].get("feed_rate_drill", "Pourcentage de la vitesse de descente (par rapport à la vitesse de base)"))
+
+    global_units_label = ttk.Label(general_frame, text=translations["translations"][language_var.get()]["fields"].get("units", "Unités (mm/inch)"), style="TLabel")
+    global_units_label.grid(row=5, column=0, padx=5, pady=5, sticky="e")
+    units_combo = ttk.Combobox(general_frame, values=units_options[language_var.get()], textvariable=global_units_var, state="readonly", style="TCombobox", width=30)
+    units_combo.grid(row=5, column=1, padx=5, pady=5, sticky="ew")
+    units_combo.set(global_units_var.get())
+    ToolTip(units_combo, translations["translations"][language_var.get()]["tooltips"].get("units", "Unités de mesure pour le projet (mm ou pouces)"))
+
+    # Frame pour les champs contextuels
+    frame = ttk.Frame(root, style="TFrame")
+    frame.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+    frame.grid_columnconfigure(1, minsize=250)
+
+    # Label pour l'image
+    image_label = tk.Label(root, borderwidth=2, relief="groove")
+    image_label.grid(row=0, column=2, rowspan=2, padx=5, pady=5, sticky="nsew")
+
+    # Bouton de génération
+    generate_button = ttk.Button(root, text=translations["translations"][language_var.get()]["generate_button"], command=save_and_generate)
+    generate_button.grid(row=2, column=0, columnspan=3, pady=10)
+
+    # Frame pour les boutons de profils
+    profile_frame = ttk.Frame(root, style="TFrame")
+    profile_frame.grid(row=3, column=0, columnspan=3, pady=5, sticky="ew")
+
+    ttk.Button(profile_frame, text="Sauvegarder Profil", command=on_save_profile).grid(row=0, column=0, padx=5)
+    ttk.Button(profile_frame, text="Charger Profil", command=on_load_profile).grid(row=0, column=1, padx=5)
+
+    # Configurer la grille
+    root.grid_columnconfigure(0, minsize=150, weight=1)
+    root.grid_columnconfigure(1, minsize=150, weight=1)
+    root.grid_columnconfigure(2, weight=1)
+    root.grid_rowconfigure(1, weight=1)
+
+    # Initialisation
+    update_fields()
+
+    root.mainloop()
\ No newline at end of file
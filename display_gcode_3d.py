@@ -1,18 +1,22 @@
 # display_gcode_3d.py
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import matplotlib
 matplotlib.use('TkAgg')  # Forcer l'utilisation du backend TkAgg
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import re
 import os
-import glob
-import numpy as np
 from datetime import datetime
 import sys
 import traceback
 
+import gcode_loader
+import gcode_parser
+import gcode_render
+import nc_index
+import text_view
+import viewer_link
+
 # Journaliser l'environnement au démarrage
 print(f"Débogage: sys.executable : {sys.executable}")
 print(f"Débogage: PYTHONPATH : {os.environ.get('PYTHONPATH', 'Non défini')}")
@@ -43,11 +47,10 @@ def get_latest_gcode_file(nc_dir="NC"):
         if not os.path.exists(nc_dir):
             print(f"Débogage: Dossier NC '{nc_dir}' non trouvé")
             return None
-        gcode_files = glob.glob(os.path.join(nc_dir, "*.nc"))
-        if not gcode_files:
+        latest_file = nc_index.latest_file(nc_dir)
+        if latest_file is None:
             print(f"Débogage: Aucun fichier .nc trouvé dans {nc_dir}")
             return None
-        latest_file = max(gcode_files, key=os.path.getmtime)
         print(f"Débogage: Fichier G-code le plus récent : {latest_file}")
         return latest_file
     except Exception as e:
@@ -58,61 +61,40 @@ def parse_stock_dimensions(gcode):
     """Extrait les dimensions du stock depuis l'en-tête du G-code."""
     print("Débogage: Début de parse_stock_dimensions")
     try:
-        stock_pattern = re.compile(r'\[(\d+\.\d+), (\d+\.\d+), (\d+\.\d+)\]')
-        for line in gcode.split('\n'):
-            match = stock_pattern.search(line)
-            if match:
-                dimensions = float(match.group(1)), float(match.group(2)), float(match.group(3))
-                print(f"Débogage: Dimensions extraites : {dimensions}")
-                return dimensions
+        dimensions = gcode_parser.stock_dimensions(gcode)
+        if dimensions is not None:
+            print(f"Débogage: Dimensions extraites : {dimensions}")
+            return dimensions
         print("Débogage: Dimensions par défaut utilisées")
         return 100.0, 100.0, 10.0
     except Exception as e:
         print(f"Débogage: Erreur dans parse_stock_dimensions : {str(e)}")
         return 100.0, 100.0, 10.0
 
-def interpolate_arc(start_x, start_y, start_z, end_x, end_y, end_z, i, j, direction='G03', num_points=50):
-    """Interpole un arc (G02/G03) entre les points de départ et d'arrivée."""
-    print(f"Débogage: Interpolation d'arc de ({start_x}, {start_y}, {start_z}) à ({end_x}, {end_y}, {end_z})")
-    try:
-        center_x = start_x + i
-        center_y = start_y + j
-        radius = np.sqrt(i**2 + j**2)
-        if radius < 0.0001:
-            print(f"Débogage: Rayon nul ou trop petit pour I={i}, J={j}")
-            return [start_x, end_x], [start_y, end_y], [start_z, end_z]
-        
-        # Vérification optionnelle : distance end au centre
-        dist_end = np.sqrt((end_x - center_x)**2 + (end_y - center_y)**2)
-        if abs(dist_end - radius) > 0.01:
-            print(f"Débogage: Avertissement - End point hors cercle (dist={dist_end:.2f}, radius={radius:.2f}) - Fallback à ligne droite")
-            return [start_x, end_x], [start_y, end_y], [start_z, end_z]
-        
-        start_angle = np.arctan2(start_y - center_y, start_x - center_x)
-        end_angle = np.arctan2(end_y - center_y, end_x - center_x)
-        if direction == 'G03':
-            if end_angle <= start_angle:
-                end_angle += 2 * np.pi
-        else:
-            if end_angle >= start_angle:
-                end_angle -= 2 * np.pi
-        angles = np.linspace(start_angle, end_angle, num_points)
-        x_arc = [center_x + radius * np.cos(angle) for angle in angles]
-        y_arc = [center_y + radius * np.sin(angle) for angle in angles]
-        z_arc = np.linspace(start_z, end_z, num_points)
-        print("Débogage: Arc interpolé avec succès")
-        return x_arc, y_arc, z_arc
-    except Exception as e:
-        print(f"Débogage: Erreur dans interpolate_arc : {str(e)}")
-        return [start_x, end_x], [start_y, end_y], [start_z, end_z]
-
-# Variable globale pour stocker le contenu du G-code chargé
+# G-code affiché : texte passé à plot_gcode_3d, ou chemin du fichier chargé
+# (l'onglet texte ne lit alors le fichier que lorsqu'il est affiché)
 current_gcode_content = ""
+current_gcode_path = None
+# Index des lignes du G-code affiché par l'onglet texte (construit à la première ouverture)
+text_index = None
+
+# Cache disque des programmes analysés : une réouverture ne refait pas l'analyse
+parsed_cache = gcode_loader.default_cache()
 
-def plot_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
-    """Trace le G-code en 3D dans une fenêtre Tkinter."""
-    global current_gcode_content
-    current_gcode_content = gcode  # On stocke le G-code pour l'onglet texte
+# Nombre maximal de segments tracés pendant une rotation ou un zoom (menu Affichage)
+lod_budget = gcode_render.LOD_BUDGET
+
+def plot_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z, moves=None, segments=None):
+    """Trace le G-code en 3D dans une fenêtre Tkinter.
+
+    `moves` et `segments` (segments, types, ligne source de chaque segment) :
+    résultats déjà calculés par le chargement en arrière-plan ; sinon `gcode`
+    est analysé ici.
+    """
+    global current_gcode_content, current_gcode_path
+    if moves is None:
+        # On stocke le G-code pour l'onglet texte
+        current_gcode_content, current_gcode_path = gcode, None
 
     print("Débogage: Début de plot_gcode_3d")
     try:
@@ -124,88 +106,19 @@ def plot_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
             print(f"Débogage: Échec de la création de l'axe 3D : {str(e)}")
             raise
 
-        x, y, z = [], [], []
-        colors = []
-        current_x, current_y, current_z = 0.0, 0.0, 0.0
-        mode = 'absolute'  # G90 par défaut
-        x.append(current_x)
-        y.append(current_y)
-        z.append(current_z)
-
-        coord_pattern = r'([XYZEIJ])([-+]?\d*\.?\d+)'
-
-        for line in gcode.split('\n'):
-            line = line.strip()
-            if not line or line.startswith(';') or line.startswith('('):
-                continue
-            print(f"Débogage: Traitement de la ligne : {line}")
+        # Analyse commune aux visualiseurs (gcode_parser)
+        if moves is None:
+            moves = gcode_parser.parse_gcode(gcode)
+        if segments is None:
+            segs, kinds, source = gcode_parser.segments(moves, chord_error=gcode_parser.CHORD_ERROR)
+            lines = moves["line"][source]
+        else:
+            segs, kinds, lines = segments
+        print(f"Débogage: {len(moves)} mouvements, {len(segs)} segments")
 
-            try:
-                g_match = re.search(r'G(\d+)', line)
-                
-                coords = re.findall(coord_pattern, line)
-                coord_dict = {k: float(v) for k, v in coords}
-                
-                i_match = re.search(r'I([-+]?\d*\.?\d+)', line)
-                j_match = re.search(r'J([-+]?\d*\.?\d+)', line)
-                
-                if mode == 'absolute':
-                    new_x = coord_dict.get('X', current_x)
-                    new_y = coord_dict.get('Y', current_y)
-                    new_z = coord_dict.get('Z', current_z)
-                else:
-                    new_x = current_x + coord_dict.get('X', 0.0)
-                    new_y = current_y + coord_dict.get('Y', 0.0)
-                    new_z = current_z + coord_dict.get('Z', 0.0)
-
-                if g_match:
-                    g_num = g_match.group(1)
-                    g_code = f'G{g_num.zfill(2)}'
-                    
-                    if g_code == 'G90':
-                        mode = 'absolute'
-                        print(f"Débogage: Mode passé en absolu")
-                        continue
-                    elif g_code == 'G91':
-                        mode = 'relative'
-                        print(f"Débogage: Mode passé en relatif")
-                        continue
-                    
-                    if g_code in ('G00', 'G01'):
-                        color_choice = 'y' if g_code == 'G00' else 'r'
-                        colors.append(color_choice)
-                        x.append(new_x)
-                        y.append(new_y)
-                        z.append(new_z)
-                        print(f"Débogage: [{g_code}] vers ({new_x:.3f}, {new_y:.3f}, {new_z:.3f}) mode={mode} COULEUR={color_choice}")
-                        if 'X' not in coord_dict and 'Y' not in coord_dict and 'Z' in coord_dict:
-                            direction = "plunge" if new_z < current_z else "retract"
-                            print(f"Débogage: {direction.capitalize()} Z-only [{g_code}] en {color_choice}")
-                        current_x, current_y, current_z = new_x, new_y, new_z
-                    elif g_code in ('G02', 'G03'):
-                        i = float(i_match.group(1)) if i_match else 0.0
-                        j = float(j_match.group(1)) if j_match else 0.0
-                        print(f"Débogage: Arc G{g_code[-2:]} I={i} J={j} vers ({new_x:.3f}, {new_y:.3f}, {new_z:.3f})")
-                        x_arc, y_arc, z_arc = interpolate_arc(
-                            current_x, current_y, current_z,
-                            new_x, new_y, new_z,
-                            i, j, direction=g_code, num_points=50
-                        )
-                        colors.extend(['b'] * (len(x_arc) - 1))
-                        x.extend(x_arc[1:])
-                        y.extend(y_arc[1:])
-                        z.extend(z_arc[1:])
-                        current_x, current_y, current_z = new_x, new_y, new_z
-                    else:
-                        print(f"Débogage: Commande G-code ignorée : {g_code}")
-            except Exception as e:
-                print(f"Débogage: Erreur lors du traitement de la ligne '{line}' : {str(e)}")
-                continue
-
-        if len(x) > 1 and len(colors) > 0:
-            x_min, x_max = min(x, default=0), max(x, default=stock_x)
-            y_min, y_max = min(y, default=0), max(y, default=stock_y)
-            z_min, z_max = min(z, default=0), max(z, default=stock_z)
+        if len(segs):
+            x_min, y_min, z_min = segs.min(axis=(0, 1)).tolist()
+            x_max, y_max, z_max = segs.max(axis=(0, 1)).tolist()
             x_margin, y_margin, z_margin = stock_x * 0.1, stock_y * 0.1, stock_z * 0.1
 
             span_x = x_max - x_min
@@ -222,10 +135,18 @@ def plot_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
             y_max = max(y_max, y_min + max_span)
             x_margin, y_margin = (x_max - x_min) * 0.1, (y_max - y_min) * 0.1
 
-            for i in range(len(x) - 1):
-                color = colors[i]
-                if not (np.isnan(x[i]) or np.isnan(x[i+1]) or np.isnan(y[i]) or np.isnan(y[i+1]) or np.isnan(z[i]) or np.isnan(z[i+1])):
-                    ax.plot([x[i], x[i+1]], [y[i], y[i+1]], [z[i], z[i+1]], color + '-', linewidth=1)
+            # Une Line3DCollection par classe de mouvement (rapide, travail, arc),
+            # simplifiée pendant les rotations et zooms
+            if getattr(canvas_widget, 'lod', None) is not None:
+                canvas_widget.lod.close()
+            canvas_widget.lod = gcode_render.ToolpathLOD(ax, segs, kinds, linewidth=1, budget=lod_budget)
+            if canvas_widget.lod.coarse:
+                print(f"Débogage: Tracé simplifié en mouvement : {canvas_widget.lod.coarse_count} segments")
+
+            # Clic sur le trajet : ligne du G-code qui l'a produit (et inversement depuis l'onglet texte)
+            if getattr(canvas_widget, 'picker', None) is not None:
+                canvas_widget.picker.close()
+            canvas_widget.picker = gcode_render.ToolpathPicker(ax, segs, lines, on_pick=on_path_picked)
 
             ax.legend(loc='upper right')
 
@@ -278,7 +199,6 @@ def plot_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
         return None
 
 def open_gcode_file():
-    global current_gcode_content
     print("Débogage: Ouverture d'un fichier G-code")
     file_path = filedialog.askopenfilename(
         initialdir=os.path.join(os.path.dirname(__file__), "NC"),
@@ -286,19 +206,47 @@ def open_gcode_file():
         filetypes=[("Fichiers G-code", "*.nc"), ("Tous les fichiers", "*.*")]
     )
     if file_path:
-        try:
-            with open(file_path, 'r') as f:
-                gcode = f.read()
-            current_gcode_content = gcode
-            print(f"Débogage: Fichier G-code chargé : {file_path}")
-            file_label.configure(text=f"Fichier chargé : {os.path.basename(file_path)}")
-            stock_x, stock_y, stock_z = parse_stock_dimensions(gcode)
-            plot_gcode_3d(gcode, canvas_frame, stock_x, stock_y, stock_z)
-            refresh_text_tab()  # Mise à jour de l'onglet texte
-        except Exception as e:
-            print(f"Débogage: Erreur dans open_gcode_file : {str(e)}")
-            messagebox.showerror("Erreur", f"Échec du chargement du G-code : {str(e)}")
-            file_label.configure(text="Erreur lors du chargement")
+        start_loading(file_path)
+
+def start_loading(file_path, moves=None):
+    """Charge le fichier en arrière-plan ; le tracé est fait à la fin, dans le thread de l'interface."""
+    print(f"Débogage: Chargement en arrière-plan de {file_path}")
+    file_label.configure(text=f"Chargement : {os.path.basename(file_path)}")
+    load_panel.start(gcode_loader.LoadJob(file_path, cache=parsed_cache, moves=moves),
+                     on_file_loaded, on_load_error, on_load_cancelled)
+
+def on_file_loaded(result):
+    global current_gcode_content, current_gcode_path
+    current_gcode_content, current_gcode_path = "", result.path
+    print(f"Débogage: Fichier G-code chargé : {result.path}")
+    file_label.configure(text=f"Fichier chargé : {os.path.basename(result.path)}")
+    stock_x, stock_y, stock_z = parse_stock_dimensions(result.header)
+    plot_gcode_3d(result.header, canvas_frame, stock_x, stock_y, stock_z,
+                  moves=result.moves, segments=(result.segments, result.kinds, result.lines))
+    if notebook.index(notebook.select()) == 1:  # onglet texte affiché
+        refresh_text_tab()
+
+def on_load_error(error):
+    print(f"Débogage: Erreur de chargement : {str(error)}")
+    messagebox.showerror("Erreur", f"Échec du chargement du G-code : {str(error)}")
+    file_label.configure(text="Erreur lors du chargement")
+
+def on_load_cancelled(job):
+    print(f"Débogage: Chargement annulé : {job.path}")
+    file_label.configure(text="Chargement annulé")
+
+def set_lod_budget():
+    """Demande le nombre maximal de segments tracés pendant une rotation ou un zoom."""
+    global lod_budget
+    budget = simpledialog.askinteger("Détail en mouvement",
+                                     "Segments tracés au maximum pendant une rotation ou un zoom :",
+                                     initialvalue=lod_budget, minvalue=1000, parent=root)
+    if budget is None or budget == lod_budget:
+        return
+    lod_budget = budget
+    print(f"Débogage: Budget de segments en mouvement : {lod_budget}")
+    if current_gcode_path is not None:
+        start_loading(current_gcode_path)  # Le cache d'analyse rend le rechargement rapide
 
 def save_image():
     print("Débogage: Sauvegarde de l'image")
@@ -346,7 +294,8 @@ def show_help():
         "- Boutons de rotation : Utilisez 'Tourner X+', 'Tourner X-', 'Tourner Y+', 'Tourner Y-' pour tourner manuellement\n"
         "- Réinitialiser la vue : Menu Affichage > Réinitialiser la vue\n"
         "- Barre d'outils : Utilisez les icônes en haut pour zoom, pan, rotation, etc.\n"
-        "- Couleurs : Jaune (G00 rapide), Rouge (G01 linéaire), Bleu (G02/G03 arcs)"
+        "- Couleurs : Jaune (G00 rapide), Rouge (G01 linéaire), Bleu (G02/G03 arcs)\n"
+        "- Clic sur le trajet : ligne du G-code correspondante (onglet texte) ; clic sur une ligne : segments en évidence"
     )
     messagebox.showinfo("Aide", help_text)
 
@@ -354,12 +303,44 @@ def about():
     messagebox.showinfo("À propos", "Visualisation 3D du G-code\nVersion 2.0 (avec onglets)\nDéveloppé pour Gcode-Generator")
 
 def refresh_text_tab():
-    """Met à jour le contenu de l'onglet texte avec le G-code actuel."""
-    text_widget.delete('1.0', tk.END)
-    text_widget.insert('1.0', current_gcode_content)
+    """Met à jour l'onglet texte avec le G-code actuel (seules les lignes visibles sont lues)."""
+    global text_index
+    try:
+        if current_gcode_path is not None:
+            if text_index is None or not text_index.is_current(current_gcode_path):
+                text_index = text_view.LineIndex.from_file(current_gcode_path)
+                print(f"Débogage: Index des lignes construit : {len(text_index)} lignes")
+        elif text_index is None or text_index.text is not current_gcode_content:
+            text_index = text_view.LineIndex.from_text(current_gcode_content)
+    except OSError as e:
+        text_index = text_view.LineIndex.from_text(f"Lecture impossible : {e}")
+    text_viewer.set_index(text_index)
+
+def on_path_picked(line):
+    """Clic sur le trajet 3D : affiche la ligne source dans l'onglet texte."""
+    print(f"Débogage: Segment sélectionné, ligne {line + 1}")
+    notebook.select(1)
+    refresh_text_tab()
+    text_viewer.goto(line)
+
+def on_text_line_selected(line):
+    """Ligne choisie dans l'onglet texte : met ses segments en évidence dans la vue 3D."""
+    picker = getattr(canvas_frame, 'picker', None)
+    if picker is not None and picker.line != line:
+        count = picker.highlight_line(line)
+        print(f"Débogage: Ligne {line + 1} : {count} segments mis en évidence")
+
+def goto_line():
+    """Affiche l'onglet texte à la ligne demandée."""
+    refresh_text_tab()
+    line = simpledialog.askinteger("Aller à la ligne", "Numéro de ligne :", minvalue=1,
+                                   maxvalue=max(len(text_index), 1), parent=root)
+    if line is None:
+        return
+    notebook.select(1)
+    text_viewer.goto(line - 1)
 
 def update_visualization():
-    global current_gcode_content
     print("Débogage: Début de update_visualization")
     gcode_file = get_latest_gcode_file()
     if not gcode_file:
@@ -367,120 +348,131 @@ def update_visualization():
         file_label.configure(text="Aucun fichier chargé")
         return
 
-    try:
-        with open(gcode_file, 'r') as f:
-            gcode = f.read()
-        current_gcode_content = gcode
-        file_label.configure(text=f"Fichier chargé : {os.path.basename(gcode_file)}")
-        stock_x, stock_y, stock_z = parse_stock_dimensions(gcode)
-        plot_gcode_3d(gcode, canvas_frame, stock_x, stock_y, stock_z)
-        refresh_text_tab()  # Mise à jour de l'onglet texte
-    except Exception as e:
-        messagebox.showerror("Erreur", f"Échec du chargement du G-code : {str(e)}")
-        file_label.configure(text="Erreur lors du chargement")
+    start_loading(gcode_file)
+
+def poll_viewer_link():
+    """Traite les demandes des générations suivantes (thread de l'interface)."""
+    for message in viewer_server.pending():
+        if message.get("command") == "load" and message.get("path"):
+            print(f"Débogage: Demande de chargement reçue : {message['path']}")
+            root.deiconify()
+            root.lift()
+            root.focus_force()
+            start_loading(message["path"], message.get("moves"))
+    root.after(200, poll_viewer_link)
 
 def on_closing():
     print("Débogage: Fermeture de l'application")
     try:
+        if viewer_server is not None:
+            viewer_server.close()
         plt.close('all')
         root.destroy()
     except Exception as e:
         print(f"Débogage: Erreur lors de la fermeture : {str(e)}")
 
 # ==================== INTERFACE GRAPHIQUE ====================
-try:
-    root = tk.Tk()
-    root.title("Visualisation 3D du G-code")
-    root.geometry("1100x750+950+100")  # Un peu plus large pour les onglets
-
-    # Barre de menus
-    menubar = tk.Menu(root)
-    root.config(menu=menubar)
-
-    file_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Fichier", menu=file_menu)
-    file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
-    file_menu.add_command(label="Recharger", command=update_visualization)
-    file_menu.add_command(label="Sauvegarder image...", command=save_image)
-    file_menu.add_separator()
-    file_menu.add_command(label="Quitter", command=on_closing)
-
-    view_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Affichage", menu=view_menu)
-    view_menu.add_command(label="Réinitialiser la vue", command=reset_view)
-
-    help_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Aide", menu=help_menu)
-    help_menu.add_command(label="Instructions", command=show_help)
-    help_menu.add_command(label="À propos", command=about)
-
-    style = ttk.Style()
-    style.configure("TFrame", borderwidth=2, relief="groove")
-
-    # Notebook (onglets)
-    notebook = ttk.Notebook(root)
-    notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-
-    # Onglet Vue 3D
-    tab_3d = ttk.Frame(notebook)
-    notebook.add(tab_3d, text="Vue 3D")
-
-    canvas_frame = ttk.Frame(tab_3d)
-    canvas_frame.pack(fill=tk.BOTH, expand=True)
-
-    # Onglet G-code texte
-    tab_text = ttk.Frame(notebook)
-    notebook.add(tab_text, text="G-code texte")
-
-    text_frame = ttk.Frame(tab_text)
-    text_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-    text_widget = tk.Text(text_frame, wrap="none", font=("Courier", 10))
-    v_scroll = ttk.Scrollbar(text_frame, orient="vertical", command=text_widget.yview)
-    h_scroll = ttk.Scrollbar(text_frame, orient="horizontal", command=text_widget.xview)
-    text_widget.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
-
-    text_widget.grid(row=0, column=0, sticky="nsew")
-    v_scroll.grid(row=0, column=1, sticky="ns")
-    h_scroll.grid(row=1, column=0, sticky="ew")
-
-    text_frame.grid_rowconfigure(0, weight=1)
-    text_frame.grid_columnconfigure(0, weight=1)
-
-    # Contrôles (boutons de rotation, etc.)
-    control_frame = ttk.Frame(root)
-    control_frame.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
-
-    ttk.Button(control_frame, text="Tourner X+", command=lambda: rotate_view('X', 15)).grid(row=0, column=0, padx=5)
-    ttk.Button(control_frame, text="Tourner X-", command=lambda: rotate_view('X', -15)).grid(row=0, column=1, padx=5)
-    ttk.Button(control_frame, text="Tourner Y+", command=lambda: rotate_view('Y', 15)).grid(row=0, column=2, padx=5)
-    ttk.Button(control_frame, text="Tourner Y-", command=lambda: rotate_view('Y', -15)).grid(row=0, column=3, padx=5)
-
-    file_label = ttk.Label(root, text="Aucun fichier chargé")
-    file_label.grid(row=2, column=0, padx=5, pady=5)
-
-    reload_button = ttk.Button(root, text="Recharger le dernier G-code", command=update_visualization)
-    reload_button.grid(row=3, column=0, padx=5, pady=10)
-
-    # Configuration du grid principal
-    root.grid_columnconfigure(0, weight=1)
-    root.grid_rowconfigure(0, weight=1)
-
-    # Rafraîchir l'onglet texte quand on y passe (au cas où le contenu aurait changé)
-    def on_tab_changed(event):
-        if notebook.index(notebook.select()) == 1:  # onglet texte
-            refresh_text_tab()
-
-    notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
-
-    root.protocol("WM_DELETE_WINDOW", on_closing)
+# Pas à l'import : les processus d'analyse (spawn) réimportent ce script
+if __name__ == "__main__":
+    try:
+        root = tk.Tk()
+        root.title("Visualisation 3D du G-code")
+        root.geometry("1100x750+950+100")  # Un peu plus large pour les onglets
+
+        # Barre de menus
+        menubar = tk.Menu(root)
+        root.config(menu=menubar)
+
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Fichier", menu=file_menu)
+        file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
+        file_menu.add_command(label="Recharger", command=update_visualization)
+        file_menu.add_command(label="Sauvegarder image...", command=save_image)
+        file_menu.add_separator()
+        file_menu.add_command(label="Quitter", command=on_closing)
+
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Affichage", menu=view_menu)
+        view_menu.add_command(label="Réinitialiser la vue", command=reset_view)
+        view_menu.add_command(label="Détail en mouvement...", command=set_lod_budget)
+        view_menu.add_command(label="Aller à la ligne...", command=goto_line, accelerator="Ctrl+G")
+        root.bind("<Control-g>", lambda event: goto_line())
+
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Aide", menu=help_menu)
+        help_menu.add_command(label="Instructions", command=show_help)
+        help_menu.add_command(label="À propos", command=about)
+
+        style = ttk.Style()
+        style.configure("TFrame", borderwidth=2, relief="groove")
+
+        # Notebook (onglets)
+        notebook = ttk.Notebook(root)
+        notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+
+        # Onglet Vue 3D
+        tab_3d = ttk.Frame(notebook)
+        notebook.add(tab_3d, text="Vue 3D")
+
+        canvas_frame = ttk.Frame(tab_3d)
+        canvas_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Onglet G-code texte
+        tab_text = ttk.Frame(notebook)
+        notebook.add(tab_text, text="G-code texte")
+
+        # Texte virtualisé : seules les lignes visibles sont insérées dans le widget
+        text_viewer = text_view.VirtualTextView(tab_text, font=("Courier", 10))
+        text_viewer.frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        text_viewer.on_select = on_text_line_selected
+
+        # Contrôles (boutons de rotation, etc.)
+        control_frame = ttk.Frame(root)
+        control_frame.grid(row=1, column=0, padx=5, pady=5, sticky="ew")
+
+        ttk.Button(control_frame, text="Tourner X+", command=lambda: rotate_view('X', 15)).grid(row=0, column=0, padx=5)
+        ttk.Button(control_frame, text="Tourner X-", command=lambda: rotate_view('X', -15)).grid(row=0, column=1, padx=5)
+        ttk.Button(control_frame, text="Tourner Y+", command=lambda: rotate_view('Y', 15)).grid(row=0, column=2, padx=5)
+        ttk.Button(control_frame, text="Tourner Y-", command=lambda: rotate_view('Y', -15)).grid(row=0, column=3, padx=5)
+
+        file_label = ttk.Label(root, text="Aucun fichier chargé")
+        file_label.grid(row=2, column=0, padx=5, pady=5)
+
+        reload_button = ttk.Button(root, text="Recharger le dernier G-code", command=update_visualization)
+        reload_button.grid(row=3, column=0, padx=5, pady=10)
+
+        # Progression des chargements en arrière-plan (affichée pendant un chargement)
+        load_panel = gcode_loader.LoadPanel(root)
+        load_panel.frame.grid(row=4, column=0, padx=5, pady=5, sticky="ew")
+        load_panel.frame.grid_remove()
+
+        # Configuration du grid principal
+        root.grid_columnconfigure(0, weight=1)
+        root.grid_rowconfigure(0, weight=1)
+
+        # Rafraîchir l'onglet texte quand on y passe (au cas où le contenu aurait changé)
+        def on_tab_changed(event):
+            if notebook.index(notebook.select()) == 1:  # onglet texte
+                refresh_text_tab()
+
+        notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+
+        root.protocol("WM_DELETE_WINDOW", on_closing)
+
+        # Rester à l'écoute : les générations suivantes réutilisent cette fenêtre
+        try:
+            viewer_server = viewer_link.ViewerServer()
+            root.after(200, poll_viewer_link)
+        except OSError as e:
+            viewer_server = None
+            print(f"Débogage: Écoute du visualiseur impossible : {str(e)}")
 
-    # Chargement initial
-    update_visualization()
-    root.mainloop()
+        # Chargement initial
+        update_visualization()
+        root.mainloop()
 
-except Exception as e:
-    print(f"Débogage: Erreur lors de l'initialisation de la fenêtre : {str(e)}")
-    print(f"Débogage: Traceback : {traceback.format_exc()}")
-    messagebox.showerror("Erreur", f"Échec de l'initialisation : {str(e)}")
-    sys.exit(1)
\ No newline at end of file
+    except Exception as e:
+        print(f"Débogage: Erreur lors de l'initialisation de la fenêtre : {str(e)}")
+        print(f"Débogage: Traceback : {traceback.format_exc()}")
+        messagebox.showerror("Erreur", f"Échec de l'initialisation : {str(e)}")
+        sys.exit(1)
\ No newline at end of file
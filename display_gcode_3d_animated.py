@@ -5,14 +5,15 @@ import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.animation import FuncAnimation
-import re
 import os
-import glob
-import numpy as np
 import sys
 import traceback
 
+import gcode_loader
+import gcode_parser
+import gcode_render
+import nc_index
+
 # Journalisation
 print(f"Python: {sys.executable}")
 print(f"Matplotlib version: {matplotlib.__version__}")
@@ -32,110 +33,36 @@ def get_latest_gcode_file(nc_dir="NC"):
         path = sys.argv[1]
         if os.path.exists(path):
             return path
-    nc_dir = os.path.join(os.path.dirname(__file__), nc_dir)
-    if not os.path.isdir(nc_dir):
-        return None
-    files = glob.glob(os.path.join(nc_dir, "*.nc"))
-    return max(files, key=os.path.getmtime) if files else None
+    return nc_index.latest_file(os.path.join(os.path.dirname(__file__), nc_dir))
 
 
 def parse_stock_dimensions(gcode):
-    """Extrait [X, Y, Z] du stock dans l'en-tête."""
-    match = re.search(r'\[(\d+\.\d+), (\d+\.\d+), (\d+\.\d+)\]', gcode)
-    return (float(match.group(1)), float(match.group(2)), float(match.group(3))) if match else (100.0, 100.0, 10.0)
+    """Extrait (X, Y, Z) du stock dans l'en-tête."""
+    return gcode_parser.stock_dimensions(gcode) or (100.0, 100.0, 10.0)
 
 
-def interpolate_arc(start_x, start_y, start_z, end_x, end_y, end_z, i, j, direction='G03', num_points=30):
-    """Interpole un arc G02/G03."""
-    try:
-        center_x, center_y = start_x + i, start_y + j
-        radius = np.sqrt(i**2 + j**2)
-        if radius < 1e-6:
-            return [start_x, end_x], [start_y, end_y], [start_z, end_z]
-
-        start_angle = np.arctan2(start_y - center_y, start_x - center_x)
-        end_angle = np.arctan2(end_y - center_y, end_x - center_x)
-        if direction == 'G03' and end_angle <= start_angle:
-            end_angle += 2 * np.pi
-        elif direction == 'G02' and end_angle >= start_angle:
-            end_angle -= 2 * np.pi
-
-        angles = np.linspace(start_angle, end_angle, num_points)
-        x_arc = center_x + radius * np.cos(angles)
-        y_arc = center_y + radius * np.sin(angles)
-        z_arc = np.linspace(start_z, end_z, num_points)
-        return x_arc.tolist(), y_arc.tolist(), z_arc.tolist()
-    except:
-        return [start_x, end_x], [start_y, end_y], [start_z, end_z]
+def prepare_gcode_segments(gcode):
+    """Analyse le G-code (gcode_parser) ; retourne les segments (N, 2, 3), leurs types de mouvement et le temps machine cumulé."""
+    moves = gcode_parser.parse_gcode(gcode)
+    segs, kinds, source = gcode_parser.segments(moves, chord_error=gcode_parser.CHORD_ERROR)
+    return segs, kinds, gcode_parser.segment_times(segs, kinds, moves["f"][source])
 
 
-def prepare_gcode_segments(gcode):
-    """Parse le G-code et retourne liste de segments + couleurs."""
-    segments = []
-    colors = []
-    current_x = current_y = current_z = 0.0
-    mode = 'absolute'
-
-    for line in gcode.split('\n'):
-        line = line.strip()
-        if not line or line.startswith(';') or line.startswith('('):
-            continue
-
-        coord_dict = dict(re.findall(r'([XYZEIJ])([-+]?\d*\.?\d+)', line))
-        for k in coord_dict:
-            coord_dict[k] = float(coord_dict[k])
-
-        new_x = coord_dict.get('X', current_x) if mode == 'absolute' else current_x + coord_dict.get('X', 0)
-        new_y = coord_dict.get('Y', current_y) if mode == 'absolute' else current_y + coord_dict.get('Y', 0)
-        new_z = coord_dict.get('Z', current_z) if mode == 'absolute' else current_z + coord_dict.get('Z', 0)
-
-        g_match = re.search(r'G(\d+)', line)
-        if not g_match:
-            continue
-        g_code = f'G{g_match.group(1).zfill(2)}'
-
-        if g_code == 'G90':
-            mode = 'absolute'
-            continue
-        if g_code == 'G91':
-            mode = 'relative'
-            continue
-
-        if g_code in ('G00', 'G01'):
-            color = 'y' if g_code == 'G00' else 'r'
-            segments.append(([current_x, new_x], [current_y, new_y], [current_z, new_z]))
-            colors.append(color)
-            current_x, current_y, current_z = new_x, new_y, new_z
-
-        elif g_code in ('G02', 'G03'):
-            i = coord_dict.get('I', 0.0)
-            j = coord_dict.get('J', 0.0)
-            x_arc, y_arc, z_arc = interpolate_arc(current_x, current_y, current_z, new_x, new_y, new_z, i, j, g_code)
-            for k in range(1, len(x_arc)):
-                segments.append(([x_arc[k-1], x_arc[k]], [y_arc[k-1], y_arc[k]], [z_arc[k-1], z_arc[k]]))
-                colors.append('b')
-            current_x, current_y, current_z = new_x, new_y, new_z
-
-    return segments, colors
-
-
-def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
+def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z, segments=None):
     global anim_running
     anim_running = False
+    if getattr(canvas_widget, 'anim', None):
+        canvas_widget.anim.close()
 
-    segments, colors = prepare_gcode_segments(gcode)
-    if not segments:
+    # `segments` : (segments, types, temps cumulé) déjà calculés par le chargement en arrière-plan
+    segments, kinds, times = segments if segments is not None else prepare_gcode_segments(gcode)
+    if not len(segments):
         messagebox.showwarning("Avertissement", "Aucun mouvement détecté.")
         return None
 
     # === CALCUL DES LIMITES RÉELLES ===
-    all_x = [coord for seg in segments for coord in seg[0]]
-    all_y = [coord for seg in segments for coord in seg[1]]
-    all_z = [coord for seg in segments for coord in seg[2]]
-
-    x_min, x_max = min(all_x), max(all_x)
-    y_min, y_max = min(all_y), max(all_y)
-    z_min, z_max = min(all_z), max(all_z)
+    x_min, y_min, z_min = segments.min(axis=(0, 1)).tolist()
+    x_max, y_max, z_max = segments.max(axis=(0, 1)).tolist()
 
     # Éviter division par zéro
     x_span = max(x_max - x_min, 1)
@@ -171,28 +98,6 @@ def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
     ax.set_title('Animation 3D du G-code')
     ax.legend()
 
-    lines = []
-
-    def init():
-        return lines
-
-    def update(frame):
-        nonlocal lines
-        for line in lines:
-            line.remove()
-        lines = []
-        for i in range(frame):
-            xs, ys, zs = segments[i]
-            line, = ax.plot(xs, ys, zs, colors[i] + '-', linewidth=1.5)
-            lines.append(line)
-        return lines
-
-    # Animation
-    anim = FuncAnimation(
-        fig, update, frames=len(segments),
-        init_func=init, interval=100, blit=False, repeat=False
-    )
-
     # Intégrer dans Tkinter
     for widget in canvas_widget.winfo_children():
         widget.destroy()
@@ -204,20 +109,27 @@ def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
     toolbar.update()
     toolbar.pack(side=tk.TOP, fill=tk.X)
 
+    # Animation incrémentale au temps machine : chaque image ne trace que les segments terminés depuis la précédente
+    anim = gcode_render.ToolpathAnimation(ax, segments, kinds, linewidth=1.5, interval=40, times=times)
+    timeline.attach(anim)
     canvas.draw()
+    anim.play()
 
     # Stocker
     canvas_widget.anim = anim
     canvas_widget.figure = fig
     canvas_widget.ax = ax
     canvas_widget.segments = segments
-    canvas_widget.colors = colors
+    canvas_widget.kinds = kinds
 
     anim_running = True
     return canvas
 
 
 # === Interface Tkinter ===
+current_file = None
+parsed_cache = gcode_loader.default_cache()  # réouverture sans nouvelle analyse
+
 def open_gcode_file():
     path = filedialog.askopenfilename(
         initialdir=os.path.join(os.path.dirname(__file__), "NC"),
@@ -228,14 +140,20 @@ def open_gcode_file():
         load_and_animate(path)
 
 def load_and_animate(file_path):
+    """Charge le fichier en arrière-plan puis lance l'animation (thread de l'interface)."""
+    file_label.configure(text=f"Chargement : {os.path.basename(file_path)}")
+    load_panel.start(gcode_loader.LoadJob(file_path, cache=parsed_cache), on_file_loaded,
+                     lambda e: messagebox.showerror("Erreur", f"Échec chargement :\n{e}"),
+                     lambda job: file_label.configure(text="Chargement annulé"))
+
+def on_file_loaded(result):
     global current_file
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            gcode = f.read()
-        current_file = file_path
-        stock_x, stock_y, stock_z = parse_stock_dimensions(gcode)
-        file_label.configure(text=f"Fichier: {os.path.basename(file_path)}")
-        animate_gcode_3d(gcode, canvas_frame, stock_x, stock_y, stock_z)
+        current_file = result.path
+        stock_x, stock_y, stock_z = parse_stock_dimensions(result.header)
+        file_label.configure(text=f"Fichier: {os.path.basename(result.path)}")
+        animate_gcode_3d(result.header, canvas_frame, stock_x, stock_y, stock_z,
+                         segments=(result.segments, result.kinds, result.times))
     except Exception as e:
         messagebox.showerror("Erreur", f"Échec chargement :\n{e}")
 
@@ -264,11 +182,11 @@ def toggle_animation():
     if not hasattr(canvas_frame, 'anim'):
         return
     if anim_running:
-        canvas_frame.anim.event_source.stop()
+        canvas_frame.anim.pause()
         toggle_btn.configure(text="▶ Reprendre")
         anim_running = False
     else:
-        canvas_frame.anim.event_source.start()
+        canvas_frame.anim.play()
         toggle_btn.configure(text="⏸ Pause")
         anim_running = True
 
@@ -288,7 +206,8 @@ def show_help():
         "• Rotation : Clic gauche + glisser\n"
         "• Zoom : Molette ou clic droit\n"
         "• Pan : Clic milieu\n"
-        "• Boutons : Tourner X/Y, Pause, etc."
+        "• Boutons : Tourner X/Y, Pause, etc.\n"
+        "• Ligne de temps : aller à un instant du temps machine"
     )
     messagebox.showinfo("Aide", msg)
 
@@ -301,71 +220,82 @@ def on_closing():
 
 
 # === Lancement ===
-try:
-    root = tk.Tk()
-    root.title("Visualisation 3D Animée du G-code")
-    root.geometry("750x780+900+50")
-    root.minsize(600, 500)
-
-    # Menu
-    menubar = tk.Menu(root)
-    root.config(menu=menubar)
-
-    file_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Fichier", menu=file_menu)
-    file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
-    file_menu.add_command(label="Recharger dernier", command=update_visualization)
-    file_menu.add_command(label="Sauvegarder image...", command=save_image)
-    file_menu.add_separator()
-    file_menu.add_command(label="Quitter", command=on_closing)
-
-    view_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Affichage", menu=view_menu)
-    view_menu.add_command(label="Réinitialiser vue", command=reset_view)
-
-    help_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Aide", menu=help_menu)
-    help_menu.add_command(label="Instructions", command=show_help)
-    help_menu.add_command(label="À propos", command=about)
-
-    # Style
-    style = ttk.Style()
-    style.configure("TFrame", padding=5)
-    style.configure("TButton", padding=6)
-
-    # Canvas
-    canvas_frame = ttk.Frame(root)
-    canvas_frame.grid(row=0, column=0, columnspan=5, padx=5, pady=5, sticky="nsew")
-
-    # Contrôles
-    ctrl_frame = ttk.Frame(root)
-    ctrl_frame.grid(row=1, column=0, columnspan=5, pady=5, sticky="ew")
-
-    ttk.Button(ctrl_frame, text="Tourner X+", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=0, padx=3)
-    ttk.Button(ctrl_frame, text="Tourner X-", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=1, padx=3)
-    ttk.Button(ctrl_frame, text="Tourner Y+", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=2, padx=3)
-    ttk.Button(ctrl_frame, text="Tourner Y-", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=3, padx=3)
-
-    toggle_btn = ttk.Button(ctrl_frame, text="⏸ Pause", command=toggle_animation)
-    toggle_btn.grid(row=0, column=4, padx=10)
-
-    # Étiquette fichier
-    file_label = ttk.Label(root, text="Aucun fichier chargé", foreground="gray")
-    file_label.grid(row=2, column=0, columnspan=5, pady=5)
-
-    # Bouton recharger
-    ttk.Button(root, text="Recharger dernier G-code", command=update_visualization).grid(row=3, column=0, columnspan=5, pady=8)
-
-    # Grille
-    root.grid_columnconfigure(0, weight=1)
-    root.grid_rowconfigure(0, weight=1)
-
-    root.protocol("WM_DELETE_WINDOW", on_closing)
-
-    # Démarrage
-    update_visualization()
-    root.mainloop()
-
-except Exception as e:
-    messagebox.showerror("Erreur fatale", f"{e}\n{traceback.format_exc()}")
-    sys.exit(1)
\ No newline at end of file
+# Pas à l'import : les processus d'analyse (spawn) réimportent ce script
+if __name__ == "__main__":
+    try:
+        root = tk.Tk()
+        root.title("Visualisation 3D Animée du G-code")
+        root.geometry("750x780+900+50")
+        root.minsize(600, 500)
+
+        # Menu
+        menubar = tk.Menu(root)
+        root.config(menu=menubar)
+
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Fichier", menu=file_menu)
+        file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
+        file_menu.add_command(label="Recharger dernier", command=update_visualization)
+        file_menu.add_command(label="Sauvegarder image...", command=save_image)
+        file_menu.add_separator()
+        file_menu.add_command(label="Quitter", command=on_closing)
+
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Affichage", menu=view_menu)
+        view_menu.add_command(label="Réinitialiser vue", command=reset_view)
+
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Aide", menu=help_menu)
+        help_menu.add_command(label="Instructions", command=show_help)
+        help_menu.add_command(label="À propos", command=about)
+
+        # Style
+        style = ttk.Style()
+        style.configure("TFrame", padding=5)
+        style.configure("TButton", padding=6)
+
+        # Canvas
+        canvas_frame = ttk.Frame(root)
+        canvas_frame.grid(row=0, column=0, columnspan=5, padx=5, pady=5, sticky="nsew")
+
+        # Contrôles
+        ctrl_frame = ttk.Frame(root)
+        ctrl_frame.grid(row=1, column=0, columnspan=5, pady=5, sticky="ew")
+
+        ttk.Button(ctrl_frame, text="Tourner X+", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=0, padx=3)
+        ttk.Button(ctrl_frame, text="Tourner X-", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=1, padx=3)
+        ttk.Button(ctrl_frame, text="Tourner Y+", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=2, padx=3)
+        ttk.Button(ctrl_frame, text="Tourner Y-", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=3, padx=3)
+
+        toggle_btn = ttk.Button(ctrl_frame, text="⏸ Pause", command=toggle_animation)
+        toggle_btn.grid(row=0, column=4, padx=10)
+
+        # Étiquette fichier
+        file_label = ttk.Label(root, text="Aucun fichier chargé", foreground="gray")
+        file_label.grid(row=3, column=0, columnspan=5, pady=5)
+
+        # Bouton recharger
+        ttk.Button(root, text="Recharger dernier G-code", command=update_visualization).grid(row=4, column=0, columnspan=5, pady=8)
+
+        # Ligne de temps : position dans le temps machine, curseur pour s'y déplacer
+        timeline = gcode_render.TimelinePanel(root)
+        timeline.frame.grid(row=2, column=0, columnspan=5, padx=5, sticky="ew")
+
+        # Progression des chargements en arrière-plan (affichée pendant un chargement)
+        load_panel = gcode_loader.LoadPanel(root)
+        load_panel.frame.grid(row=5, column=0, columnspan=5, padx=5, pady=5, sticky="ew")
+        load_panel.frame.grid_remove()
+
+        # Grille
+        root.grid_columnconfigure(0, weight=1)
+        root.grid_rowconfigure(0, weight=1)
+
+        root.protocol("WM_DELETE_WINDOW", on_closing)
+
+        # Démarrage
+        update_visualization()
+        root.mainloop()
+
+    except Exception as e:
+        messagebox.showerror("Erreur fatale", f"{e}\n{traceback.format_exc()}")
+        sys.exit(1)
\ No newline at end of file
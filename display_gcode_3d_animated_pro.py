@@ -5,14 +5,18 @@ import matplotlib
 matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.animation import FuncAnimation
 import re
 import os
-import glob
-import numpy as np
 import sys
 import traceback
 import threading
+import subprocess
+import time
+
+import gcode_loader
+import gcode_parser
+import gcode_render
+import nc_index
 
 # === CONFIGURATION ===
 print(f"Python: {sys.executable}")
@@ -24,103 +28,43 @@ except ImportError as e:
     messagebox.showerror("Erreur", f"mpl_toolkits.mplot3d manquant : {e}")
     sys.exit(1)
 
+# Délai (s) laissé à l'export vidéo pour s'arrêter après « Annuler »
+CANCEL_TIMEOUT = 30
+
 # === FONCTIONS UTILITAIRES ===
 def get_latest_gcode_file(nc_dir="NC"):
     if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
         return sys.argv[1]
-    nc_dir = os.path.join(os.path.dirname(__file__), nc_dir)
-    if not os.path.isdir(nc_dir):
-        return None
-    files = glob.glob(os.path.join(nc_dir, "*.nc"))
-    return max(files, key=os.path.getmtime) if files else None
+    return nc_index.latest_file(os.path.join(os.path.dirname(__file__), nc_dir))
 
 def parse_stock_dimensions(gcode):
-    match = re.search(r'\[(\d+\.\d+), (\d+\.\d+), (\d+\.\d+)\]', gcode)
-    return (float(match.group(1)), float(match.group(2)), float(match.group(3))) if match else (100.0, 100.0, 10.0)
-
-def interpolate_arc(start_x, start_y, start_z, end_x, end_y, end_z, i, j, direction='G03', num_points=30):
-    try:
-        center_x, center_y = start_x + i, start_y + j
-        radius = np.sqrt(i**2 + j**2)
-        if radius < 1e-6:
-            return [start_x, end_x], [start_y, end_y], [start_z, end_z]
-        start_angle = np.arctan2(start_y - center_y, start_x - center_x)
-        end_angle = np.arctan2(end_y - center_y, end_x - center_x)
-        if direction == 'G03' and end_angle <= start_angle:
-            end_angle += 2 * np.pi
-        elif direction == 'G02' and end_angle >= start_angle:
-            end_angle -= 2 * np.pi
-        angles = np.linspace(start_angle, end_angle, num_points)
-        x_arc = center_x + radius * np.cos(angles)
-        y_arc = center_y + radius * np.sin(angles)
-        z_arc = np.linspace(start_z, end_z, num_points)
-        return x_arc.tolist(), y_arc.tolist(), z_arc.tolist()
-    except:
-        return [start_x, end_x], [start_y, end_y], [start_z, end_z]
+    return gcode_parser.stock_dimensions(gcode) or (100.0, 100.0, 10.0)
 
 # === PRÉPARATION DES SEGMENTS ===
 def prepare_gcode_segments(gcode):
-    segments, colors = [], []
-    current_x = current_y = current_z = 0.0
-    mode = 'absolute'
-
-    for line in gcode.split('\n'):
-        line = line.strip()
-        if not line or line.startswith(';') or line.startswith('('):
-            continue
-
-        coord_dict = dict(re.findall(r'([XYZEIJ])([-+]?\d*\.?\d+)', line))
-        for k in coord_dict:
-            coord_dict[k] = float(coord_dict[k])
-
-        new_x = coord_dict.get('X', current_x) if mode == 'absolute' else current_x + coord_dict.get('X', 0)
-        new_y = coord_dict.get('Y', current_y) if mode == 'absolute' else current_y + coord_dict.get('Y', 0)
-        new_z = coord_dict.get('Z', current_z) if mode == 'absolute' else current_z + coord_dict.get('Z', 0)
-
-        g_match = re.search(r'G(\d+)', line)
-        if not g_match:
-            continue
-        g_code = f'G{g_match.group(1).zfill(2)}'
-
-        if g_code == 'G90': mode = 'absolute'; continue
-        if g_code == 'G91': mode = 'relative'; continue
-
-        if g_code in ('G00', 'G01'):
-            color = 'y' if g_code == 'G00' else 'r'
-            segments.append(([current_x, new_x], [current_y, new_y], [current_z, new_z]))
-            colors.append(color)
-            current_x, current_y, current_z = new_x, new_y, new_z
-
-        elif g_code in ('G02', 'G03'):
-            i = coord_dict.get('I', 0.0)
-            j = coord_dict.get('J', 0.0)
-            x_arc, y_arc, z_arc = interpolate_arc(current_x, current_y, current_z, new_x, new_y, new_z, i, j, g_code)
-            for k in range(1, len(x_arc)):
-                segments.append(([x_arc[k-1], x_arc[k]], [y_arc[k-1], y_arc[k]], [z_arc[k-1], z_arc[k]]))
-                colors.append('b')
-            current_x, current_y, current_z = new_x, new_y, new_z
-
-    return segments, colors
+    """Analyse le G-code (gcode_parser) ; retourne les segments (N, 2, 3), leurs types de mouvement et le temps machine cumulé."""
+    moves = gcode_parser.parse_gcode(gcode)
+    segs, kinds, source = gcode_parser.segments(moves, chord_error=gcode_parser.CHORD_ERROR)
+    return segs, kinds, gcode_parser.segment_times(segs, kinds, moves["f"][source])
 
 # === ANIMATION 3D (VUE CORRIGÉE) ===
-def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
+def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z, segments=None):
     global anim_running, current_speed, speed_index
     anim_running = False
     current_speed = 1
     speed_index = 0  # Réinitialise à x1
+    if getattr(canvas_widget, 'anim', None):
+        canvas_widget.anim.close()
 
-    segments, colors = prepare_gcode_segments(gcode)
-    if not segments:
+    # `segments` : (segments, types, temps cumulé) déjà calculés par le chargement en arrière-plan
+    segments, kinds, times = segments if segments is not None else prepare_gcode_segments(gcode)
+    if not len(segments):
         messagebox.showwarning("Avertissement", "Aucun mouvement détecté.")
         return None
 
     # === CALCUL DES LIMITES RÉELLES ===
-    all_x = [c for seg in segments for c in seg[0]]
-    all_y = [c for seg in segments for c in seg[1]]
-    all_z = [c for seg in segments for c in seg[2]]
-    x_min, x_max = min(all_x), max(all_x)
-    y_min, y_max = min(all_y), max(all_y)
-    z_min, z_max = min(all_z), max(all_z)
+    x_min, y_min, z_min = segments.min(axis=(0, 1)).tolist()
+    x_max, y_max, z_max = segments.max(axis=(0, 1)).tolist()
 
     x_span = max(x_max - x_min, 1)
     y_span = max(y_max - y_min, 1)
@@ -154,24 +98,7 @@ def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
     ax.legend()
     ax.view_init(elev=30, azim=-60)
 
-    lines = []
-
-    def init():
-        return lines
-
-    def update(frame):
-        for line in lines:
-            line.remove()
-        lines.clear()
-        for i in range(frame):
-            xs, ys, zs = segments[i]
-            line, = ax.plot(xs, ys, zs, colors[i] + '-', linewidth=1.5)
-            lines.append(line)
-        return lines
-
-    # === ANIMATION ===
-    base_interval = 100
-    anim = FuncAnimation(fig, update, frames=len(segments), init_func=init, interval=base_interval, blit=False, repeat=False)
+    base_interval = 40  # 25 images/s ; la vitesse accélère l'horloge, pas le minuteur
 
     # === INTÉGRATION TKINTER ===
     for widget in canvas_widget.winfo_children():
@@ -182,14 +109,20 @@ def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
     toolbar = NavigationToolbar2Tk(canvas, canvas_widget)
     toolbar.update()
     toolbar.pack(side=tk.TOP, fill=tk.X)
+
+    # === ANIMATION (incrémentale : seuls les nouveaux segments sont tracés) ===
+    anim = gcode_render.ToolpathAnimation(ax, segments, kinds, linewidth=1.5, interval=base_interval, times=times)
+    anim.speed = current_speed
+    timeline.attach(anim)
     canvas.draw()
+    anim.play()
 
     # === STOCKAGE ===
     canvas_widget.anim = anim
     canvas_widget.figure = fig
     canvas_widget.ax = ax
     canvas_widget.segments = segments
-    canvas_widget.colors = colors
+    canvas_widget.kinds = kinds
     canvas_widget.base_interval = base_interval
     canvas_widget.stock_x = stock_x
     canvas_widget.stock_y = stock_y
@@ -206,7 +139,7 @@ def animate_gcode_3d(gcode, canvas_widget, stock_x, stock_y, stock_z):
 
 # === CONTRÔLE VITESSE ===
 current_speed = 1
-speed_factors = [1, 2, 4, 8, 16]
+speed_factors = [1, 2, 4, 8, 16, 64, 256]  # multiples du temps machine réel
 speed_index = 0
 
 def change_speed(factor):
@@ -215,10 +148,8 @@ def change_speed(factor):
         return
     current_speed = factor
     speed_index = speed_factors.index(factor)
-    new_interval = max(1, int(canvas_frame.base_interval / current_speed))
-    canvas_frame.anim._interval = new_interval
-    if hasattr(canvas_frame.anim, 'event_source'):
-        canvas_frame.anim.event_source.interval = new_interval
+    # Les images au-delà de 25/s sont sautées : seule l'horloge de l'animation va plus vite
+    canvas_frame.anim.speed = current_speed
     speed_btn.configure(text=f"Vitesse : x{current_speed}")
 
 def cycle_speed():
@@ -230,6 +161,7 @@ def cycle_speed():
 
 # === FONCTIONS INTERFACE ===
 current_file = None
+parsed_cache = gcode_loader.default_cache()  # réouverture sans nouvelle analyse
 
 def open_gcode_file():
     path = filedialog.askopenfilename(initialdir=os.path.join(os.path.dirname(__file__), "NC"), filetypes=[("G-code", "*.nc")])
@@ -237,14 +169,20 @@ def open_gcode_file():
         load_and_animate(path)
 
 def load_and_animate(file_path):
+    """Charge le fichier en arrière-plan puis lance l'animation (thread de l'interface)."""
+    file_label.configure(text=f"Chargement : {os.path.basename(file_path)}")
+    load_panel.start(gcode_loader.LoadJob(file_path, cache=parsed_cache), on_file_loaded,
+                     lambda e: messagebox.showerror("Erreur", f"Échec chargement :\n{e}"),
+                     lambda job: file_label.configure(text="Chargement annulé"))
+
+def on_file_loaded(result):
     global current_file
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            gcode = f.read()
-        current_file = file_path
-        stock_x, stock_y, stock_z = parse_stock_dimensions(gcode)
-        file_label.configure(text=f"Fichier: {os.path.basename(file_path)}")
-        animate_gcode_3d(gcode, canvas_frame, stock_x, stock_y, stock_z)
+        current_file = result.path
+        stock_x, stock_y, stock_z = parse_stock_dimensions(result.header)
+        file_label.configure(text=f"Fichier: {os.path.basename(result.path)}")
+        animate_gcode_3d(result.header, canvas_frame, stock_x, stock_y, stock_z,
+                         segments=(result.segments, result.kinds, result.times))
     except Exception as e:
         messagebox.showerror("Erreur", f"Échec chargement :\n{e}")
 
@@ -268,11 +206,11 @@ def toggle_animation():
     if not hasattr(canvas_frame, 'anim'):
         return
     if anim_running:
-        canvas_frame.anim.event_source.stop()
+        canvas_frame.anim.pause()
         toggle_btn.configure(text="Reprendre")
         anim_running = False
     else:
-        canvas_frame.anim.event_source.start()
+        canvas_frame.anim.play()
         toggle_btn.configure(text="Pause")
         anim_running = True
 
@@ -281,23 +219,12 @@ def finish_animation():
     if not hasattr(canvas_frame, 'anim') or not canvas_frame.anim:
         return
 
-    # Arrêter l'animation
-    canvas_frame.anim.event_source.stop()
+    # Arrêter l'animation et tracer tout
+    canvas_frame.anim.finish()
     global anim_running
     anim_running = False
     toggle_btn.configure(text="Reprendre")
 
-    # Nettoyer les lignes animées
-    for line in canvas_frame.ax.lines[:]:
-        if line.get_color() in ['y', 'r', 'b']:
-            line.remove()
-
-    # Tracer tout
-    for i, (xs, ys, zs) in enumerate(canvas_frame.segments):
-        color = canvas_frame.colors[i]
-        canvas_frame.ax.plot(xs, ys, zs, color + '-', linewidth=1.5)
-
-    canvas_frame.figure.canvas.draw()
     finish_btn.configure(state='disabled', text="Terminé")
 
 def reset_view():
@@ -306,7 +233,8 @@ def reset_view():
         canvas_frame.figure.canvas.draw()
 
 def export_video():
-    if not hasattr(canvas_frame, 'anim'):
+    """Export MP4 par video_export.py (processus séparé, sans Tk) ; la progression est suivie ici."""
+    if not current_file:
         messagebox.showwarning("Avertissement", "Chargez un G-code d'abord.")
         return
 
@@ -316,57 +244,74 @@ def export_video():
 
     progress_win = tk.Toplevel(root)
     progress_win.title("Export MP4...")
-    progress_win.geometry("400x120")
+    progress_win.geometry("400x140")
     progress_win.transient(root)
     progress_win.grab_set()
 
-    ttk.Label(progress_win, text="Préparation...", padding=10).pack()
-    progress_bar = ttk.Progressbar(progress_win, mode='determinate', maximum=len(canvas_frame.segments))
+    status = ttk.Label(progress_win, text="Préparation...", padding=10)
+    status.pack()
+    progress_bar = ttk.Progressbar(progress_win, mode='determinate', maximum=1)
     progress_bar.pack(fill=tk.X, padx=20, pady=10)
 
-    def run_export():
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_export.py")
+    # Annulation par l'entrée standard : terminate() (TerminateProcess sous
+    # Windows) laisserait le pool et ffmpeg tourner sur une vidéo tronquée
+    # Même vitesse que l'animation affichée (multiple du temps machine)
+    process = subprocess.Popen([sys.executable, script, current_file, "-o", file_path, "--speed", str(current_speed),
+                                "--cancel-from-stdin"],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    output = {"done": 0, "total": 1, "lines": [], "cancelled": None}
+
+    def cancel():
+        if output["cancelled"] is not None:
+            return
+        output["cancelled"] = time.monotonic()
+        status.configure(text="Annulation...")
         try:
-            fig = plt.figure(figsize=(12, 8))
-            ax = fig.add_subplot(111, projection='3d')
-            all_x = [c for seg in canvas_frame.segments for c in seg[0]]
-            all_y = [c for seg in canvas_frame.segments for c in seg[1]]
-            x_min, x_max = min(all_x), max(all_x)
-            y_min, y_max = min(all_y), max(all_y)
-            max_span = max(x_max - x_min, y_max - y_min)
-            ax.plot([x_min, x_min + max_span], [y_min, y_min], [0, 0], 'g-', linewidth=2)
-            ax.plot([x_min, x_min], [y_min, y_min + max_span], [0, 0], 'g-', linewidth=2)
-            margin = 0.1
-            ax.set_xlim(x_min - margin*max_span, x_min + max_span + margin*max_span)
-            ax.set_ylim(y_min - margin*max_span, y_min + max_span + margin*max_span)
-            ax.set_zlim(-5, canvas_frame.stock_z + 5)
-            ax.view_init(elev=30, azim=-60)
-
-            lines = []
-            def update(frame):
-                for l in lines: l.remove()
-                lines.clear()
-                for i in range(frame):
-                    xs, ys, zs = canvas_frame.segments[i]
-                    line, = ax.plot(xs, ys, zs, canvas_frame.colors[i] + '-', linewidth=1.5)
-                    lines.append(line)
-                progress_bar['value'] = frame
-                progress_win.update_idletasks()
-                return lines
-
-            anim = FuncAnimation(fig, update, frames=len(canvas_frame.segments), repeat=False, blit=False)
-            progress_win.children['!label'].config(text="Encodage en cours...")
-            anim.save(file_path, writer='ffmpeg', fps=30, dpi=100, bitrate=3000)
-            plt.close(fig)
-            progress_win.destroy()
+            process.stdin.write("cancel\n")
+            process.stdin.close()
+        except OSError:
+            pass
+
+    ttk.Button(progress_win, text="Annuler", command=cancel).pack()
+
+    def read_output():
+        # Thread de lecture : ne touche pas aux widgets, poll() affiche l'avancement
+        for line in process.stdout:
+            match = re.match(r"Images : (\d+)/(\d+)", line)
+            if match:
+                output["done"], output["total"] = int(match.group(1)), int(match.group(2))
+            else:
+                output["lines"] = (output["lines"] + [line.rstrip()])[-5:]
+
+    def poll():
+        progress_bar.configure(maximum=output["total"], value=output["done"])
+        if output["done"]:
+            status.configure(text=f"Images : {output['done']}/{output['total']}")
+        if process.poll() is None:
+            if output["cancelled"] is not None and time.monotonic() - output["cancelled"] > CANCEL_TIMEOUT:
+                process.kill()  # ne répond plus : arrêt forcé
+            progress_win.after(200, poll)
+            return
+        progress_win.destroy()
+        if output["cancelled"] is not None:
+            if os.path.isfile(file_path):
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+            return
+        if process.returncode == 0:
             messagebox.showinfo("Succès", f"Vidéo exportée :\n{file_path}")
-        except Exception as e:
-            progress_win.destroy()
-            messagebox.showerror("Erreur", f"Export échoué :\n{e}\n\nVérifiez que ffmpeg est installé.")
+        else:
+            detail = "\n".join(output["lines"])
+            messagebox.showerror("Erreur", f"Export échoué :\n{detail}\n\nVérifiez que ffmpeg est installé.")
 
-    threading.Thread(target=run_export, daemon=True).start()
+    threading.Thread(target=read_output, daemon=True).start()
+    poll()
 
 def show_help():
-    messagebox.showinfo("Aide", "Animation 3D du G-code\n\nCouleurs :\n• Jaune : G00\n• Rouge : G01\n• Bleu : Arcs\n• Vert : Références\n\nContrôles :\n• Rotation : Clic gauche\n• Zoom : Molette\n• Vitesse : x1 à x16\n• Terminer : Afficher tout\n• Export : MP4")
+    messagebox.showinfo("Aide", "Animation 3D du G-code\n\nCouleurs :\n• Jaune : G00\n• Rouge : G01\n• Bleu : Arcs\n• Vert : Références\n\nContrôles :\n• Rotation : Clic gauche\n• Zoom : Molette\n• Vitesse : x1 (temps machine réel) à x256\n• Ligne de temps : aller à un instant\n• Terminer : Afficher tout\n• Export : MP4")
 
 def about():
     messagebox.showinfo("À propos", "Visualisation 3D Animée Pro\nVersion 4.0\nAvec vitesse, Terminer & export MP4")
@@ -376,72 +321,83 @@ def on_closing():
     root.destroy()
 
 # === INTERFACE TKINTER ===
-try:
-    root = tk.Tk()
-    root.title("Visualisation 3D Animée Pro")
-    root.geometry("800x850+850+30")
-    root.minsize(700, 600)
-
-    # Menu
-    menubar = tk.Menu(root)
-    root.config(menu=menubar)
-    file_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Fichier", menu=file_menu)
-    file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
-    file_menu.add_command(label="Recharger", command=update_visualization)
-    file_menu.add_command(label="Sauvegarder image...", command=save_image)
-    file_menu.add_command(label="Exporter MP4...", command=export_video)
-    file_menu.add_separator()
-    file_menu.add_command(label="Quitter", command=on_closing)
-
-    view_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Affichage", menu=view_menu)
-    view_menu.add_command(label="Réinitialiser vue", command=reset_view)
-
-    help_menu = tk.Menu(menubar, tearoff=0)
-    menubar.add_cascade(label="Aide", menu=help_menu)
-    help_menu.add_command(label="Instructions", command=show_help)
-    help_menu.add_command(label="À propos", command=about)
-
-    # Canvas
-    canvas_frame = ttk.Frame(root)
-    canvas_frame.grid(row=0, column=0, columnspan=11, padx=5, pady=5, sticky="nsew")
-
-    # Contrôles
-    ctrl_frame = ttk.Frame(root)
-    ctrl_frame.grid(row=1, column=0, columnspan=11, pady=5, sticky="ew")
-
-    # Boutons rotation
-    ttk.Button(ctrl_frame, text="X+", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=0, padx=2)
-    ttk.Button(ctrl_frame, text="X-", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=1, padx=2)
-    ttk.Button(ctrl_frame, text="Y+", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=2, padx=2)
-    ttk.Button(ctrl_frame, text="Y-", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=3, padx=2)
-
-    # Bouton vitesse
-    speed_btn = ttk.Button(ctrl_frame, text="Vitesse : x1", command=cycle_speed)
-    speed_btn.grid(row=0, column=4, columnspan=4, padx=10, pady=2)
-
-    # Boutons Pause / Terminer
-    toggle_btn = ttk.Button(ctrl_frame, text="Pause", command=toggle_animation)
-    toggle_btn.grid(row=0, column=8, padx=10)
-
-    finish_btn = ttk.Button(ctrl_frame, text="Terminer", command=finish_animation)
-    finish_btn.grid(row=0, column=9, padx=10)
-
-    # Fichier
-    file_label = ttk.Label(root, text="Aucun fichier", foreground="gray")
-    file_label.grid(row=2, column=0, columnspan=11, pady=5)
-
-    ttk.Button(root, text="Recharger dernier G-code", command=update_visualization).grid(row=3, column=0, columnspan=11, pady=8)
-
-    # Grille
-    root.grid_columnconfigure(0, weight=1)
-    root.grid_rowconfigure(0, weight=1)
-    root.protocol("WM_DELETE_WINDOW", on_closing)
-
-    update_visualization()
-    root.mainloop()
-
-except Exception as e:
-    messagebox.showerror("Erreur", f"{e}\n{traceback.format_exc()}")
-    sys.exit(1)
\ No newline at end of file
+# Pas à l'import : les processus d'analyse (spawn) réimportent ce script
+if __name__ == "__main__":
+    try:
+        root = tk.Tk()
+        root.title("Visualisation 3D Animée Pro")
+        root.geometry("800x850+850+30")
+        root.minsize(700, 600)
+
+        # Menu
+        menubar = tk.Menu(root)
+        root.config(menu=menubar)
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Fichier", menu=file_menu)
+        file_menu.add_command(label="Ouvrir...", command=open_gcode_file)
+        file_menu.add_command(label="Recharger", command=update_visualization)
+        file_menu.add_command(label="Sauvegarder image...", command=save_image)
+        file_menu.add_command(label="Exporter MP4...", command=export_video)
+        file_menu.add_separator()
+        file_menu.add_command(label="Quitter", command=on_closing)
+
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Affichage", menu=view_menu)
+        view_menu.add_command(label="Réinitialiser vue", command=reset_view)
+
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Aide", menu=help_menu)
+        help_menu.add_command(label="Instructions", command=show_help)
+        help_menu.add_command(label="À propos", command=about)
+
+        # Canvas
+        canvas_frame = ttk.Frame(root)
+        canvas_frame.grid(row=0, column=0, columnspan=11, padx=5, pady=5, sticky="nsew")
+
+        # Contrôles
+        ctrl_frame = ttk.Frame(root)
+        ctrl_frame.grid(row=1, column=0, columnspan=11, pady=5, sticky="ew")
+
+        # Boutons rotation
+        ttk.Button(ctrl_frame, text="X+", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=0, padx=2)
+        ttk.Button(ctrl_frame, text="X-", command=lambda: [setattr(canvas_frame.ax, 'azim', canvas_frame.ax.azim - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=1, padx=2)
+        ttk.Button(ctrl_frame, text="Y+", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev + 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=2, padx=2)
+        ttk.Button(ctrl_frame, text="Y-", command=lambda: [setattr(canvas_frame.ax, 'elev', canvas_frame.ax.elev - 15), canvas_frame.figure.canvas.draw()]).grid(row=0, column=3, padx=2)
+
+        # Bouton vitesse
+        speed_btn = ttk.Button(ctrl_frame, text="Vitesse : x1", command=cycle_speed)
+        speed_btn.grid(row=0, column=4, columnspan=4, padx=10, pady=2)
+
+        # Boutons Pause / Terminer
+        toggle_btn = ttk.Button(ctrl_frame, text="Pause", command=toggle_animation)
+        toggle_btn.grid(row=0, column=8, padx=10)
+
+        finish_btn = ttk.Button(ctrl_frame, text="Terminer", command=finish_animation)
+        finish_btn.grid(row=0, column=9, padx=10)
+
+        # Fichier
+        file_label = ttk.Label(root, text="Aucun fichier", foreground="gray")
+        file_label.grid(row=3, column=0, columnspan=11, pady=5)
+
+        ttk.Button(root, text="Recharger dernier G-code", command=update_visualization).grid(row=4, column=0, columnspan=11, pady=8)
+
+        # Ligne de temps : position dans le temps machine, curseur pour s'y déplacer
+        timeline = gcode_render.TimelinePanel(root)
+        timeline.frame.grid(row=2, column=0, columnspan=11, padx=5, sticky="ew")
+
+        # Progression des chargements en arrière-plan (affichée pendant un chargement)
+        load_panel = gcode_loader.LoadPanel(root)
+        load_panel.frame.grid(row=5, column=0, columnspan=11, padx=5, pady=5, sticky="ew")
+        load_panel.frame.grid_remove()
+
+        # Grille
+        root.grid_columnconfigure(0, weight=1)
+        root.grid_rowconfigure(0, weight=1)
+        root.protocol("WM_DELETE_WINDOW", on_closing)
+
+        update_visualization()
+        root.mainloop()
+
+    except Exception as e:
+        messagebox.showerror("Erreur", f"{e}\n{traceback.format_exc()}")
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,156 @@
+# gcode_batch.py
+"""Génération en lot à partir d'un manifeste JSON ou CSV.
+
+Chaque tâche du manifeste décrit un programme : mode, paramètres du mode et
+fichier de sortie. Les tâches sont réparties sur un `ProcessPoolExecutor`
+(un interpréteur par cœur), chaque processus écrivant directement son fichier.
+Un rapport résume ensuite chaque tâche : durée, nombre de lignes, taille.
+
+Manifeste JSON : une liste de tâches, ou {"defaults": {...}, "jobs": [...]} ;
+    {"mode": "threading", "output": "client_42.nc", "params": {"hole_diameter": 30}}
+Une tâche JSON peut aussi décrire un programme multi-opérations :
+    {"output": "piece.nc", "operations": [{"mode": "surfacing", "params": {...}}, ...]}
+Manifeste CSV : colonnes `mode` et `output`, les colonnes `units`, `percent`,
+`project` et `machine` sont optionnelles ; toute autre colonne non vide est un
+paramètre du mode (valeur lue en JSON si possible).
+"""
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import gcode_generator
+
+# Colonnes / clés d'une tâche qui ne sont pas des paramètres du mode
+JOB_KEYS = ("mode", "output", "units", "percent", "project", "machine")
+
+REPORT_FIELDS = ("index", "mode", "output", "status", "seconds", "lines", "bytes", "error")
+
+
+def _parse_value(raw):
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def _make_job(index, entry, defaults):
+    """Normalise une entrée du manifeste en tâche {mode, params, output, ...}."""
+    entry = {**defaults, **entry}
+    if "operations" in entry:
+        # Programme multi-opérations (voir generation.job_from_dict)
+        return {"index": index, "mode": "job", "job": entry,
+                "output": entry.get("output") or f"{index:04d}_job.nc"}
+    try:
+        mode = gcode_generator.parse_mode(str(entry.get("mode", "")))
+    except Exception as e:
+        raise ValueError(f"Tâche {index} : {e}")
+    params = dict(defaults.get("params", {}))
+    params.update(entry.get("params", {}))
+    params.update({k: v for k, v in entry.items() if k not in JOB_KEYS and k != "params"})
+    return {
+        "index": index,
+        "mode": mode,
+        "params": params,
+        "output": entry.get("output") or f"{index:04d}_{mode}.nc",
+        "units": entry.get("units", "mm"),
+        "percent": entry.get("percent"),
+        "project": entry.get("project"),
+        "machine": entry.get("machine"),
+    }
+
+
+def load_manifest(path):
+    """Lit un manifeste .json ou .csv et retourne la liste des tâches."""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+        entries = []
+        for row in rows:
+            entry = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+            if "percent" in entry:
+                entry["percent"] = int(str(entry["percent"]).strip("%"))
+            entries.append({k: (v if k in JOB_KEYS else _parse_value(v)) for k, v in entry.items()})
+        defaults = {}
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            defaults = data.get("defaults", {})
+            entries = data.get("jobs", [])
+        else:
+            defaults, entries = {}, data
+    return [_make_job(index, entry, defaults) for index, entry in enumerate(entries, start=1)]
+
+
+def count_lines(path, block_size=1 << 20):
+    """Nombre de lignes d'un fichier, lu par blocs binaires."""
+    lines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+def run_job(job, output_dir="", cache_dir=None, cache_size=None):
+    """Génère une tâche et retourne sa ligne de rapport (exécuté dans un processus du pool)."""
+    output = os.path.join(output_dir, job["output"])
+    result = {"index": job["index"], "mode": job["mode"], "output": output,
+              "status": "ok", "seconds": 0.0, "lines": 0, "bytes": 0, "error": ""}
+    start = time.perf_counter()
+    try:
+        cache = gcode_generator.open_cache(cache_dir, cache_size)
+        # Les messages de débogage des générateurs sont inutiles en lot
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if "job" in job:
+                import generation
+                generation.generate_job(generation.job_from_dict(job["job"]), filename=output, cache=cache)
+            else:
+                request = gcode_generator.build_request(job["mode"], job["params"].items(), None, job["units"],
+                                                        job["percent"], job["project"], job["machine"])
+                gcode_generator.generate(request, output, cache=cache)
+        result["lines"] = count_lines(output)
+        result["bytes"] = os.path.getsize(output)
+    except Exception as e:
+        result["status"] = "erreur"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_batch(jobs, workers=None, output_dir="", cache_dir=None, cache_size=None):
+    """Exécute les tâches (en parallèle si `workers` != 1) ; résultats dans l'ordre du manifeste.
+
+    Avec `cache_dir`, les tâches identiques (même mode, mêmes paramètres)
+    réutilisent le programme déjà généré (voir gcode_cache).
+    """
+    if workers == 1 or len(jobs) <= 1:
+        return [run_job(job, output_dir, cache_dir, cache_size) for job in jobs]
+    count = len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, [output_dir] * count, [cache_dir] * count, [cache_size] * count))
+
+
+def write_report(results, path):
+    """Écrit le rapport en CSV ou en JSON selon l'extension de `path`."""
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+
+
+def print_summary(results, elapsed, file=sys.stderr):
+    """Affiche un tableau récapitulatif des tâches et les totaux."""
+    for r in results:
+        detail = r["error"] if r["status"] != "ok" else f"{r['lines']} lignes, {r['bytes']} octets"
+        print(f"[{r['index']:>4}] {r['mode']:<16} {r['status']:<6} {r['seconds']:>8.3f} s  {r['output']}  ({detail})", file=file)
+    failed = sum(1 for r in results if r["status"] != "ok")
+    print(f"{len(results) - failed}/{len(results)} tâches réussies en {elapsed:.2f} s, "
+          f"{sum(r['lines'] for r in results)} lignes, {sum(r['bytes'] for r in results)} octets", file=file)
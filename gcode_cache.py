@@ -0,0 +1,145 @@
+# gcode_cache.py
+"""Cache disque des corps de programme déjà générés.
+
+La clé est le SHA-256 du contenu qui détermine le G-code : mode, paramètres
+normalisés, unités, pourcentage de plongée, précision et version des
+générateurs. L'entête (avec son horodatage) et la fin de programme ne sont pas
+mis en cache : ils sont réécrits à chaque génération.
+
+Chaque entrée est un couple de fichiers `<clé>.nc` (corps du programme) et
+`<clé>.json` (coordonnées retournées par le générateur, encombrement de la
+trajectoire). Les entrées sont évincées de la moins récemment utilisée à la
+plus récente dès que la taille totale dépasse `max_bytes` (la date de
+modification sert de date d'accès). Plusieurs processus (génération par lots)
+peuvent partager le même dossier : lookup() ouvre le corps aussitôt, une
+éviction concurrente ne peut donc plus le retirer entre la recherche et la
+copie, et les fichiers `.part` laissés par un écrivain interrompu sont
+supprimés lors de l'éviction.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import main_tkinter
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Âge (s) au-delà duquel un fichier .part est considéré comme abandonné
+STALE_PART_SECONDS = 3600
+
+
+def cache_key(request):
+    """Empreinte SHA-256 d'une requête (sans l'entête ni son horodatage)."""
+    config = request.to_config()
+    content = {
+        "mode": request.section,
+        "params": config[request.section],
+        "units": request.units,
+        "percent": request.percent,
+        "precision": request.precision,
+        "version": main_tkinter.GENERATOR_VERSION,
+    }
+    text = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CacheEntry:
+    """Entrée en cours d'écriture : reçoit le corps via write(), publiée par commit()."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        fd, self.tmp_path = tempfile.mkstemp(suffix=".part", dir=cache.directory)
+        self.file = os.fdopen(fd, "w")
+
+    def write(self, text):
+        return self.file.write(text)
+
+    def commit(self, operation, bounds=None):
+        self.file.close()
+        body_path, meta_path = self.cache.paths(self.key)
+        os.replace(self.tmp_path, body_path)
+        # Les coordonnées sont écrites en dernier : une entrée sans .json est ignorée
+        tmp_meta = meta_path + ".part"
+        with open(tmp_meta, "w") as f:
+            json.dump({"operation": list(operation), "bounds": bounds}, f)
+        os.replace(tmp_meta, meta_path)
+        self.cache.evict()
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class GcodeCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".nc", base + ".json"
+
+    def lookup(self, key):
+        """Retourne (corps ouvert, coordonnées, encombrement) si la clé est en cache, sinon None.
+
+        Le corps est ouvert ici : l'appelant le recopie avec copy_body(), qui le ferme.
+        """
+        body_path, meta_path = self.paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            operation = tuple(meta["operation"])
+            bounds = meta.get("bounds")
+            body = open(body_path, "r")
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(body_path)
+            os.utime(meta_path)
+        except OSError:
+            pass    # évincée entre-temps : le fichier ouvert reste lisible
+        if bounds is not None:
+            bounds = (tuple(bounds[0]), tuple(bounds[1]))
+        return body, operation, bounds
+
+    def copy_body(self, body, sink, block_size=1 << 20):
+        """Recopie par blocs dans `sink` un corps ouvert par lookup(), puis le ferme."""
+        with body:
+            shutil.copyfileobj(body, sink, block_size)
+
+    def entry(self, key):
+        return CacheEntry(self, key)
+
+    def evict(self):
+        """Supprime les entrées les plus anciennes tant que le cache dépasse `max_bytes`."""
+        entries = []
+        total = 0
+        stale = time.time() - STALE_PART_SECONDS
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(".part") and item.is_file():
+                    try:
+                        if item.stat().st_mtime < stale:
+                            os.remove(item.path)
+                    except OSError:
+                        pass
+                elif item.name.endswith(".nc") and item.is_file():
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.name[:-3]))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            body_path, meta_path = self.paths(key)
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
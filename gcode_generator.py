@@ -0,0 +1,187 @@
+# gcode_generator.py
+"""Interface en ligne de commande, sans Tkinter ni matplotlib.
+
+Exemple :
+    python -m gcode_generator generate --mode surfacing --param width_x=400 \
+        --param path_type=climb -o out.nc
+
+Les paramètres `--param clé=valeur` remplissent la section du mode (mêmes clés
+que dans config.json). `-o -` (ou l'absence de `-o`) écrit le programme sur la
+sortie standard ; les messages de débogage partent alors sur stderr.
+Code de sortie : 0 en cas de succès, 1 pour des paramètres invalides
+(ValueError), 2 pour une ligne de commande incorrecte.
+
+`python -m gcode_generator job travail.json -o piece.nc` enchaîne plusieurs
+opérations (surfaçage, perçages, filetage...) dans un seul programme.
+
+`python -m gcode_generator batch manifeste.json -j 8 --report rapport.csv`
+génère en parallèle toutes les tâches d'un manifeste (voir gcode_batch.py).
+
+Les modules de génération (et NumPy) ne sont importés qu'au moment de générer,
+pour que `--help` et les erreurs de syntaxe restent instantanés (la liste des
+modes vient de mode_registry, qui n'importe aucun générateur).
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+import mode_registry
+
+
+def parse_mode(value):
+    """Accepte le nom du mode ou son identifiant numérique ("1" à "6")."""
+    try:
+        return mode_registry.get_mode(value).section
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mode inconnu : {value} (choix : {', '.join(s.section for s in mode_registry.all_modes())})")
+
+
+def parse_param(text):
+    """Découpe `clé=valeur` ; la valeur est lue en JSON (nombre, booléen) sinon gardée en texte."""
+    key, sep, raw = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"paramètre attendu sous la forme clé=valeur : {text}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key.strip(), value
+
+
+def build_request(mode, params, base=None, units=None, percent=None, project_name=None, machine=None):
+    """Construit la requête de génération ; `base` est une configuration au format config.json."""
+    import generation
+
+    mode_id = mode_registry.get_mode(mode).mode_id
+    config = dict(base or {})
+    config["last_operation"] = mode_id
+    request = generation.request_from_config(config) if base else generation.GenerationRequest(mode_id)
+    request.params.update(dict(params))
+    if units is not None:
+        request.units = units
+    if percent is not None:
+        request.percent = generation.parse_percent(percent)
+    if project_name is not None:
+        request.project_name = project_name
+    if machine is not None:
+        request.machine = machine
+    return request
+
+
+def open_cache(directory, size_mb=None):
+    """Cache disque des programmes générés (None si `directory` est vide)."""
+    if not directory:
+        return None
+    import gcode_cache
+
+    max_bytes = int(size_mb * 1024 * 1024) if size_mb else gcode_cache.DEFAULT_MAX_BYTES
+    return gcode_cache.GcodeCache(directory, max_bytes)
+
+
+def generate(request, output, stdout=None, cache=None):
+    """Génère le programme de `request` dans `output` (chemin, ou "-" pour `stdout`)."""
+    import generation
+
+    if output == "-":
+        stdout = stdout or sys.stdout
+        stock, operation = generation.write_program(request, stdout, cache=cache)
+        stdout.flush()
+        return operation
+    return generation.generate_program(request, filename=output, cache=cache).operation
+
+
+def cmd_generate(args):
+    base = {}
+    if args.config:
+        with open(args.config, "r") as f:
+            base = json.load(f)
+    request = build_request(args.mode, args.param, base, args.units, args.percent, args.project, args.machine)
+    # Les messages de débogage des générateurs ne doivent pas se mêler au G-code
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        generate(request, args.output, stdout, open_cache(args.cache, args.cache_size))
+    if args.output != "-":
+        print(f"G-code sauvegardé dans {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_job(args):
+    import generation
+
+    with open(args.job, "r", encoding="utf-8") as f:
+        job = generation.job_from_dict(json.load(f))
+    cache = open_cache(args.cache, args.cache_size)
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.output == "-":
+            generation.write_job(job, stdout, cache=cache)
+            stdout.flush()
+        else:
+            result = generation.generate_job(job, filename=args.output, cache=cache)
+            print(f"G-code sauvegardé dans {result.filename} ({len(job.operations)} opérations, brut {result.stock})")
+    return 0
+
+
+def cmd_batch(args):
+    import time
+    import gcode_batch
+
+    jobs = gcode_batch.load_manifest(args.manifest)
+    start = time.perf_counter()
+    results = gcode_batch.run_batch(jobs, args.jobs, args.output_dir, args.cache, args.cache_size)
+    gcode_batch.print_summary(results, time.perf_counter() - start)
+    if args.report:
+        gcode_batch.write_report(results, args.report)
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache", metavar="DOSSIER", help="cache disque des programmes déjà générés (clé : mode et paramètres)")
+    parser.add_argument("--cache-size", type=float, metavar="MO", help="taille maximale du cache en Mo (défaut : 512)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gcode_generator", description="Générateur de G-code CNC (sans interface graphique).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="générer un programme pour un mode")
+    gen.add_argument("--mode", required=True, type=parse_mode, help="nom du mode (surfacing, threading, ...) ou identifiant 1-6")
+    gen.add_argument("--param", action="append", type=parse_param, default=[], metavar="CLÉ=VALEUR",
+                     help="paramètre du mode (répétable), mêmes clés que config.json")
+    gen.add_argument("--config", help="fichier JSON de base (format config.json), surchargé par --param")
+    gen.add_argument("--units", choices=("mm", "in"), help="unités de l'entête (défaut : --config, sinon mm)")
+    gen.add_argument("--percent", type=int, help="pourcentage de l'avance pour les plongées (défaut : --config, sinon 50)")
+    gen.add_argument("--project", help="nom du projet écrit dans l'entête")
+    gen.add_argument("--machine", help="nom de la machine écrit dans l'entête")
+    gen.add_argument("-o", "--output", default="-", help="fichier .nc à écrire ('-' = sortie standard)")
+    add_cache_arguments(gen)
+    gen.set_defaults(func=cmd_generate)
+
+    job = commands.add_parser("job", help="générer un programme multi-opérations décrit par un fichier JSON")
+    job.add_argument("job", help="fichier JSON : {project_name, machine, units, percent, operations: [{mode, params}]}")
+    job.add_argument("-o", "--output", default="-", help="fichier .nc à écrire ('-' = sortie standard)")
+    add_cache_arguments(job)
+    job.set_defaults(func=cmd_job)
+
+    batch = commands.add_parser("batch", help="générer en parallèle les tâches d'un manifeste JSON/CSV")
+    batch.add_argument("manifest", help="manifeste .json ou .csv (mode, paramètres, fichier de sortie)")
+    batch.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de cœurs)")
+    batch.add_argument("--output-dir", default="", help="dossier de base des fichiers de sortie relatifs")
+    batch.add_argument("--report", help="rapport par tâche (.json ou .csv)")
+    add_cache_arguments(batch)
+    batch.set_defaults(func=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# gcode_loader.py
+"""Chargement des programmes en arrière-plan pour les visualiseurs.
+
+L'analyse (en flux depuis une projection mémoire du fichier, par morceaux,
+avec avancement et annulation) et le découpage en segments se font dans un thread : NumPy
+libère le GIL pendant les calculs et la fenêtre Tk reste réactive. Le
+thread ne touche jamais aux widgets ; `LoadPanel` interroge l'avancement
+avec `after` et remet les tableaux au thread de l'interface à la fin.
+"""
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+import gcode_parallel
+import gcode_parser
+import parse_cache
+
+# Octets du début du fichier décodés pour l'entête
+HEADER_BYTES = 64 * 1024
+
+# Part de la barre de progression attribuée à chaque étape
+_READ_SHARE = 0.05
+_PARSE_SHARE = 0.85
+
+
+@dataclass
+class LoadResult:
+    path: str
+    header: str             # début du programme (entête : brut, outil...)
+    moves: np.ndarray       # mouvements PATH_DTYPE
+    segments: np.ndarray    # segments (n, 2, 3) pour le tracé
+    kinds: np.ndarray       # type de mouvement de chaque segment
+    times: np.ndarray       # temps machine cumulé (s) à la fin de chaque segment
+    lines: np.ndarray       # ligne source (à partir de 0) de chaque segment
+
+
+def default_cache():
+    """Cache d'analyse partagé par les visualiseurs (None si le dossier est inutilisable)."""
+    try:
+        return parse_cache.ParseCache()
+    except OSError as e:
+        print(f"Débogage: Cache d'analyse indisponible : {str(e)}")
+        return None
+
+
+class LoadJob:
+    """Chargement d'un fichier .nc : analyse (ou cache d'analyse), segments.
+
+    start() lance le chargement dans un thread, run() l'exécute dans le thread
+    courant. Une fois terminé, `result` (LoadResult) ou `error` est renseigné ;
+    `cancelled` est vrai si cancel() a interrompu le chargement.
+    """
+
+    def __init__(self, path, cache=None, chord_error=gcode_parser.CHORD_ERROR, workers=None, moves=None):
+        self.path = path
+        self.moves = moves          # mouvements déjà analysés (envoyés par le générateur) : pas d'analyse
+        self.cache = cache
+        self.chord_error = chord_error
+        self.workers = workers      # processus d'analyse des gros fichiers (défaut : un par cœur)
+        self.stage = "Lecture"
+        self.fraction = 0.0
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        return isinstance(self.error, gcode_parser.ParseCancelled)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="gcode-loader", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise gcode_parser.ParseCancelled()
+
+    def _on_parse_progress(self, done, total):
+        self.fraction = _READ_SHARE + _PARSE_SHARE * done / max(total, 1)
+
+    def run(self):
+        try:
+            stat = os.stat(self.path)
+            with gcode_parser.open_mapped(self.path) as data:
+                header = bytes(data[:HEADER_BYTES]).decode("utf-8", errors="replace").replace("\r\n", "\n")
+            self._check_cancel()
+            self.stage, self.fraction = "Analyse", _READ_SHARE
+            cache = self.cache if self.moves is None else None
+            hit = cache.lookup(self.path) if cache is not None else None
+            meta = arrays = None
+            if self.moves is not None:
+                moves = self.moves
+            elif hit is not None:
+                # Réouverture : mouvements et tableaux du tracé relus en mmap
+                moves, meta = hit
+                arrays = cache.derived(self.path, meta, self.chord_error)
+            else:
+                # Analyse en flux depuis la projection mémoire ; l'empreinte est calculée au passage
+                digest = hashlib.sha256()
+                moves = gcode_parallel.parse_file(self.path, workers=self.workers, progress=self._on_parse_progress,
+                                                  cancel=self._cancel, digest=digest)
+                if cache is not None:
+                    try:
+                        meta = cache.store(self.path, moves, stat, digest.hexdigest())
+                    except OSError as e:
+                        print(f"Débogage: Mise en cache impossible pour {self.path} : {e}")
+            self._check_cancel()
+            self.stage, self.fraction = "Segments", _READ_SHARE + _PARSE_SHARE
+            if arrays is None:
+                segs, kinds, source = gcode_parser.segments(moves, chord_error=self.chord_error)
+                arrays = {"segments": segs, "kinds": kinds, "source": source,
+                          "times": gcode_parser.segment_times(segs, kinds, moves["f"][source]),
+                          "lines": moves["line"][source]}
+                self._check_cancel()
+                if meta is not None:
+                    try:
+                        cache.store_derived(self.path, meta, arrays, self.chord_error)
+                    except OSError as e:
+                        print(f"Débogage: Mise en cache impossible pour {self.path} : {e}")
+            self.result = LoadResult(self.path, header, moves, arrays["segments"], arrays["kinds"], arrays["times"],
+                                     arrays["lines"])
+            self.fraction = 1.0
+        except Exception as e:
+            self.error = e
+        return self
+
+
+class LoadPanel:
+    """Barre de progression et bouton « Annuler » des chargements d'un visualiseur (Tk).
+
+    Le cadre `frame` est placé par le visualiseur avec grid() ; il n'est
+    affiché que pendant un chargement. Un nouveau chargement annule le précédent.
+    """
+
+    def __init__(self, parent, poll_ms=50):
+        from tkinter import ttk
+        self.poll_ms = poll_ms
+        self.frame = ttk.Frame(parent)
+        self.label = ttk.Label(self.frame, text="")
+        self.label.pack(side="left", padx=5)
+        self.bar = ttk.Progressbar(self.frame, mode="determinate", maximum=100)
+        self.bar.pack(side="left", fill="x", expand=True, padx=5)
+        ttk.Button(self.frame, text="Annuler", command=self.cancel).pack(side="left", padx=5)
+        self.job = None
+
+    def start(self, job, on_done, on_error=None, on_cancel=None):
+        """Lance `job` en arrière-plan ; `on_done(result)` est appelé dans le thread de l'interface."""
+        if self.job is not None:
+            self.job.cancel()
+        self.job = job
+        self.bar["value"] = 0
+        self.frame.grid()
+        job.start()
+        self.frame.after(self.poll_ms, self._poll, job, on_done, on_error, on_cancel)
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def _poll(self, job, on_done, on_error, on_cancel):
+        if job is not self.job:
+            return  # remplacé par un chargement plus récent
+        self.bar["value"] = 100 * job.fraction
+        self.label.configure(text=f"{job.stage} : {os.path.basename(job.path)}")
+        if job.running:
+            self.frame.after(self.poll_ms, self._poll, job, on_done, on_error, on_cancel)
+            return
+        self.job = None
+        self.frame.grid_remove()
+        if job.cancelled:
+            if on_cancel is not None:
+                on_cancel(job)
+        elif job.error is not None:
+            if on_error is not None:
+                on_error(job.error)
+        else:
+            on_done(job.result)
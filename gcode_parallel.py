@@ -0,0 +1,340 @@
+# gcode_parallel.py
+"""Analyse multiprocessus des très gros programmes G-code.
+
+Le fichier est découpé en plages de lignes entières, analysées en parallèle
+par un groupe de processus ; chacun relit sa plage dans la projection mémoire
+du fichier et dépose ses mouvements dans un bloc de mémoire partagée. Une
+plage est analysée sans connaître l'état modal à son début : position, F et S
+inconnus (NaN), mouvement modal inconnu (_UNKNOWN_MOTION), mode absolu supposé.
+
+Une passe séquentielle sur les résumés des plages (état final, hypothèses
+utilisées) en déduit l'état modal réel au début de chaque plage, puis les
+mouvements sont recopiés dans le tableau final en remplaçant les valeurs
+inconnues. Les rares plages dont le résultat dépend autrement de leur état
+initial (axes relatifs G91 sans position absolue connue, mode relatif hérité
+de la plage précédente) sont réanalysées dans le processus principal.
+
+Les processus sont démarrés par spawn (Windows) ou forkserver : l'analyse est
+lancée depuis le thread de chargement d'un visualiseur, et un fork depuis un
+processus à plusieurs threads (Tk, matplotlib) peut se bloquer. Les scripts
+des visualiseurs ne construisent leur interface que sous
+`if __name__ == "__main__"`, ce qui permet aux processus de les réimporter.
+fork n'est utilisé que depuis un processus à un seul thread (ligne de
+commande, tests), où il évite de réimporter les modules.
+"""
+import math
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import gcode_parser
+from gcode_parser import PATH_DTYPE, ModalState, ParseCancelled
+from toolpath import ARC_CW
+
+# En dessous de cette taille, le démarrage des processus coûte plus qu'il ne rapporte
+MIN_PARALLEL_BYTES = 32 * 1024 * 1024
+# Taille visée des plages : plusieurs par processus pour équilibrer la charge
+RANGE_BYTES = 8 * 1024 * 1024
+
+# Blocs de mémoire partagée créés par ce processus (Windows, voir _scan_range)
+_open_blocks = []
+
+# Mouvement modal inconnu au début d'une plage (type des mouvements concernés)
+_UNKNOWN_MOTION = 255
+_POSITIONS = ("x0", "y0", "z0", "x", "y", "z")
+
+
+def process_context():
+    """Contexte de démarrage des processus (voir plus haut), aussi utilisé par video_export."""
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def line_ranges(data, range_bytes=RANGE_BYTES):
+    """Plages (début, fin) d'environ `range_bytes` octets de `data`, coupées après un saut de ligne."""
+    ranges = []
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", min(start + range_bytes, size) - 1)
+        end = size if end < 0 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _parse_range(data, state, chunk_bytes=gcode_parser.CHUNK_BYTES):
+    """Analyse une plage à partir de `state` ; retourne (mouvements par morceau, état final, résumé).
+
+    Le résumé indique ce dont dépend le résultat : `has_distance` (la plage
+    contient G90/G91), `needs_relative` (des axes précèdent le premier
+    G90/G91), `unresolved` (positions relatives calculées depuis une position
+    inconnue) et `center_only` (pour chaque mouvement de type inconnu : ligne
+    sans X/Y/Z, qui n'est un mouvement que si le mouvement modal est un arc).
+    """
+    parts = []
+    center_only = []
+    has_distance = needs_relative = has_motion = unresolved = False
+    relative = False
+    for chunk in gcode_parser.iter_chunks(data, chunk_bytes):
+        tokens = gcode_parser.tokenize(chunk)
+        line, letter, value, n_lines = tokens
+        is_g = letter == 71
+        is_axis = (letter >= 88) & (letter <= 90)
+        if not has_distance:
+            distance = np.flatnonzero(is_g & ((value == 90) | (value == 91)))
+            limit = line[distance[0]] if len(distance) else n_lines
+            needs_relative |= bool(np.any(line[is_axis] < limit))
+            has_distance = len(distance) > 0
+        relative = relative or bool(np.any(is_g & (value == 91)))
+        moves, end = gcode_parser.parse_tokens(tokens, state)
+        if not has_motion:
+            unknown = moves["line"][moves["kind"] == _UNKNOWN_MOTION] - state.line
+            if len(unknown):
+                has_axis = np.zeros(n_lines, dtype=bool)
+                has_axis[line[is_axis]] = True
+                center_only.append(~has_axis[unknown])
+            has_motion = bool(np.any(is_g & np.isin(value, (0, 1, 2, 3))))
+        if relative and not unresolved:
+            # Depuis le premier G91, une position inconnue ne peut plus être complétée
+            unresolved = any(np.isnan(moves[axis]).any() for axis in "xyz")
+        parts.append(moves)
+        state = end
+    summary = {
+        "has_distance": has_distance,
+        "needs_relative": needs_relative,
+        "unresolved": unresolved,
+        "center_only": np.concatenate(center_only) if center_only else np.zeros(0, dtype=bool),
+    }
+    return parts, state, summary
+
+
+def _scan_range(path, start, stop, chunk_bytes):
+    """Tâche d'un processus : analyse d'une plage depuis un état modal inconnu.
+
+    Les mouvements sont copiés dans un bloc de mémoire partagée dont le nom est
+    rendu avec le résumé ; le processus principal le supprime après la fusion.
+    """
+    with gcode_parser.open_mapped(path) as mapped:
+        data = mapped[start:stop]
+    unknown = ModalState(math.nan, math.nan, math.nan, _UNKNOWN_MOTION)
+    parts, end, summary = _parse_range(data, unknown, chunk_bytes)
+    count = sum(len(part) for part in parts)
+    summary.update(end=end, count=count, shm=None, prefix=None)
+    if not count:
+        return summary
+    shm = shared_memory.SharedMemory(create=True, size=count * PATH_DTYPE.itemsize)
+    moves = np.ndarray(count, dtype=PATH_DTYPE, buffer=shm.buf)
+    position = 0
+    for part in parts:
+        moves[position:position + len(part)] = part
+        position += len(part)
+    # Les valeurs inconnues précèdent toujours la première valeur connue : seuls
+    # les premiers mouvements de chaque groupe de colonnes sont à compléter
+    summary["prefix"] = {
+        "kind": _prefix(moves["kind"], lambda kind: kind == _UNKNOWN_MOTION),
+        "position": max(_prefix(moves[name], np.isnan) for name in _POSITIONS),
+        "f": _prefix(moves["f"], np.isnan),
+        "s": _prefix(moves["s"], np.isnan),
+    }
+    del moves
+    summary["shm"] = shm.name
+    if sys.platform == "win32":
+        # Sous Windows, un bloc disparaît avec son dernier handle : il reste
+        # ouvert jusqu'à la fin du processus, après la fusion
+        _open_blocks.append(shm)
+    else:
+        shm.close()
+    return summary
+
+
+def _prefix(column, unknown, block=1024):
+    """Nombre de premières valeurs de `column` inconnues selon `unknown` (par blocs croissants)."""
+    start = 0
+    while start < len(column):
+        known = np.flatnonzero(~unknown(column[start:start + block]))
+        if len(known):
+            return start + int(known[0])
+        start += block
+        block *= 4
+    return len(column)
+
+
+def _resolve(incoming, summary):
+    """État modal réel à la fin d'une plage analysée depuis un état inconnu."""
+    end = summary["end"]
+    return ModalState(
+        _known(end.x, incoming.x), _known(end.y, incoming.y), _known(end.z, incoming.z),
+        incoming.motion if end.motion == _UNKNOWN_MOTION else end.motion,
+        end.relative if summary["has_distance"] else incoming.relative,
+        _known(end.feed, incoming.feed), _known(end.spindle, incoming.spindle),
+        incoming.line + end.line,
+    )
+
+
+def _known(value, default):
+    return default if math.isnan(value) else value
+
+
+def _keep_mask(moves, incoming, center_only):
+    """Mouvements conservés une fois le mouvement modal réel connu (None : tous)."""
+    if incoming.motion >= ARC_CW or (incoming.motion >= 0 and not center_only.any()):
+        return None
+    unknown = np.flatnonzero(moves["kind"] == _UNKNOWN_MOTION)
+    keep = np.ones(len(moves), dtype=bool)
+    if incoming.motion < 0:
+        keep[unknown] = False
+    else:
+        keep[unknown[center_only]] = False
+    return keep
+
+
+def _fix_up(dest, incoming, prefix):
+    """Remplace dans `dest` les valeurs inconnues par celles de l'état `incoming`.
+
+    `prefix` : nombre de premiers mouvements à examiner, par groupe de colonnes.
+    """
+    dest["line"] += incoming.line
+    if incoming.motion >= 0:  # sinon les mouvements de type inconnu ont été écartés
+        kind = dest["kind"][:prefix["kind"]]
+        kind[kind == _UNKNOWN_MOTION] = incoming.motion
+    for name, value in zip(_POSITIONS, (incoming.x, incoming.y, incoming.z) * 2):
+        column = dest[name][:prefix["position"]]
+        column[np.isnan(column)] = value
+    for name, value in (("f", incoming.feed), ("s", incoming.spindle)):
+        if not math.isnan(value):
+            column = dest[name][:prefix[name]]
+            column[np.isnan(column)] = value
+
+
+def _attach(summary):
+    """Bloc de mémoire partagée des mouvements d'une plage (ouvert une fois)."""
+    if "mapped" not in summary:
+        summary["mapped"] = shared_memory.SharedMemory(name=summary["shm"])
+    return summary["mapped"]
+
+
+def _release(summary):
+    """Ferme et supprime le bloc de mémoire partagée d'une plage."""
+    if summary.get("shm") is None:
+        return
+    try:
+        shm = _attach(summary)
+    except FileNotFoundError:
+        pass
+    else:
+        shm.close()
+        shm.unlink()
+    summary.pop("mapped", None)
+    summary["shm"] = None
+
+
+def _place(out, offset, moves, keep, incoming, prefix):
+    """Recopie les mouvements d'une plage dans `out` à partir de `offset`, complétés par `incoming`."""
+    count = len(moves) if keep is None else int(np.count_nonzero(keep))
+    dest = out[offset:offset + count]
+    dest[:] = moves if keep is None else moves[keep]
+    if incoming is not None:
+        _fix_up(dest, incoming, prefix)
+
+
+def _merge(path, ranges, summaries, chunk_bytes, threads):
+    """Passe séquentielle sur les résumés puis recopie des mouvements dans le tableau final.
+
+    La recopie (NumPy libère le GIL) est répartie sur `threads` threads.
+    """
+    state = ModalState()
+    plan = []
+    total = 0
+    for (start, stop), summary in zip(ranges, summaries):
+        if summary["unresolved"] or (summary["needs_relative"] and state.relative):
+            # L'hypothèse de la plage ne tient pas : réanalyse avec l'état réel
+            with gcode_parser.open_mapped(path) as mapped:
+                data = mapped[start:stop]
+            parts, end, _ = _parse_range(data, state, chunk_bytes)
+            moves = np.concatenate(parts) if parts else np.zeros(0, dtype=PATH_DTYPE)
+            plan.append((total, moves, None, None, None))
+            total += len(moves)
+        else:
+            end = _resolve(state, summary)
+            if summary["count"]:
+                view = np.ndarray(summary["count"], dtype=PATH_DTYPE, buffer=_attach(summary).buf)
+                keep = _keep_mask(view, state, summary["center_only"])
+                prefix = summary["prefix"]
+                if keep is not None:  # positions dans le résultat, après les mouvements écartés
+                    prefix = {name: int(np.count_nonzero(keep[:length])) for name, length in prefix.items()}
+                plan.append((total, view, keep, state, prefix))
+                total += len(view) if keep is None else int(np.count_nonzero(keep))
+        state = end
+
+    out = np.empty(total, dtype=PATH_DTYPE)
+    with ThreadPoolExecutor(threads) as pool:
+        for future in [pool.submit(_place, out, *task) for task in plan]:
+            future.result()
+    # Les vues sur les blocs ne doivent plus servir une fois ceux-ci fermés
+    del plan[:]
+    for summary in summaries:
+        _release(summary)
+    return out
+
+
+def parse_file(path, workers=None, range_bytes=RANGE_BYTES, chunk_bytes=gcode_parser.CHUNK_BYTES,
+               min_bytes=MIN_PARALLEL_BYTES, progress=None, cancel=None, digest=None):
+    """Analyse un fichier avec `workers` processus (par défaut un par cœur).
+
+    Même résultat que gcode_parser.parse_file, qui est utilisé directement pour
+    les fichiers de moins de `min_bytes` octets ou avec un seul processus.
+    `progress`, `cancel` et `digest` comme pour gcode_parser.parse_gcode
+    (avancement par plage) ; l'empreinte est calculée par le processus
+    principal pendant qu'il attend les plages.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if workers < 2 or size < max(min_bytes, 1):
+        return gcode_parser.parse_file(path, chunk_bytes=chunk_bytes, progress=progress, cancel=cancel, digest=digest)
+    with gcode_parser.open_mapped(path) as mapped:
+        ranges = line_ranges(mapped, range_bytes)
+        if len(ranges) < 2:
+            return gcode_parser.parse_gcode(mapped, chunk_bytes=chunk_bytes, progress=progress, cancel=cancel,
+                                            digest=digest)
+        return _parse_ranges(path, mapped, ranges, workers, chunk_bytes, progress, cancel, digest)
+
+
+def _parse_ranges(path, mapped, ranges, workers, chunk_bytes, progress, cancel, digest):
+    size = len(mapped)
+    # Les processus partagent le suivi des ressources du processus principal :
+    # leurs blocs de mémoire partagée ne sont pas supprimés à leur sortie
+    if os.name == "posix":
+        resource_tracker.ensure_running()
+    pool = ProcessPoolExecutor(min(workers, len(ranges)), mp_context=process_context())
+    futures = [pool.submit(_scan_range, path, start, stop, chunk_bytes) for start, stop in ranges]
+    sizes = {future: stop - start for future, (start, stop) in zip(futures, ranges)}
+    hashed = 0 if digest is not None else size
+    try:
+        pending = set(futures)
+        done_bytes = 0
+        while pending or hashed < size:
+            if cancel is not None and cancel.is_set():
+                raise ParseCancelled()
+            if hashed < size:
+                # Une plage d'empreinte entre deux interrogations du pool
+                digest.update(mapped[hashed:hashed + RANGE_BYTES])
+                hashed = min(hashed + RANGE_BYTES, size)
+            if pending:
+                done, pending = wait(pending, timeout=0 if hashed < size else 0.05, return_when=FIRST_COMPLETED)
+                done_bytes += sum(sizes[future] for future in done)
+                if done and progress is not None:
+                    progress(done_bytes, size)
+        return _merge(path, ranges, [future.result() for future in futures], chunk_bytes, workers)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                _release(future.result())
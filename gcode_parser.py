@@ -0,0 +1,463 @@
+# gcode_parser.py
+"""Lecture du G-code pour les visualiseurs 3D.
+
+Un seul analyseur, partagé par display_gcode_3d.py et les deux visualiseurs
+animés. Le texte est découpé en mots (lettre + nombre) en une seule passe
+vectorisée sur les octets du fichier : pas d'expression régulière ni de dict
+par ligne, les nombres sont convertis en bloc par NumPy. Une machine à états
+modale, elle aussi vectorisée, applique ensuite G90/G91, le mouvement modal
+G0/G1/G2/G3 et les valeurs modales F/S.
+
+Le résultat est un tableau structuré `PATH_DTYPE` : un enregistrement par
+mouvement, avec ses positions absolues de départ et d'arrivée et le numéro de
+la ligne source. Les types de mouvement sont ceux de toolpath.py.
+"""
+import math
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from toolpath import RAPID, LINEAR, ARC_CW, ARC_CCW
+
+PATH_DTYPE = np.dtype([
+    ("kind", "u1"),                         # RAPID, LINEAR, ARC_CW ou ARC_CCW
+    ("line", "i8"),                         # numéro de ligne source (à partir de 0)
+    ("x0", "f8"), ("y0", "f8"), ("z0", "f8"),  # position de départ
+    ("x", "f8"), ("y", "f8"), ("z", "f8"),     # position d'arrivée
+    ("i", "f8"), ("j", "f8"),               # centre des arcs, relatif au départ
+    ("f", "f8"), ("s", "f8"),               # avance et vitesse de broche modales (NaN = inconnues)
+])
+
+# Couleurs historiques des visualiseurs, par type de mouvement
+MOTION_COLORS = {RAPID: "y", LINEAR: "r", ARC_CW: "b", ARC_CCW: "b"}
+
+# Taille des morceaux analysés d'un bloc : les tableaux intermédiaires restent
+# dans le cache du processeur (le débit double par rapport au fichier entier)
+CHUNK_BYTES = 1 << 18
+
+# Estimation initiale de la taille du tableau de mouvements (octets par mouvement)
+_BYTES_PER_MOVE = 24
+
+# Écart corde/arc par défaut du tracé des arcs (unités du programme) et
+# nombre maximal de segments par arc
+CHORD_ERROR = 0.01
+MAX_ARC_SEGMENTS = 1000
+
+# Vitesse des rapides (G0) et des mouvements sans avance connue, pour
+# l'estimation du temps machine (unités du programme par minute)
+RAPID_FEED = 5000.0
+
+# Dimensions du brut dans l'entête : "; (100.000, 50.000, 25.000 mm)" écrit par
+# main_tkinter.generate_header, ou "[100.000, 50.000, 25.000]" des anciens programmes
+_STOCK = re.compile(r"[(\[](\d+(?:\.\d+)?), (\d+(?:\.\d+)?), (\d+(?:\.\d+)?)(?: (?:mm|in))?[)\]]")
+
+# Longueur maximale d'un nombre après sa lettre (au-delà, le mot est tronqué)
+_MAX_NUMBER = 20
+# Chiffres significatifs lus exactement en entier 64 bits
+_MAX_DIGITS = 18
+
+_POW10 = 10.0 ** np.arange(256)
+
+# Mots lus par la machine à états, dans l'ordre des lignes du tableau `words`
+_WORDS = "XYZIJFS"
+_WORD_INDEX = np.full(256, -1, dtype=np.int8)
+_WORD_INDEX[np.frombuffer(_WORDS.encode(), dtype=np.uint8)] = np.arange(len(_WORDS))
+
+# Codes G non modaux dont les mots d'axe ne sont pas un déplacement (G4 pause,
+# G10 réglages, G28/G30 retour origine, G92 décalage) : ligne ignorée
+_NON_MOTION_AXIS_CODES = (4, 10, 28, 30, 92)
+
+
+def stock_dimensions(header):
+    """Dimensions (x, y, z) du brut lues dans l'entête du programme, None si elles n'y sont pas."""
+    match = _STOCK.search(header)
+    return tuple(float(value) for value in match.groups()) if match else None
+
+
+class ParseCancelled(Exception):
+    """Analyse interrompue à la demande (voir parse_gcode, `cancel`)."""
+
+
+@dataclass
+class ModalState:
+    """État modal de la machine entre deux morceaux de programme."""
+    x: float = 0.0
+    y: float = 0.0
+    z: float = 0.0
+    motion: int = -1            # RAPID à ARC_CCW, -1 tant qu'aucun G0-G3 n'a été lu
+    relative: bool = False      # G91 actif
+    feed: float = math.nan
+    spindle: float = math.nan
+    line: int = 0               # numéro de la prochaine ligne à lire
+
+
+def _as_bytes(data):
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    return data
+
+
+def count_lines(buf):
+    """Nombre de lignes d'un tampon d'octets (la dernière peut ne pas finir par \\n)."""
+    if len(buf) == 0:
+        return 0
+    return int(np.count_nonzero(buf == 10)) + int(buf[-1] != 10)
+
+
+def _in_comment(buf, letters, line, newlines, n_lines):
+    """Masque des lettres situées après un `;` ou dans un `( ... )` de leur ligne."""
+    in_comment = np.zeros(len(letters), dtype=bool)
+    semis = np.flatnonzero(buf == 59)
+    if len(semis):
+        first_semi = np.full(n_lines, len(buf))
+        semi_lines, first = np.unique(np.searchsorted(newlines, semis), return_index=True)
+        first_semi[semi_lines] = semis[first]
+        in_comment = letters > first_semi[line]
+    opens = np.flatnonzero(buf == 40)
+    if len(opens):
+        # Seules les lettres des lignes contenant une parenthèse sont examinées
+        open_lines = np.searchsorted(newlines, opens)
+        with_paren = np.zeros(n_lines, dtype=bool)
+        with_paren[open_lines] = True
+        candidates = np.flatnonzero(with_paren[line] & ~in_comment)
+        where = letters[candidates]
+        before = np.searchsorted(opens, where)
+        last_open = np.maximum(before - 1, 0)
+        opened = (before > 0) & (open_lines[last_open] == line[candidates])
+        last_open = opens[last_open]
+        closes = np.flatnonzero(buf == 41)
+        if len(closes):
+            before = np.searchsorted(closes, where)
+            opened &= ~((before > 0) & (closes[np.maximum(before - 1, 0)] > last_open))
+        in_comment[candidates] |= opened
+    return in_comment
+
+
+def _read_numbers(padded, starts):
+    """Lit le nombre qui commence à chaque position de `starts` ; NaN si illisible.
+
+    Les chiffres sont accumulés colonne par colonne (une colonne = un
+    caractère de tous les nombres à la fois) dans un entier divisé ensuite par
+    la puissance de 10 voulue : le résultat est arrondi exactement comme
+    float(). Les rares nombres trop longs ou mal formés repassent par float().
+    `padded` doit se terminer par au moins _MAX_NUMBER + 2 octets nuls.
+    """
+    count = len(starts)
+    mantissa = np.zeros(count, dtype=np.int64)
+    width = np.zeros(count, dtype=np.uint8)
+    digits = np.zeros(count, dtype=np.uint8)
+    decimals = np.zeros(count, dtype=np.uint8)
+    dot = np.zeros(count, dtype=bool)
+    invalid = np.zeros(count, dtype=bool)
+    first = padded[starts]
+    negative = first == 45
+    signed = negative | (first == 43)
+    width += signed
+    position = starts + signed
+    active = np.ones(count, dtype=bool)
+    for _ in range(_MAX_NUMBER):
+        char = padded[position]
+        digit = char - 48
+        is_digit = digit < 10
+        is_dot = char == 46
+        active &= is_digit | is_dot
+        if not active.any():
+            break
+        width += active
+        is_digit &= active
+        mantissa = np.where(is_digit, mantissa * 10 + digit, mantissa)
+        digits += is_digit
+        decimals += is_digit & dot
+        is_dot &= active
+        invalid |= is_dot & dot
+        dot |= is_dot
+        position += 1
+    values = mantissa / _POW10[decimals]
+    values = np.where(negative, -values, values)
+    values[digits == 0] = np.nan
+    for index in np.flatnonzero(invalid | (digits > _MAX_DIGITS)).tolist():
+        start = int(starts[index])
+        values[index] = _to_float(bytes(padded[start:start + int(width[index])]))
+    return values
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def tokenize(data):
+    """Découpe le G-code en mots ; retourne (lignes, lettres, valeurs, nombre de lignes).
+
+    `lignes` est le numéro de ligne de chaque mot, `lettres` son code ASCII en
+    majuscule et `valeurs` son nombre. Les commentaires `; ...` et `( ... )`
+    sont ignorés, ainsi que les lettres qui ne sont pas suivies d'un nombre.
+    Pour un gros programme, préférer parse_gcode qui travaille par morceaux.
+    """
+    buf = np.frombuffer(_as_bytes(data), dtype=np.uint8)
+    n_lines = count_lines(buf)
+    if n_lines == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8), np.zeros(0), 0
+    padded = np.concatenate((buf, np.zeros(_MAX_NUMBER + 2, dtype=np.uint8)))
+    upper = buf & 0xDF
+    letters = np.flatnonzero(upper - 65 < 26)
+    # Numéro de ligne de chaque lettre : nombre de lettres par ligne, puis répétition
+    newlines = np.flatnonzero(buf == 10)
+    per_line = np.diff(np.searchsorted(letters, newlines), prepend=0, append=len(letters))
+    line = np.repeat(np.arange(len(per_line)), per_line)
+    keep = ~_in_comment(buf, letters, line, newlines, len(per_line))
+    letters, line = letters[keep], line[keep]
+    values = _read_numbers(padded, letters + 1)
+    keep = ~np.isnan(values)
+    return line[keep], upper[letters[keep]], values[keep], n_lines
+
+
+def _ffill(values, present, initial):
+    """Propage la dernière valeur présente (valeur `initial` avant la première)."""
+    index = np.where(present, np.arange(len(values)), -1)
+    np.maximum.accumulate(index, out=index)
+    return np.where(index >= 0, values[np.maximum(index, 0)], initial)
+
+
+def parse_chunk(data, state=None):
+    """Analyse un morceau de programme à partir de l'état modal `state`.
+
+    Retourne (mouvements PATH_DTYPE, état modal à la fin du morceau). Les
+    morceaux successifs d'un même fichier doivent être coupés entre deux lignes.
+    """
+    return parse_tokens(tokenize(data), state)
+
+
+def parse_tokens(tokens, state=None):
+    """Machine à états modale de parse_chunk sur les mots `tokens` (résultat de tokenize)."""
+    state = state or ModalState()
+    line, letter, value, n_lines = tokens
+    if n_lines == 0:
+        return np.zeros(0, dtype=PATH_DTYPE), replace(state)
+
+    # Groupes modaux G : mouvement (G0-G3) et mode de distance (G90/G91)
+    g_mask = letter == 71
+    g_line, g_value = line[g_mask], value[g_mask]
+    motion_set = np.full(n_lines, -1)
+    is_motion = np.isin(g_value, (0, 1, 2, 3))
+    motion_set[g_line[is_motion]] = g_value[is_motion]
+    distance_set = np.full(n_lines, -1)
+    is_distance = (g_value == 90) | (g_value == 91)
+    distance_set[g_line[is_distance]] = g_value[is_distance] == 91
+    motion = _ffill(motion_set, motion_set >= 0, state.motion)
+    relative = _ffill(distance_set, distance_set >= 0, int(state.relative)).astype(bool)
+    skipped = np.zeros(n_lines, dtype=bool)
+    skipped[g_line[np.isin(np.floor(g_value), _NON_MOTION_AXIS_CODES)]] = True
+
+    # Autres mots : une ligne par lettre de _WORDS, NaN si absent (le dernier l'emporte)
+    words = np.full((len(_WORDS), n_lines), np.nan)
+    code = _WORD_INDEX[letter]
+    known = code >= 0
+    words[code[known], line[known]] = value[known]
+    present = ~np.isnan(words)
+    present[:5, skipped] = False
+    feed = _ffill(words[5], present[5], state.feed)
+    spindle = _ffill(words[6], present[6], state.spindle)
+
+    # Positions absolues après chaque ligne : une valeur absolue sert d'ancre,
+    # les valeurs relatives qui suivent s'y cumulent
+    positions = np.empty((n_lines, 3))
+    any_relative = relative.any()
+    for axis, origin in enumerate((state.x, state.y, state.z)):
+        if not any_relative:
+            positions[:, axis] = _ffill(words[axis], present[axis], origin)
+            continue
+        delta = np.cumsum(np.where(present[axis] & relative, words[axis], 0.0))
+        base = _ffill(words[axis] - delta, present[axis] & ~relative, origin)
+        positions[:, axis] = base + delta
+
+    has_axis = present[:3].any(axis=0)
+    has_center = present[3:5].any(axis=0)
+    moving = (motion >= 0) & (has_axis | ((motion >= ARC_CW) & has_center))
+    index = np.flatnonzero(moving)
+    previous = np.vstack(([state.x, state.y, state.z], positions[:-1]))
+
+    moves = np.zeros(len(index), dtype=PATH_DTYPE)
+    moves["kind"] = motion[index]
+    moves["line"] = index + state.line
+    for axis, name in enumerate("xyz"):
+        moves[name + "0"] = previous[index, axis]
+        moves[name] = positions[index, axis]
+    moves["i"] = np.nan_to_num(words[3, index])
+    moves["j"] = np.nan_to_num(words[4, index])
+    moves["f"] = feed[index]
+    moves["s"] = spindle[index]
+
+    end = positions[-1]
+    return moves, ModalState(float(end[0]), float(end[1]), float(end[2]), int(motion[-1]),
+                             bool(relative[-1]), float(feed[-1]), float(spindle[-1]), state.line + n_lines)
+
+
+def iter_chunks(data, chunk_bytes=CHUNK_BYTES):
+    """Découpe `data` (bytes, mmap) en morceaux d'environ `chunk_bytes` octets, coupés après un saut de ligne."""
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", min(start + chunk_bytes, size) - 1)
+        end = size if end < 0 else end + 1
+        yield data[start:end]
+        start = end
+
+
+def parse_gcode(data, state=None, chunk_bytes=CHUNK_BYTES, progress=None, cancel=None, digest=None):
+    """Analyse un programme complet (str, bytes ou mmap) ; retourne ses mouvements PATH_DTYPE.
+
+    Les mouvements de chaque morceau sont copiés dans un tableau préalloué
+    agrandi au besoin : la mémoire de pointe est celle du résultat, pas
+    celle de la liste des morceaux plus leur concaténation.
+    `progress(octets lus, octets au total)` est appelé après chaque morceau ;
+    si `cancel` (threading.Event) est levé, l'analyse s'arrête par ParseCancelled.
+    `digest` (hashlib) reçoit chaque morceau : l'empreinte du texte est calculée
+    pendant l'analyse, sans seconde lecture.
+    """
+    data = _as_bytes(data)
+    state = state or ModalState()
+    out = np.empty(len(data) // _BYTES_PER_MOVE + 16, dtype=PATH_DTYPE)
+    count = 0
+    done = 0
+    for chunk in iter_chunks(data, chunk_bytes):
+        if cancel is not None and cancel.is_set():
+            raise ParseCancelled()
+        if digest is not None:
+            digest.update(chunk)
+        moves, state = parse_chunk(chunk, state)
+        if count + len(moves) > len(out):
+            grown = np.empty(max(len(out) * 3 // 2, count + len(moves)), dtype=PATH_DTYPE)
+            grown[:count] = out[:count]
+            out = grown
+        out[count:count + len(moves)] = moves
+        count += len(moves)
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(data))
+    out.resize(count, refcheck=False)
+    return out
+
+
+@contextmanager
+def open_mapped(path):
+    """Projection mémoire (mmap) en lecture seule d'un fichier ; b"" s'il est vide."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def parse_file(path, chunk_bytes=CHUNK_BYTES, progress=None, cancel=None, digest=None):
+    """Analyse un fichier en flux depuis sa projection mémoire, sans le lire en entier en mémoire."""
+    with open_mapped(path) as data:
+        return parse_gcode(data, chunk_bytes=chunk_bytes, progress=progress, cancel=cancel, digest=digest)
+
+
+def tessellate_arcs(start, stop, center, clockwise, chord_error=None, arc_points=50,
+                    max_segments=MAX_ARC_SEGMENTS):
+    """Découpe des arcs (hélicoïdaux si Z varie) en segments, en un seul appel vectorisé.
+
+    `start`, `stop` : positions (n, 3) ; `center` : centres (n, 2) en X/Y ;
+    `clockwise` : (n,) booléens (G02). Avec `chord_error`, chaque arc reçoit le
+    plus petit nombre de segments dont l'écart corde/arc reste sous
+    `chord_error` (borné à `max_segments`) ; sinon `arc_points - 1` segments.
+    Z varie linéairement avec l'angle (filetage hélicoïdal). Le premier et le
+    dernier point sont exactement `start` et `stop`.
+
+    Retourne (segments (m, 2, 3), nombre de segments de chaque arc (n,)).
+    """
+    start = np.asarray(start, dtype=float).reshape(-1, 3)
+    stop = np.asarray(stop, dtype=float).reshape(-1, 3)
+    center = np.asarray(center, dtype=float).reshape(-1, 2)
+    clockwise = np.asarray(clockwise, dtype=bool).reshape(-1)
+    cx, cy = center[:, 0], center[:, 1]
+    radius = np.hypot(start[:, 0] - cx, start[:, 1] - cy)
+    angle_start = np.arctan2(start[:, 1] - cy, start[:, 0] - cx)
+    angle_end = np.arctan2(stop[:, 1] - cy, stop[:, 0] - cx)
+    angle_end = np.where(~clockwise & (angle_end <= angle_start), angle_end + 2 * np.pi, angle_end)
+    angle_end = np.where(clockwise & (angle_end >= angle_start), angle_end - 2 * np.pi, angle_end)
+    sweep = angle_end - angle_start
+
+    if chord_error is None:
+        counts = np.full(len(start), max(arc_points - 1, 1), dtype=np.int64)
+    else:
+        # Écart corde/arc d'un pas angulaire a : r (1 - cos(a / 2))
+        step = 2 * np.arccos(np.clip(1 - chord_error / np.maximum(radius, 1e-12), -1.0, 1.0))
+        counts = np.ceil(np.abs(sweep) / np.maximum(step, 1e-12)).astype(np.int64)
+        counts = np.clip(counts, 1, max_segments)
+
+    # Sommets de chaque arc (counts + 1 par arc), calculés une seule fois
+    arc = np.repeat(np.arange(len(start)), counts + 1)
+    first = np.cumsum(counts + 1) - (counts + 1)
+    t = (np.arange(len(arc)) - first[arc]) / counts[arc]
+    angles = angle_start[arc] + sweep[arc] * t
+    points = np.empty((len(arc), 3))
+    points[:, 0] = cx[arc] + radius[arc] * np.cos(angles)
+    points[:, 1] = cy[arc] + radius[arc] * np.sin(angles)
+    points[:, 2] = start[arc, 2] + (stop[arc, 2] - start[arc, 2]) * t
+    points[first] = start
+    points[first + counts] = stop
+    # Segment k de l'arc a : sommets (k + a, k + a + 1)
+    index = np.arange(int(counts.sum())) + np.repeat(np.arange(len(start)), counts)
+    out = np.empty((len(index), 2, 3))
+    out[:, 0] = points[index]
+    out[:, 1] = points[index + 1]
+    return out, counts
+
+
+def segments(moves, arc_points=50, tolerance=0.01, chord_error=None):
+    """Découpe les mouvements en segments de droite pour le tracé.
+
+    Retourne (segments (n, 2, 3), types de mouvement (n,), index du mouvement
+    source (n,)). Les arcs sont découpés par `tessellate_arcs` : `arc_points`
+    points par arc, ou selon l'écart corde/arc `chord_error` s'il est donné.
+    Un arc de rayon nul ou dont l'arrivée s'écarte du cercle de plus de
+    `tolerance` est tracé en ligne droite.
+    """
+    start = np.column_stack((moves["x0"], moves["y0"], moves["z0"]))
+    stop = np.column_stack((moves["x"], moves["y"], moves["z"]))
+    kind = moves["kind"]
+
+    center_x = moves["x0"] + moves["i"]
+    center_y = moves["y0"] + moves["j"]
+    radius = np.hypot(moves["i"], moves["j"])
+    off_circle = np.abs(np.hypot(moves["x"] - center_x, moves["y"] - center_y) - radius) > tolerance
+    arcs = np.flatnonzero((kind >= ARC_CW) & (radius >= 1e-4) & ~off_circle)
+
+    arc_segments, arc_counts = tessellate_arcs(start[arcs], stop[arcs],
+                                               np.column_stack((center_x[arcs], center_y[arcs])),
+                                               kind[arcs] == ARC_CW, chord_error, arc_points)
+    counts = np.ones(len(moves), dtype=np.int64)
+    counts[arcs] = arc_counts
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    out = np.empty((offsets[-1], 2, 3))
+    out[offsets[:-1], 0] = start
+    out[offsets[:-1], 1] = stop
+    if len(arcs):
+        shift = offsets[arcs] - (np.cumsum(arc_counts) - arc_counts)
+        out[np.arange(len(arc_segments)) + np.repeat(shift, arc_counts)] = arc_segments
+
+    source = np.repeat(np.arange(len(moves)), counts)
+    return out, kind[source], source
+
+
+def segment_times(segs, kinds, feeds, rapid_feed=RAPID_FEED):
+    """Temps machine cumulé (s) à la fin de chaque segment : longueur / avance.
+
+    `feeds` : avance (unités/min) de chaque segment, par exemple
+    `moves["f"][source]` avec l'index `source` retourné par segments().
+    Les rapides et les segments sans avance valide vont à `rapid_feed`.
+    """
+    delta = segs[:, 1] - segs[:, 0]
+    length = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2 + delta[:, 2] ** 2)
+    rate = np.where((kinds == RAPID) | ~(feeds > 0), rapid_feed, feeds)
+    return np.cumsum(length * 60.0 / rate)
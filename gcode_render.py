@@ -0,0 +1,562 @@
+# gcode_render.py
+"""Tracé matplotlib des segments produits par gcode_parser.
+
+Chaque classe de mouvement (rapide, travail, arc) est tracée par une seule
+Line3DCollection au lieu d'un appel `ax.plot` par segment. Les segments d'une
+classe sont fusionnés en une polyligne unique, coupée par des NaN entre deux
+segments non contigus : matplotlib ne crée alors qu'un chemin par classe
+(un objet Path par segment coûte ~20 s pour un million de segments).
+
+Pendant une rotation ou un zoom, ToolpathLOD remplace ces polylignes par
+des versions simplifiées (au plus `LOD_BUDGET` segments). ToolpathAnimation
+peut suivre le temps machine, avec TimelinePanel comme ligne de temps.
+ToolpathPicker retrouve la ligne source d'un segment cliqué (grille des
+segments projetés à l'écran).
+"""
+import time
+
+import numpy as np
+from mpl_toolkits.mplot3d import proj3d
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+from gcode_parser import MOTION_COLORS
+from toolpath import ARC_CCW, ARC_CW, LINEAR, RAPID
+
+# Nombre maximal de segments tracés pendant une rotation ou un zoom
+LOD_BUDGET = 200_000
+# Tolérance de départ de la simplification, en fraction de l'encombrement
+# (de l'ordre d'un pixel d'une grande fenêtre)
+_LOD_START = 1 / 4000
+
+# Distance maximale (pixels) entre un clic et le segment sélectionné
+PICK_RADIUS = 6
+# Couleur et épaisseur des segments de la ligne sélectionnée
+PICK_COLOR = "m"
+PICK_LINEWIDTH = 4
+
+# (classe, types de mouvement de toolpath)
+MOTION_CLASSES = (
+    ("rapid", (RAPID,)),
+    ("feed", (LINEAR,)),
+    ("arc", (ARC_CW, ARC_CCW)),
+)
+
+
+def _differs(a, b):
+    """Points (n, 3) de `a` différents de ceux de `b` (colonne par colonne : any(axis=1) est lent)."""
+    return (a[:, 0] != b[:, 0]) | (a[:, 1] != b[:, 1]) | (a[:, 2] != b[:, 2])
+
+
+def _polyline(segs):
+    """Sommets de la polyligne et index du sommet d'arrivée de chaque segment."""
+    if not len(segs):
+        return np.empty((0, 3)), np.zeros(0, dtype=np.int64)
+    breaks = np.ones(len(segs), dtype=bool)
+    breaks[1:] = _differs(segs[1:, 0], segs[:-1, 1])
+    # Chaque coupure insère (NaN, départ) avant l'arrivée du segment
+    ends = np.arange(len(segs)) + 2 * np.cumsum(breaks)
+    out = np.full((len(segs) + 2 * int(np.count_nonzero(breaks)), 3), np.nan)
+    out[ends] = segs[:, 1]
+    out[ends[breaks] - 1] = segs[breaks, 0]
+    return out[1:], ends - 1
+
+
+def polyline(segs):
+    """Segments (n, 2, 3) -> sommets (m, 3) d'une polyligne, NaN entre segments non contigus."""
+    return _polyline(segs)[0]
+
+
+def polyline_segments(verts):
+    """Nombre de segments tracés d'une polyligne (paires de sommets consécutifs sans NaN)."""
+    valid = ~np.isnan(verts[:, 0])
+    return int(np.count_nonzero(valid[1:] & valid[:-1]))
+
+
+def decimate(verts, tolerance):
+    """Polyligne simplifiée : écart au tracé d'origine de l'ordre de `tolerance`.
+
+    Les sommets sont ramenés sur une grille de pas `tolerance` : les segments
+    plus courts qu'une maille disparaissent (sommets confondus), puis les
+    sommets intermédiaires des portions alignées sur la grille sont retirés.
+    """
+    snapped = np.round(verts / tolerance)
+    # NaN != NaN : les coupures sont toujours conservées
+    keep = np.ones(len(snapped), dtype=bool)
+    keep[1:] = _differs(snapped[1:], snapped[:-1])
+    snapped = snapped[keep]
+    if len(snapped) > 2:
+        step = np.diff(snapped, axis=0)
+        # Pas consécutifs colinéaires (produit vectoriel nul) et de même sens
+        u, v = step[:-1], step[1:]
+        aligned = ((u[:, 1] * v[:, 2] == u[:, 2] * v[:, 1]) & (u[:, 2] * v[:, 0] == u[:, 0] * v[:, 2])
+                   & (u[:, 0] * v[:, 1] == u[:, 1] * v[:, 0])
+                   & (u[:, 0] * v[:, 0] + u[:, 1] * v[:, 1] + u[:, 2] * v[:, 2] > 0))
+        keep = np.ones(len(snapped), dtype=bool)
+        keep[1:-1] = ~aligned
+        snapped = snapped[keep]
+    return snapped * tolerance
+
+
+def _unique_segments(verts, tolerance):
+    """Polyligne sans les segments repassés (mêmes extrémités à `tolerance` près, dans un sens ou l'autre)."""
+    valid = ~np.isnan(verts[:, 0])
+    pairs = np.flatnonzero(valid[1:] & valid[:-1])
+    if not len(pairs):
+        return verts
+    cells = np.round(np.nan_to_num(verts) / tolerance).astype(np.int64)
+    # Clé de hachage de chaque extrémité, puis du segment non orienté
+    # (une collision ne fait qu'omettre un segment de l'aperçu)
+    ends = cells[:, 0] * np.int64(0x9E3779B97F4A7C15 - (1 << 64)) + cells[:, 1] * np.int64(0x632BE59BD9B4E019)
+    ends += cells[:, 2] * np.int64(0x7F4A7C159E3779B9)
+    low = np.minimum(ends[pairs], ends[pairs + 1])
+    high = np.maximum(ends[pairs], ends[pairs + 1])
+    _, first = np.unique(low * np.int64(0x2545F4914F6CDD1D) ^ high, return_index=True)
+    first.sort()
+    return _polyline(np.stack((verts[pairs[first]], verts[pairs[first] + 1]), axis=1))[0]
+
+
+def class_polylines(segs, kinds):
+    """Polyligne de chaque classe de mouvement présente : {classe: sommets}."""
+    polylines = {}
+    for name, members in MOTION_CLASSES:
+        mask = np.isin(kinds, members)
+        if mask.any():
+            polylines[name] = polyline(segs[mask])
+    return polylines
+
+
+def extent(segs):
+    """Plus grande dimension de l'encombrement des segments (0 s'il n'y en a pas)."""
+    if not len(segs):
+        return 0.0
+    return max(float(segs[:, :, axis].max() - segs[:, :, axis].min()) for axis in range(3))
+
+
+def lod_polylines(polylines, size, budget=LOD_BUDGET):
+    """Polylignes simplifiées ({classe: sommets}), au plus `budget` segments au total.
+
+    `size` : encombrement du trajet (voir extent). La tolérance part d'environ
+    un pixel et double jusqu'à respecter le budget ; au-delà de la première
+    passe, les segments repassés ne sont gardés qu'une fois.
+    """
+    coarse = dict(polylines)
+    tolerance = max(size, 1e-9) * _LOD_START
+    for attempt in range(64):
+        coarse = {name: decimate(verts, tolerance) for name, verts in coarse.items()}
+        if attempt:
+            coarse = {name: _unique_segments(verts, tolerance) for name, verts in coarse.items()}
+        if sum(polyline_segments(verts) for verts in coarse.values()) <= budget:
+            break
+        tolerance *= 2
+    return coarse
+
+
+def _collection(name, verts, linewidth, **kwargs):
+    members = dict(MOTION_CLASSES)[name]
+    return Line3DCollection([verts], colors=MOTION_COLORS[members[0]], linewidths=linewidth, **kwargs)
+
+
+def toolpath_collections(segs, kinds, linewidth=1):
+    """Une Line3DCollection par classe de mouvement présente : {classe: collection}."""
+    return {name: _collection(name, verts, linewidth) for name, verts in class_polylines(segs, kinds).items()}
+
+
+def add_toolpath(ax, segs, kinds, linewidth=1):
+    """Ajoute les segments à l'axe 3D `ax` (une collection par classe) ; retourne les collections."""
+    collections = toolpath_collections(segs, kinds, linewidth)
+    for collection in collections.values():
+        ax.add_collection3d(collection)
+    return collections
+
+
+class ToolpathAnimation:
+    """Tracé progressif des segments, en O(n) sur toute l'animation.
+
+    Chaque classe de mouvement a deux collections : `done` contient les
+    segments déjà tracés et n'est redessinée que lors d'un rendu complet
+    (rotation, zoom, redimensionnement) ; `head` ne contient que les segments
+    ajoutés depuis l'image précédente. Avec un canevas qui permet le blitting,
+    chaque image ne dessine que `head` par-dessus l'image précédente ; sinon
+    le canevas est redessiné en entier (sans recréer d'artiste).
+
+    `event_source` (minuteur du canevas) a la même interface que celui de
+    FuncAnimation : start(), stop(), interval.
+
+    Avec `times` (temps machine cumulé de chaque segment, voir
+    gcode_parser.segment_times), la lecture suit le temps machine : à chaque
+    image, l'horloge `clock` avance du temps réellement écoulé multiplié par
+    `speed`, et les segments terminés à cet instant sont tracés (recherche
+    dichotomique). Une vitesse élevée saute donc des images au lieu de
+    raccourcir l'intervalle du minuteur. Sans `times`, chaque image ajoute
+    `step` segments.
+    """
+
+    def __init__(self, ax, segs, kinds, linewidth=1.5, interval=100, step=1, on_frame=None, times=None):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.total = len(segs)
+        self.count = 0
+        self.step = step
+        self.on_frame = on_frame        # appelé avec le nombre de segments tracés
+        self.times = times
+        self.speed = 1.0
+        self.clock = 0.0                # temps machine affiché (s)
+        self._tick = None               # instant de la dernière image (time.perf_counter)
+        self._background = None
+        self._layers = []
+        for name, members in MOTION_CLASSES:
+            mask = np.isin(kinds, members)
+            if not mask.any():
+                continue
+            verts, ends = _polyline(segs[mask])
+            done = Line3DCollection([verts[:0]], colors=MOTION_COLORS[members[0]], linewidths=linewidth)
+            head = Line3DCollection([verts[:0]], colors=MOTION_COLORS[members[0]], linewidths=linewidth,
+                                    animated=True)
+            ax.add_collection3d(done)
+            ax.add_collection3d(head)
+            # Nombre de segments de la classe parmi les k premiers segments
+            seen = np.concatenate(([0], np.cumsum(mask)))
+            self._layers.append((verts, ends, seen, done, head))
+        self.event_source = self.canvas.new_timer(interval=interval)
+        self.event_source.add_callback(self._on_timer)
+        self._draw_cid = self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _visible(self, ends, seen, count):
+        """Nombre de sommets de la polyligne visibles après `count` segments."""
+        k = seen[count]
+        return int(ends[k - 1]) + 1 if k else 0
+
+    def advance(self, count):
+        """Trace les segments jusqu'à `count` (sans dessiner) ; retourne les collections `head`."""
+        count = min(max(int(count), 0), self.total)
+        heads = []
+        for verts, ends, seen, done, head in self._layers:
+            low = self._visible(ends, seen, min(self.count, count))
+            high = self._visible(ends, seen, count)
+            # Le dernier sommet déjà tracé relie la tête au reste du trajet
+            head.set_segments([verts[max(low - 1, 0):high]])
+            done.set_segments([verts[:high]])
+            heads.append(head)
+        self.count = count
+        return heads
+
+    def _on_draw(self, event):
+        # Rendu complet : `done` est à jour, l'image devient le fond des prochaines images
+        if getattr(self.canvas, "supports_blit", False):
+            self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+
+    @property
+    def duration(self):
+        """Temps machine total (s), 0 sans `times`."""
+        return float(self.times[-1]) if self.times is not None and len(self.times) else 0.0
+
+    def count_at(self, clock):
+        """Nombre de segments terminés au temps machine `clock` (O(log n))."""
+        return int(np.searchsorted(self.times, clock, side="right"))
+
+    def seek(self, clock):
+        """Affiche l'état du trajet au temps machine `clock` (curseur de la ligne de temps)."""
+        self.clock = min(max(float(clock), 0.0), self.duration)
+        self._tick = None
+        self.draw_frame(self.count_at(self.clock))
+
+    def play(self):
+        self._tick = None
+        self.event_source.start()
+
+    def pause(self):
+        self.event_source.stop()
+
+    def draw_frame(self, count):
+        """Trace jusqu'à `count` segments et met l'affichage à jour."""
+        if count < self.count:
+            self._background = None  # retour en arrière : le fond contient des segments à effacer
+        heads = self.advance(count)
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        for head in heads:
+            head.do_3d_projection()
+            self.ax.draw_artist(head)
+        self.canvas.blit(self.ax.bbox)
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+
+    def _on_timer(self):
+        if self.times is None:
+            self.draw_frame(self.count + self.step)
+        else:
+            now = time.perf_counter()
+            if self._tick is not None:
+                self.clock = min(self.clock + (now - self._tick) * self.speed, self.duration)
+            self._tick = now
+            self.draw_frame(self.count_at(self.clock))
+        if self.on_frame is not None:
+            self.on_frame(self.count)
+        if self.count >= self.total:
+            self.event_source.stop()
+
+    def finish(self):
+        """Arrête l'animation et affiche tous les segments."""
+        self.event_source.stop()
+        self.clock = self.duration
+        self.advance(self.total)
+        self.canvas.draw_idle()
+        if self.on_frame is not None:
+            self.on_frame(self.count)
+
+    def close(self):
+        """Arrête le minuteur et se détache du canevas (nouveau fichier chargé)."""
+        self.event_source.stop()
+        self.canvas.mpl_disconnect(self._draw_cid)
+
+
+def format_clock(seconds):
+    """Durée affichée par la ligne de temps : m:ss, ou h:mm:ss au-delà d'une heure."""
+    hours, rest = divmod(int(round(seconds)), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class TimelinePanel:
+    """Ligne de temps (curseur et durées) d'une ToolpathAnimation au temps machine (Tk).
+
+    Le cadre `frame` est placé par le visualiseur avec grid() ; attach() le
+    relie à chaque nouvelle animation. Déplacer le curseur appelle
+    anim.seek() ; pendant la lecture, le curseur suit l'horloge.
+    """
+
+    def __init__(self, parent):
+        import tkinter as tk
+        from tkinter import ttk
+        self.frame = ttk.Frame(parent)
+        # Variable liée : la modifier pendant la lecture n'appelle pas `command`
+        self.value = tk.DoubleVar(master=parent, value=0.0)
+        self.scale = ttk.Scale(self.frame, from_=0.0, to=1.0, variable=self.value, command=self._on_scale)
+        self.scale.pack(side="left", fill="x", expand=True, padx=5)
+        self.label = ttk.Label(self.frame, text="0:00 / 0:00")
+        self.label.pack(side="left", padx=5)
+        self.anim = None
+
+    def attach(self, anim):
+        self.anim = anim
+        anim.on_frame = self._on_frame
+        self.scale.configure(to=max(anim.duration, 1e-9))
+        self._show(anim.clock)
+
+    def _show(self, clock):
+        self.value.set(clock)
+        self.label.configure(text=f"{format_clock(clock)} / {format_clock(self.anim.duration)}")
+
+    def _on_frame(self, count):
+        self._show(self.anim.clock)
+
+    def _on_scale(self, value):
+        if self.anim is not None:
+            self.anim.seek(float(value))
+            self._show(self.anim.clock)
+
+
+class ToolpathLOD:
+    """Tracé statique des segments, simplifié pendant les rotations et zooms.
+
+    Les collections complètes sont celles de add_toolpath. Si le trajet
+    compte plus de `budget` segments, des collections simplifiées
+    (lod_polylines) les remplacent tant que la vue bouge : bouton de souris
+    enfoncé sur l'axe, ou molette jusqu'à `idle_ms` ms après le dernier cran.
+    """
+
+    def __init__(self, ax, segs, kinds, linewidth=1, budget=LOD_BUDGET, idle_ms=300):
+        self.ax = ax
+        self.moving = False
+        self._idle = None
+        self._idle_ms = idle_ms
+        self._cids = []
+        polylines = class_polylines(segs, kinds)
+        self.full = {name: _collection(name, verts, linewidth) for name, verts in polylines.items()}
+        self.coarse = {}
+        self.coarse_count = 0           # segments des collections simplifiées
+        for collection in self.full.values():
+            ax.add_collection3d(collection)
+        if len(segs) <= budget:
+            return
+        for name, verts in lod_polylines(polylines, extent(segs), budget).items():
+            self.coarse_count += polyline_segments(verts)
+            collection = _collection(name, verts, linewidth, visible=False)
+            ax.add_collection3d(collection)
+            self.coarse[name] = collection
+        canvas = ax.figure.canvas
+        self._cids = [
+            canvas.mpl_connect("button_press_event", self._on_press),
+            canvas.mpl_connect("button_release_event", self._on_release),
+            canvas.mpl_connect("scroll_event", self._on_scroll),
+        ]
+
+    def set_moving(self, moving):
+        """Affiche les collections simplifiées (True) ou complètes (False)."""
+        if moving == self.moving or not self.coarse:
+            return
+        self.moving = moving
+        for collection in self.coarse.values():
+            collection.set_visible(moving)
+        for collection in self.full.values():
+            collection.set_visible(not moving)
+        if not moving:
+            self.ax.figure.canvas.draw_idle()
+
+    def _on_press(self, event):
+        if event.inaxes is self.ax:
+            self.set_moving(True)
+
+    def _on_release(self, event):
+        self.set_moving(False)
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.ax:
+            return
+        self.set_moving(True)
+        if self._idle is None:
+            # Minuteur créé à la demande : le canevas Tk est installé après le tracé
+            self._idle = self.ax.figure.canvas.new_timer(interval=self._idle_ms)
+            self._idle.single_shot = True
+            self._idle.add_callback(self.set_moving, False)
+        self._idle.stop()
+        self._idle.start()
+
+    def close(self):
+        """Se détache du canevas (nouveau fichier chargé)."""
+        if self._idle is not None:
+            self._idle.stop()
+        for cid in self._cids:
+            self.ax.figure.canvas.mpl_disconnect(cid)
+        self._cids = []
+
+
+def project(ax, points):
+    """Coordonnées écran (pixels, (n, 2)) des points 3D (n, 3) dans la vue courante de `ax`."""
+    x, y, _ = proj3d.proj_transform(points[:, 0], points[:, 1], points[:, 2], ax.get_proj())
+    return ax.transData.transform(np.column_stack((x, y)))
+
+
+class ScreenGrid:
+    """Grille uniforme des segments projetés à l'écran (sélection au clic).
+
+    Une cellule mesure 2 × `radius` pixels. Les segments courts (au plus une
+    cellule) sont rangés, triés par cellule, selon leur milieu : les 3 × 3
+    cellules autour du clic contiennent tous ceux qui passent à moins de
+    `radius` pixels. Les segments plus longs, peu nombreux hors des zooms
+    très serrés, sont testés un à un.
+    """
+
+    def __init__(self, starts, stops, radius=PICK_RADIUS):
+        self.starts = starts
+        self.stops = stops
+        self.radius = radius
+        self.cell = 2.0 * radius
+        delta = stops - starts
+        short = delta[:, 0] ** 2 + delta[:, 1] ** 2 <= self.cell ** 2
+        cells = np.floor((starts[short] + stops[short]) / (2 * self.cell)).astype(np.int64)
+        keys = self._key(cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.items = np.flatnonzero(short)[order]
+        self.long = np.flatnonzero(~short)
+
+    @staticmethod
+    def _key(cx, cy):
+        return cx * (1 << 32) + cy
+
+    def candidates(self, x, y):
+        """Segments pouvant passer à moins de `radius` pixels de (x, y)."""
+        cx, cy = int(np.floor(x / self.cell)), int(np.floor(y / self.cell))
+        keys = np.array([self._key(cx + dx, cy + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+        low = np.searchsorted(self.keys, keys, side="left")
+        high = np.searchsorted(self.keys, keys, side="right")
+        return np.concatenate([self.long] + [self.items[a:b] for a, b in zip(low, high)])
+
+    def nearest(self, x, y):
+        """Index du segment le plus proche de (x, y) à moins de `radius` pixels, sinon None."""
+        candidates = self.candidates(x, y)
+        if not len(candidates):
+            return None
+        a, b = self.starts[candidates], self.stops[candidates]
+        ab = b - a
+        length2 = ab[:, 0] ** 2 + ab[:, 1] ** 2
+        t = ((x - a[:, 0]) * ab[:, 0] + (y - a[:, 1]) * ab[:, 1]) / np.where(length2 > 0, length2, 1.0)
+        t = np.clip(t, 0.0, 1.0)
+        distance = np.hypot(a[:, 0] + t * ab[:, 0] - x, a[:, 1] + t * ab[:, 1] - y)
+        best = int(np.nanargmin(distance)) if not np.isnan(distance).all() else None
+        if best is None or distance[best] > self.radius:
+            return None
+        return int(candidates[best])
+
+
+class ToolpathPicker:
+    """Sélection au clic des segments du tracé et mise en évidence d'une ligne source.
+
+    `lines` : ligne source (à partir de 0) de chaque segment, croissante
+    (LoadResult.lines). Un clic sans glisser (glisser fait tourner la vue)
+    appelle `on_pick(ligne)`. La grille écran (ScreenGrid) est reconstruite
+    au premier clic qui suit une rotation, un zoom ou un redimensionnement.
+    """
+
+    def __init__(self, ax, segs, lines, radius=PICK_RADIUS, on_pick=None):
+        self.ax = ax
+        self.segs = segs
+        self.lines = lines
+        self.radius = radius
+        self.on_pick = on_pick
+        self.line = None        # ligne mise en évidence
+        self._grid = None
+        self._view = None
+        self._press = None
+        self.highlight = Line3DCollection([np.empty((0, 3))], colors=PICK_COLOR, linewidths=PICK_LINEWIDTH)
+        ax.add_collection3d(self.highlight)
+        canvas = ax.figure.canvas
+        self._cids = [
+            canvas.mpl_connect("button_press_event", self._on_press),
+            canvas.mpl_connect("button_release_event", self._on_release),
+        ]
+
+    def grid(self):
+        """Grille de la vue courante (reconstruite si la vue a changé)."""
+        view = (self.ax.get_proj().tobytes(), tuple(self.ax.bbox.bounds))
+        if view != self._view:
+            points = project(self.ax, self.segs.reshape(-1, 3)).reshape(-1, 2, 2)
+            self._grid = ScreenGrid(points[:, 0], points[:, 1], self.radius)
+            self._view = view
+        return self._grid
+
+    def pick(self, x, y):
+        """Ligne source du segment sous le point écran (x, y), None si aucun."""
+        index = self.grid().nearest(x, y)
+        return None if index is None else int(self.lines[index])
+
+    def highlight_line(self, line):
+        """Met en évidence les segments de la ligne `line` ; retourne leur nombre."""
+        low, high = np.searchsorted(self.lines, [line, line + 1])
+        self.line = line
+        self.highlight.set_segments(self.segs[low:high])
+        self.ax.figure.canvas.draw_idle()
+        return int(high - low)
+
+    def _on_press(self, event):
+        self._press = (event.x, event.y) if event.inaxes is self.ax and event.button == 1 else None
+
+    def _on_release(self, event):
+        press, self._press = self._press, None
+        if press is None or event.button != 1 or getattr(event.canvas.toolbar, "mode", ""):
+            return
+        if np.hypot(event.x - press[0], event.y - press[1]) > 3:
+            return  # rotation
+        line = self.pick(event.x, event.y)
+        if line is not None:
+            self.highlight_line(line)
+            if self.on_pick is not None:
+                self.on_pick(line)
+
+    def close(self):
+        """Se détache du canevas (nouveau fichier chargé)."""
+        for cid in self._cids:
+            self.ax.figure.canvas.mpl_disconnect(cid)
+        self._cids = []
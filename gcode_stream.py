@@ -0,0 +1,145 @@
+# gcode_stream.py
+"""Écriture en flux du G-code produit par les générateurs de main_tkinter.py.
+
+Les générateurs (`emit_surfacing`, `emit_threading`, ...) ajoutent leurs
+mouvements dans un `toolpath.Toolpath` et retournent les coordonnées utiles au
+calcul du stock. Ce module relie ces générateurs à une destination quelconque
+(fichier, tampon mémoire, socket) : le G-code est formaté et écrit par blocs,
+sans jamais construire le programme complet en une seule chaîne.
+
+Tous les réglages d'une génération (unités, pourcentage de plongée, précision,
+destination, instrumentation) sont portés par un `GenerationContext` passé
+explicitement à chaque générateur : aucun état global, plusieurs générations
+aux réglages différents peuvent tourner en parallèle dans des threads.
+"""
+import time
+from dataclasses import dataclass, field, replace
+
+from toolpath import Toolpath
+
+# Nombre de lignes regroupées avant chaque écriture dans la destination
+CHUNK_ROWS = 65536
+
+# Avance de plongée par défaut, en % de l'avance de coupe (toutes les entrées :
+# interface, ligne de commande, configuration, travaux multi-opérations)
+DEFAULT_PERCENT = 50
+
+
+def parse_percent(value, default=DEFAULT_PERCENT):
+    """Lit un pourcentage de plongée ("50%", "50" ou 50) ; `default` si illisible."""
+    try:
+        return int(str(value).strip().strip("%"))
+    except ValueError:
+        return default
+
+
+def config_percent(config):
+    """Pourcentage de plongée d'une configuration (forme config.json).
+
+    Compatibilité : on retombe sur la clé historique global_feed_rate_drill_percent.
+    """
+    return parse_percent(config.get("global_feed_rate_percent",
+                                    config.get("global_feed_rate_drill_percent", DEFAULT_PERCENT)))
+
+
+@dataclass
+class GenerationContext:
+    """Réglages d'une génération, passés à chaque générateur `emit_<mode>(config, tp, ctx)`.
+
+    `hooks` est une liste de fonctions `hook(event, info)` appelées avec les
+    événements "start", "flush" et "end" (mode, lignes écrites, durée), et
+    "cache_hit" quand le corps du programme provient de gcode_cache.
+    """
+    units: str = "mm"
+    percent: int = DEFAULT_PERCENT  # avance de plongée, en % de l'avance de coupe
+    precision: int = 3          # décimales des coordonnées
+    sink: object = None         # destination (objet avec write(str)), None = en mémoire
+    chunk_rows: int = CHUNK_ROWS
+    hooks: list = field(default_factory=list)
+    tracker: object = None      # toolpath.BoundsTracker alimenté à chaque bloc écrit
+
+    def plunge_feed(self, feed_rate):
+        """Avance des plongées en Z."""
+        return feed_rate * self.percent / 100
+
+    def notify(self, event, **info):
+        for hook in self.hooks:
+            hook(event, info)
+
+    def toolpath(self):
+        """Toolpath vide configuré selon le contexte (destination, précision)."""
+        tp = Toolpath(sink=self.sink, chunk_rows=self.chunk_rows, precision=self.precision)
+        tp.tracker = self.tracker
+        if self.hooks:
+            tp.on_flush = lambda rows: self.notify("flush", rows=rows)
+        return tp
+
+
+def context_from_config(config, **overrides):
+    """Contexte correspondant aux réglages globaux d'une configuration (forme config.json)."""
+    units = config.get("global_units", "mm")
+    return replace(GenerationContext(units=units if units in ("mm", "in") else "mm", percent=config_percent(config)),
+                   **overrides)
+
+
+class SocketSink:
+    """Adapte une socket connectée à l'interface `write(str)` d'un fichier."""
+
+    def __init__(self, sock, encoding="utf-8"):
+        self.sock = sock
+        self.encoding = encoding
+
+    def write(self, text):
+        self.sock.sendall(text.encode(self.encoding))
+        return len(text)
+
+
+class TeeSink:
+    """Duplique chaque écriture vers plusieurs destinations."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, text):
+        for sink in self.sinks:
+            sink.write(text)
+        return len(text)
+
+
+def run_generator(emit, config, ctx):
+    """Exécute `emit` avec le contexte `ctx` ; retourne (Toolpath, coordonnées)."""
+    mode = emit.__name__.replace("emit_", "", 1)
+    tp = ctx.toolpath()
+    ctx.notify("start", mode=mode)
+    start = time.perf_counter()
+    result = emit(config, tp, ctx)
+    rows = tp.rows_written + len(tp)
+    tp.flush()
+    ctx.notify("end", mode=mode, rows=rows, seconds=time.perf_counter() - start)
+    return tp, result
+
+
+def stream_gcode(emit, config, ctx):
+    """Exécute le générateur `emit` en écrivant son G-code dans `ctx.sink` par blocs.
+
+    Retourne la valeur de retour du générateur (tuple de coordonnées).
+    """
+    if ctx.sink is None:
+        raise ValueError("stream_gcode nécessite un contexte avec une destination (sink).")
+    return run_generator(emit, config, ctx)[1]
+
+
+def build_toolpath(emit, config, ctx=None):
+    """Exécute le générateur `emit` en mémoire et retourne (Toolpath, coordonnées)."""
+    ctx = replace(ctx or context_from_config(config), sink=None)
+    return run_generator(emit, config, ctx)
+
+
+def collect_gcode(emit, config, ctx=None):
+    """Génère une opération en mémoire et retourne le tuple historique à 8 éléments.
+
+    (gcode_string, start_x, start_y, start_z, current_z, end_x, end_y, clearance_height)
+    Sans `ctx`, les réglages globaux sont lus dans `config`.
+    """
+    tp, result = build_toolpath(emit, config, ctx)
+    return (tp.to_gcode(),) + tuple(result)
@@ -0,0 +1,324 @@
+# generation.py
+"""API de génération en processus.
+
+L'interface (GUI.py), la ligne de commande (gcode_generator.py) et le
+traitement en lot appellent directement `generate_program` avec un
+`GenerationRequest` : plus de passage par config.json ni de sous-processus.
+config.json ne sert plus qu'à la persistance des derniers paramètres
+(`request_from_config` permet de rejouer une configuration enregistrée).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+import main_tkinter
+import mode_registry
+import nc_index
+from gcode_cache import cache_key
+from gcode_stream import DEFAULT_PERCENT, GenerationContext, TeeSink, config_percent, parse_percent, stream_gcode
+from toolpath import BoundsTracker
+
+# Identifiant de mode ("last_operation") -> section de config.json / générateur
+MODE_SECTIONS = {spec.mode_id: spec.section for spec in mode_registry.all_modes()}
+
+PROGRAM_END = "G90\nM5\nM30\n"
+
+
+@dataclass
+class GenerationRequest:
+    """Paramètres complets d'une génération, indépendants de config.json."""
+    mode: str                                   # identifiant "1" à "6"
+    params: dict = field(default_factory=dict)  # section du mode (mêmes clés que config.json)
+    project_name: str = "test"
+    machine: str = "CNC_450x800"
+    units: str = "mm"
+    percent: int = DEFAULT_PERCENT              # avance de plongée, en % de l'avance de coupe
+    language: str = "fr"
+    precision: int = 3                          # décimales des coordonnées
+
+    def context(self, sink=None, hooks=None):
+        """Contexte de génération (réglages globaux) de cette requête."""
+        return GenerationContext(units=self.units, percent=self.percent, precision=self.precision,
+                                 sink=sink, hooks=list(hooks or []))
+
+    @property
+    def spec(self):
+        return mode_registry.get_mode(self.mode)
+
+    @property
+    def section(self):
+        return self.spec.section
+
+    def to_config(self):
+        """Configuration équivalente, sous la forme lue par les générateurs."""
+        config = {
+            "last_operation": self.mode,
+            "project_name": self.project_name,
+            "machine": self.machine,
+            "global_units": self.units,
+            "global_feed_rate_percent": f"{self.percent}%",
+            "language": self.language,
+            self.section: dict(self.params),
+        }
+        return main_tkinter.normalize_config(config)
+
+
+@dataclass
+class GenerationResult:
+    filename: str
+    stock: tuple        # (stock_x, stock_y, stock_z) écrit dans l'entête
+    operation: tuple    # coordonnées retournées par le générateur
+
+
+def request_from_config(config):
+    """Construit une requête à partir d'une configuration enregistrée (config.json)."""
+    mode = str(config.get("last_operation", "1"))
+    units = config.get("global_units", "mm")
+    if units not in ["mm", "in"]:
+        print(f"AVERTISSEMENT: Unités invalides '{units}', fallback à 'mm'")
+        units = "mm"
+    return GenerationRequest(
+        mode=mode,
+        params=dict(config.get(MODE_SECTIONS.get(mode, ""), {})),
+        project_name=config.get("project_name", "test"),
+        machine=config.get("machine", "CNC_450x800"),
+        units=units,
+        percent=config_percent(config),
+        language=config.get("language", "fr"),
+    )
+
+
+def _emit_and_header(request):
+    config = request.to_config()
+    emit = request.spec.load_generator()
+    stock = main_tkinter.calculate_stock_dimensions([], config)
+    header = main_tkinter.generate_header(request.project_name, request.machine, *stock, request.units)
+    return config, emit, stock, header
+
+
+def _write_body(request, config, emit, sink, hooks=None, cache=None, tracker=None):
+    """Écrit le G-code de l'opération dans `sink`, depuis `cache` si possible.
+
+    `tracker` (toolpath.BoundsTracker) reçoit l'encombrement de la trajectoire.
+    """
+    ctx = request.context(sink, hooks)
+    if cache is None:
+        return stream_gcode(emit, config, replace(ctx, tracker=tracker))
+    key = cache_key(request)
+    hit = cache.lookup(key)
+    if hit is not None and tracker is not None and hit[2] is None:
+        hit[0].close()     # entrée sans encombrement : l'opération est regénérée
+        hit = None
+    if hit is not None:
+        body, operation, box = hit
+        cache.copy_body(body, sink)
+        if tracker is not None:
+            tracker.merge(box)
+        ctx.notify("cache_hit", mode=request.section, key=key)
+        return operation
+    # Encombrement propre à l'opération, conservé avec l'entrée du cache
+    own = BoundsTracker()
+    entry = cache.entry(key)
+    try:
+        operation = stream_gcode(emit, config, replace(ctx, sink=TeeSink(sink, entry), tracker=own))
+    except Exception:
+        entry.abort()
+        raise
+    entry.commit(operation, own.box)
+    if tracker is not None:
+        tracker.merge(own.box)
+    return operation
+
+
+def write_program(request, sink, hooks=None, cache=None):
+    """Écrit le programme complet (entête, G-code, fin) dans `sink` ; retourne (stock, coordonnées).
+
+    Le générateur ne contrôle ses paramètres qu'en produisant le G-code : le corps
+    est d'abord écrit dans un fichier temporaire, et rien n'atteint `sink` (la
+    sortie standard par exemple) si la génération échoue.
+    """
+    config, emit, stock, header = _emit_and_header(request)
+    with tempfile.TemporaryFile("w+") as body:
+        operation = _write_body(request, config, emit, body, hooks, cache)
+        sink.write(header)
+        body.seek(0)
+        shutil.copyfileobj(body, sink, 1 << 20)
+    sink.write(PROGRAM_END)
+    return stock, operation
+
+
+class _LineCounter:
+    """Compte les lignes écrites dans `file` (index des programmes, nc_index)."""
+
+    def __init__(self, file):
+        self.file = file
+        self.lines = 0
+
+    def write(self, text):
+        self.lines += text.count("\n")
+        return self.file.write(text)
+
+
+def _write_atomic(filename, write):
+    """Appelle `write(fichier)` sur un fichier temporaire, renommé en `filename` une
+    fois l'écriture terminée (pas de fichier tronqué en cas d'erreur)."""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        if not os.access(directory, os.W_OK):
+            raise PermissionError(f"Pas de permissions d'écriture dans {directory}")
+    tmp_filename = filename + ".part"
+    try:
+        with open(tmp_filename, "w") as file:
+            result = write(file)
+        os.replace(tmp_filename, filename)
+    except Exception:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    return result
+
+
+def default_filename(request, output_dir="NC"):
+    """Nom historique : <dossier>/<mode>_<projet>_<horodatage>.nc (caractères invalides remplacés)."""
+    project_name = request.project_name
+    for char in '<>:"/\\|?*':
+        project_name = project_name.replace(char, '_')
+    return os.path.join(output_dir, f"{request.mode}_{project_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.nc")
+
+
+def generate_program(request, filename=None, output_dir="NC", hooks=None, cache=None):
+    """Génère le programme de `request` dans un fichier .nc et retourne un GenerationResult.
+
+    `cache` (gcode_cache.GcodeCache) permet de réutiliser le corps d'un
+    programme déjà généré avec les mêmes paramètres. Un programme écrit sous
+    son nom par défaut (dossier `output_dir`) est enregistré dans l'index du
+    dossier (nc_index).
+    """
+    config, emit, stock, header = _emit_and_header(request)
+    indexed = filename is None
+    filename = filename or default_filename(request, output_dir)
+    tracker = BoundsTracker() if indexed else None
+    counter = None
+
+    def write(file):
+        nonlocal counter
+        counter = _LineCounter(file)
+        counter.write(header)
+        operation = _write_body(request, config, emit, counter, hooks, cache, tracker)
+        counter.write(PROGRAM_END)
+        return operation
+
+    operation = _write_atomic(filename, write)
+    if indexed:
+        nc_index.record_program(filename, request.mode, request.project_name, cache_key(request),
+                                counter.lines, tracker.box)
+    return GenerationResult(filename, tuple(stock), tuple(operation))
+
+
+# --- Programmes multi-opérations ------------------------------------------
+
+@dataclass
+class GenerationJob:
+    """Programme composé de plusieurs opérations, usinées dans l'ordre de la liste."""
+    operations: list = field(default_factory=list)  # GenerationRequest
+    project_name: str = "test"
+    machine: str = "CNC_450x800"
+    units: str = "mm"
+
+
+@dataclass
+class JobResult:
+    filename: str
+    stock: tuple        # (stock_x, stock_y, stock_z) écrit dans l'entête
+    bounds: tuple       # encombrement ((min), (max)) de l'ensemble des trajectoires
+    operations: list    # [(coordonnées, encombrement)] par opération
+
+
+def job_from_dict(data):
+    """Construit un GenerationJob depuis un dictionnaire (fichier JSON de travail).
+
+    {"project_name": ..., "machine": ..., "units": "mm", "percent": 50,
+     "operations": [{"mode": "1", "params": {...}, "percent": 40}, ...]}
+    Le mode d'une opération est son identifiant ("1" à "6") ou son nom de section.
+    """
+    units = data.get("units", "mm")
+    operations = []
+    for index, op in enumerate(data.get("operations", []), start=1):
+        try:
+            spec = mode_registry.get_mode(op.get("mode", ""))
+        except ValueError:
+            raise ValueError(f"Opération {index} : mode inconnu : {op.get('mode')}")
+        operations.append(GenerationRequest(
+            mode=spec.mode_id,
+            params=dict(op.get("params", {})),
+            units=units,
+            percent=parse_percent(op.get("percent", data.get("percent", DEFAULT_PERCENT))),
+        ))
+    if not operations:
+        raise ValueError("Le travail ne contient aucune opération.")
+    return GenerationJob(operations, data.get("project_name", "test"), data.get("machine", "CNC_450x800"), units)
+
+
+def job_stock(job, box):
+    """Brut englobant : étendue des trajectoires (centre outil) + diamètre de fraise en X/Y.
+
+    Sans diamètre dans les paramètres, celui par défaut du mode (mode_registry) est utilisé.
+    """
+    if box is None:
+        return 0, 0, 0
+    tool = max(float(r.params.get("tool_diameter", r.spec.defaults().get("tool_diameter", 0.0)))
+               for r in job.operations)
+    spans = [high - low if high == high and low == low else 0.0 for low, high in zip(*box)]
+    return spans[0] + tool, spans[1] + tool, spans[2]
+
+
+def write_job(job, sink, hooks=None, cache=None):
+    """Écrit un programme multi-opérations dans `sink` ; retourne (stock, encombrement, opérations).
+
+    L'entête dépend de l'encombrement de toutes les trajectoires : les corps des
+    opérations sont d'abord écrits en flux dans un fichier temporaire (mémoire
+    bornée), puis recopiés après l'entête.
+    """
+    union = BoundsTracker()
+    results = []
+    with tempfile.TemporaryFile("w+") as body:
+        for request in job.operations:
+            config = request.to_config()
+            emit = request.spec.load_generator()
+            tracker = BoundsTracker()
+            operation = _write_body(request, config, emit, body, hooks, cache, tracker)
+            union.merge(tracker.box)
+            results.append((tuple(operation), tracker.box))
+        stock = job_stock(job, union.box)
+        sink.write(main_tkinter.generate_header(job.project_name, job.machine, *stock, job.units))
+        body.seek(0)
+        shutil.copyfileobj(body, sink, 1 << 20)
+        sink.write(PROGRAM_END)
+    return stock, union.box, results
+
+
+def generate_job(job, filename=None, output_dir="NC", hooks=None, cache=None):
+    """Génère un programme multi-opérations dans un fichier .nc et retourne un JobResult.
+
+    Comme generate_program, un programme écrit sous son nom par défaut est indexé (nc_index).
+    """
+    indexed = filename is None
+    modes = "-".join(r.mode for r in job.operations)
+    if indexed:
+        filename = default_filename(GenerationRequest(modes, project_name=job.project_name), output_dir)
+    counter = None
+
+    def write(file):
+        nonlocal counter
+        counter = _LineCounter(file)
+        return write_job(job, counter, hooks, cache)
+
+    stock, box, results = _write_atomic(filename, write)
+    if indexed:
+        params_hash = hashlib.sha256("|".join(cache_key(r) for r in job.operations).encode("utf-8")).hexdigest()
+        nc_index.record_program(filename, modes, job.project_name, params_hash, counter.lines, box)
+    return JobResult(filename, tuple(stock), box, results)
@@ -0,0 +1,249 @@
+# mode_registry.py
+"""Registre des modes de génération.
+
+Chaque mode (surfaçage, perçages, filetage...) est décrit une seule fois par un
+`ModeSpec` : identifiant historique ("1" à "6"), section de config.json,
+paramètres du formulaire avec leurs valeurs par défaut, générateur, calcul du
+brut et règle de choix de l'image d'aperçu. L'interface, la ligne de commande,
+`generation.py` et `calculate_stock_dimensions` consultent ce registre au lieu
+de dupliquer des cascades de if/elif sur l'identifiant du mode.
+
+Le générateur est référencé par son nom ("module:fonction") et n'est importé
+qu'au premier appel de `load_generator()` : ce module n'importe ni NumPy ni
+main_tkinter, et enregistrer un nouveau mode (labyrinthe, gravure...) ne coûte
+rien au démarrage.
+"""
+import importlib
+from dataclasses import dataclass
+from typing import Callable
+
+# Mappage des identifiants fixes (identique à GUI.py pour cohérence)
+path_type_map = {
+    "conventional": {"fr": "Opposition", "en": "Conventional", "de": "Gegenlauffräsen", "es": "Convencional", "index": 1, "code": "1"},
+    "climb": {"fr": "Avalant", "en": "Climb", "de": "Gleichlauffräsen", "es": "Ascendente", "index": 2, "code": "2"},
+    "alternate": {"fr": "Alterné", "en": "Alternate", "de": "Abwechselnd", "es": "Alternado", "index": 3, "code": "3"},
+    "right": {"fr": "Droite", "en": "Right", "de": "Rechts", "es": "Derecha", "index": 1, "code": "G02"},
+    "left": {"fr": "Gauche", "en": "Left", "de": "Links", "es": "Izquierda", "index": 2, "code": "G03"}
+}
+
+drilling_type_map = {
+    "contour": {"fr": "Trou traversant", "en": "Contour", "de": "Durchgangsloch", "es": "Agujero pasante", "index": 1},
+    "blind": {"fr": "Trou borgne", "en": "Blind", "de": "Blindloch", "es": "Agujero ciego", "index": 2},
+    "outer": {"fr": "Diamètre extérieur", "en": "Outer", "de": "Außendurchmesser", "es": "Diámetro exterior", "index": 3}
+}
+
+corner_type_map = {
+    "front_left": {"fr": "Avant Gauche (AVG)", "en": "Front Left (FL)", "de": "Vorne Links", "es": "Delantero Izquierdo", "index": 1},
+    "front_right": {"fr": "Avant Droit (AVD)", "en": "Front Right (FR)", "de": "Vorne Rechts", "es": "Delantero Derecho", "index": 2},
+    "rear_right": {"fr": "Arrière Droit (ARD)", "en": "Rear Right (RR)", "de": "Hinten Rechts", "es": "Trasero Derecho", "index": 3},
+    "rear_left": {"fr": "Arrière Gauche (ARG)", "en": "Rear Left (RL)", "de": "Hinten Links", "es": "Trasero Izquierdo", "index": 4}
+}
+
+thread_type_map = {
+    "nut_internal": {"fr": "Ecrou (Interne)", "en": "Nut (Internal)", "de": "Mutter (Innen)", "es": "Tuerca (Interna)", "index": 1},
+    "screw_external": {"fr": "Vis (Externe)", "en": "Screw (External)", "de": "Schraube (Außen)", "es": "Tornillo (Externa)", "index": 2}
+}
+
+
+@dataclass(frozen=True)
+class ModeSpec:
+    mode_id: str            # identifiant historique (`last_operation` dans config.json)
+    section: str            # section de config.json et nom du générateur
+    label: str              # libellé affiché par main()
+    acronym: str            # préfixe du nom de projet dans l'interface
+    generator: str          # "module:fonction" du générateur emit_<mode>, importé au premier appel
+    schema: tuple           # ((clé, valeur par défaut), ...) dans l'ordre du formulaire
+    stock: Callable         # paramètres -> (stock_x, stock_y, stock_z)
+    image: Callable         # paramètres -> suffixe du nom d'image ("10" pour images/mode110.png)
+    path_types: tuple = ()  # sens d'usinage proposés, le premier est la valeur de repli
+
+    def defaults(self):
+        return dict(self.schema)
+
+    def load_generator(self):
+        """Importe (une seule fois) et retourne le générateur `emit_<mode>(config, tp, ctx)`."""
+        if self.generator not in _generators:
+            module, _, name = self.generator.partition(":")
+            _generators[self.generator] = getattr(importlib.import_module(module), name)
+        return _generators[self.generator]
+
+    def image_filename(self, params):
+        return f"images/mode{self.mode_id}{self.image(params)}.png"
+
+
+_modes = {}
+_generators = {}
+
+
+def register(spec):
+    """Ajoute un mode au registre (l'identifiant et la section doivent être uniques)."""
+    for other in _modes.values():
+        if spec.mode_id == other.mode_id or spec.section == other.section:
+            raise ValueError(f"Mode déjà enregistré : {spec.mode_id} ({spec.section})")
+    _modes[spec.mode_id] = spec
+    return spec
+
+
+def get_mode(value):
+    """Retourne le ModeSpec d'un identifiant ("1") ou d'un nom de section ("surfacing")."""
+    value = str(value)
+    if value in _modes:
+        return _modes[value]
+    for spec in _modes.values():
+        if spec.section == value:
+            return spec
+    raise ValueError(f"Mode inconnu : {value}")
+
+
+def all_modes():
+    """Modes enregistrés, dans l'ordre de leur enregistrement."""
+    return list(_modes.values())
+
+
+def _index(mapping, value, fallback):
+    return mapping.get(value, mapping[fallback]).get("index", 1)
+
+
+# --- Calcul du brut (anciennes branches de calculate_stock_dimensions) -------
+
+def _surfacing_stock(p):
+    tool_diameter = p.get("tool_diameter", 10.0)
+    stock_x = p.get("width_x", 100.0) + tool_diameter
+    stock_y = p.get("length_y", 100.0) + tool_diameter
+    return stock_x, stock_y, p.get("total_depth", 1.0) + p.get("clearance_height", 5.0)
+
+
+def _contour_drilling_stock(p):
+    hole_diameter = p.get("hole_diameter", 30.0)
+    tool_diameter = p.get("tool_diameter", 10.0)
+    if p.get("drilling_type", "contour") == "outer":
+        # Usinage extérieur : chemin à hole_radius + tool_radius
+        stock_x = stock_y = hole_diameter + 2 * tool_diameter
+    else:
+        # Blind ou Contour : usinage intérieur
+        stock_x = stock_y = hole_diameter + tool_diameter
+    return stock_x, stock_y, p.get("total_depth", 2.0) + p.get("clearance_height", 5.0)
+
+
+def _matrix_drilling_stock(p):
+    num_cols = int(float(p.get("num_cols", 1)))
+    num_rows = int(float(p.get("num_rows", 1)))
+    stock_x = (num_cols - 1) * float(p.get("spacing_x", 10.0)) if num_cols > 1 else 10.0  # Valeur minimale si un seul trou
+    stock_y = (num_rows - 1) * float(p.get("spacing_y", 10.0)) if num_rows > 1 else 10.0  # Valeur minimale si un seul trou
+    return stock_x, stock_y, float(p.get("total_depth", 2.0)) + float(p.get("clearance_height", 5.0))
+
+
+def _corner_radius_stock(p):
+    arc_radius = p.get("radius", 10.0) + p.get("tool_diameter", 10.0) / 2
+    return 2 * arc_radius, 2 * arc_radius, p.get("total_depth", 2.0) + p.get("clearance_height", 5.0)
+
+
+def _oblong_hole_stock(p):
+    tool_diameter = p.get("tool_diameter", 5.0)
+    stock_x = p.get("length_x", 20.0) + tool_diameter
+    stock_y = p.get("length_y", 20.0) + tool_diameter
+    return stock_x, stock_y, p.get("total_depth", 2.0) + p.get("clearance_height", 5.0)
+
+
+def _threading_stock(p):
+    stock_x = stock_y = p.get("hole_diameter", 30.0) + p.get("tool_diameter", 10.0)
+    return stock_x, stock_y, p.get("total_depth", 2.0) + p.get("clearance_height", 5.0)
+
+
+# --- Images d'aperçu (ModeSpec.image) -------------------------------------------
+
+def _surfacing_image(p):
+    return f"{_index(path_type_map, p.get('path_type'), 'conventional')}0"
+
+
+def _contour_drilling_image(p):
+    return (f"{_index(path_type_map, p.get('path_type'), 'conventional')}"
+            f"{_index(drilling_type_map, p.get('drilling_type'), 'contour')}")
+
+
+def _corner_radius_image(p):
+    return (f"{_index(corner_type_map, p.get('corner_type'), 'front_left')}"
+            f"{_index(path_type_map, p.get('path_type'), 'conventional')}")
+
+
+def _oblong_hole_image(p):
+    path_type = p.get("path_type")
+    if path_type not in ("conventional", "climb"):
+        return "14"
+    path_index = _index(path_type_map, path_type, "conventional")
+    try:
+        x_coord = float(p.get("length_x") or 0)
+        y_coord = float(p.get("length_y") or 0)
+    except (TypeError, ValueError):
+        x_coord = y_coord = 0
+    if x_coord == 0 and y_coord == 0:
+        return f"{path_index}3"
+    if x_coord == 0:
+        return f"{path_index}1"
+    if y_coord == 0:
+        return f"{path_index}2"
+    return f"{path_index}4"
+
+
+def _threading_image(p):
+    return (f"{_index(path_type_map, p.get('path_type'), 'right')}"
+            f"{_index(thread_type_map, p.get('thread_type'), 'nut_internal')}")
+
+
+register(ModeSpec(
+    "1", "surfacing", "Surfaçage", "SRC", "main_tkinter:emit_surfacing",
+    schema=(("start_x", 0.0), ("start_y", 0.0), ("start_z", 10.0), ("clearance_height", 5.0),
+            ("tool_diameter", 10.0), ("overlap_percent", 50.0), ("width_x", 100.0), ("length_y", 100.0),
+            ("total_depth", 1.0), ("depth_per_pass", 1.0), ("feed_rate", 1800), ("spindle_speed", 1000),
+            ("path_type", "conventional")),
+    stock=_surfacing_stock, image=_surfacing_image,
+    path_types=("conventional", "climb", "alternate"),
+))
+
+register(ModeSpec(
+    "2", "contour_drilling", "Perçages par détourage", "CDR", "main_tkinter:emit_contour_drilling",
+    schema=(("start_x", 0.0), ("start_y", 0.0), ("start_z", 0.0), ("clearance_height", 5.0),
+            ("tool_diameter", 10.0), ("hole_diameter", 30.0), ("total_depth", 2.0), ("depth_per_pass", 1.0),
+            ("feed_rate", 1800), ("spindle_speed", 24000), ("path_type", "conventional"),
+            ("drilling_type", "contour"), ("overlap_percent", 50.0)),
+    stock=_contour_drilling_stock, image=_contour_drilling_image,
+    path_types=("conventional", "climb"),
+))
+
+register(ModeSpec(
+    "3", "matrix_drilling", "Perçages verticaux (matrice)", "MTX", "main_tkinter:emit_matrix_drilling",
+    schema=(("start_x", 0.0), ("start_y", 0.0), ("start_z", 0.0), ("clearance_height", 5.0),
+            ("spacing_x", 20.0), ("spacing_y", 20.0), ("num_rows", 5), ("num_cols", 5),
+            ("total_depth", 10.0), ("depth_per_pass", 1.0), ("feed_rate", 1800), ("spindle_speed", 1000)),
+    stock=_matrix_drilling_stock, image=lambda p: "00",
+    path_types=("conventional", "climb"),
+))
+
+register(ModeSpec(
+    "4", "corner_radius", "Rayon sur 90°", "RDS", "main_tkinter:emit_corner_radius",
+    schema=(("start_z", 0.0), ("clearance_height", 5.0), ("radius", 10.0), ("tool_diameter", 10.0),
+            ("total_depth", 2.0), ("depth_per_pass", 0.5), ("feed_rate", 1800), ("spindle_speed", 24000),
+            ("path_type", "conventional"), ("corner_type", "front_left")),
+    stock=_corner_radius_stock, image=_corner_radius_image,
+    path_types=("conventional", "climb"),
+))
+
+register(ModeSpec(
+    "5", "oblong_hole", "Trou oblong", "OBL", "main_tkinter:emit_oblong_hole",
+    schema=(("start_x", 0.0), ("start_y", 0.0), ("start_z", 0.0), ("length_x", 20.0), ("length_y", 20.0),
+            ("width", 10.0), ("tool_diameter", 5.0), ("path_type", "conventional"), ("total_depth", 2.0),
+            ("depth_per_pass", 0.5), ("feed_rate", 1800), ("spindle_speed", 24000)),
+    stock=_oblong_hole_stock, image=_oblong_hole_image,
+    path_types=("conventional", "climb"),
+))
+
+register(ModeSpec(
+    "6", "threading", "Filetage", "THR", "main_tkinter:emit_threading",
+    schema=(("start_x", 0.0), ("start_y", 0.0), ("start_z", 0.0), ("clearance_height", 5.0),
+            ("tool_diameter", 10.0), ("hole_diameter", 30.0), ("total_depth", 2.0), ("depth_per_pass", 0.5),
+            ("feed_rate", 1800), ("spindle_speed", 24000), ("path_type", "right"),
+            ("thread_type", "nut_internal"), ("overlap_percent", 50.0), ("thread_pitch", 10.0),
+            ("thread_number", 6)),
+    stock=_threading_stock, image=_threading_image,
+    path_types=("right", "left"),
+))
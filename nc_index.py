@@ -0,0 +1,168 @@
+# nc_index.py
+"""Index SQLite des programmes générés dans un dossier NC.
+
+Chaque programme écrit sous son nom par défaut par generation.generate_program
+ou generate_job est enregistré dans `<dossier>/.nc_index.sqlite` : nom, mode,
+projet, empreinte des paramètres (gcode_cache.cache_key), taille, nombre de
+lignes, encombrement et date d'écriture. Les visualiseurs retrouvent le
+dernier programme par l'index sur la date (O(log n)) au lieu de lister et
+dater tous les fichiers du dossier.
+
+Les .nc absents de l'index (déjà présents à sa création, ou copiés à la main
+dans le dossier) y sont importés par rebuild() (mode et projet lus dans le
+nom, sans lignes ni encombrement), relancé à l'ouverture quand la date de
+modification du dossier a changé depuis le dernier parcours. Un programme
+supprimé est retiré de l'index quand une requête le rencontre.
+"""
+import glob
+import os
+import re
+import sqlite3
+import time
+
+INDEX_NAME = ".nc_index.sqlite"
+
+# Nom par défaut (generation.default_filename) : <mode>_<projet>_<AAAAMMJJ_HHMMSS>.nc
+_NAME_PATTERN = re.compile(r"^(?P<mode>[0-9-]+)_(?P<project>.*)_\d{8}_\d{6}\.nc$")
+
+_COLUMNS = ("name", "mode", "project", "params_hash", "size", "lines",
+            "x_min", "y_min", "z_min", "x_max", "y_max", "z_max", "created")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    name TEXT PRIMARY KEY,
+    mode TEXT,
+    project TEXT,
+    params_hash TEXT,
+    size INTEGER,
+    lines INTEGER,
+    x_min REAL, y_min REAL, z_min REAL,
+    x_max REAL, y_max REAL, z_max REAL,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS programs_created ON programs (created);
+CREATE INDEX IF NOT EXISTS programs_mode_project ON programs (mode, project, created);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# Une date de dossier plus récente que ce délai peut encore changer dans le même
+# tic d'horloge du système de fichiers (2 s en FAT) : elle n'est pas mémorisée
+RACY_NS = 2_000_000_000
+
+
+def _bound(value):
+    return None if value is None or value != value else float(value)  # NaN -> NULL
+
+
+class NcIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, INDEX_NAME)
+        self.db = sqlite3.connect(self.path, timeout=10)
+        # Journal conservé entre les transactions : écrire dans l'index ne change
+        # pas la date du dossier (sinon chaque ouverture relancerait rebuild)
+        self.db.execute("PRAGMA journal_mode = PERSIST")
+        self.db.executescript(_SCHEMA)
+        self.refresh()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, filename, mode, project, params_hash=None, lines=None, bounds=None, created=None):
+        """Enregistre (ou remplace) le programme `filename` de ce dossier."""
+        size = os.path.getsize(filename)
+        low, high = bounds if bounds is not None else ((None,) * 3, (None,) * 3)
+        row = (os.path.basename(filename), mode, project, params_hash, size, lines,
+               *map(_bound, low), *map(_bound, high), time.time() if created is None else created)
+        with self.db:
+            self.db.execute(f"INSERT OR REPLACE INTO programs VALUES ({', '.join('?' * len(_COLUMNS))})", row)
+
+    def _where(self, mode, project):
+        clauses, values = [], []
+        for column, value in (("mode", mode), ("project", project)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), values
+
+    def latest(self, mode=None, project=None):
+        """Chemin du dernier programme écrit (filtré par mode et projet), None s'il n'y en a pas."""
+        where, values = self._where(mode, project)
+        while True:
+            row = self.db.execute(f"SELECT name FROM programs{where} ORDER BY created DESC LIMIT 1", values).fetchone()
+            if row is None:
+                return None
+            path = os.path.join(self.directory, row[0])
+            if os.path.exists(path):
+                return path
+            with self.db:
+                self.db.execute("DELETE FROM programs WHERE name = ?", row)
+
+    def entries(self, mode=None, project=None, limit=None):
+        """Programmes indexés, du plus récent au plus ancien (dictionnaires des colonnes)."""
+        where, values = self._where(mode, project)
+        query = f"SELECT {', '.join(_COLUMNS)} FROM programs{where} ORDER BY created DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            values.append(int(limit))
+        return [dict(zip(_COLUMNS, row)) for row in self.db.execute(query, values)]
+
+    def refresh(self):
+        """Relance rebuild() si le dossier a changé depuis le dernier parcours ; retourne le nombre de .nc ajoutés."""
+        stamp = os.stat(self.directory).st_mtime_ns
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'directory_mtime'").fetchone()
+        if row is not None and row[0] == stamp:
+            return 0
+        added = self.rebuild()
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('directory_mtime', ?)",
+                            (stamp if time.time_ns() - stamp > RACY_NS else None,))
+        return added
+
+    def rebuild(self):
+        """Ajoute les .nc du dossier absents de l'index (parcours complet) ; retourne leur nombre."""
+        known = {row[0] for row in self.db.execute("SELECT name FROM programs")}
+        rows = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(".nc") or item.name in known or not item.is_file():
+                    continue
+                stat = item.stat()
+                match = _NAME_PATTERN.match(item.name)
+                mode, project = (match.group("mode"), match.group("project")) if match else (None, None)
+                rows.append((item.name, mode, project, None, stat.st_size, None,
+                             None, None, None, None, None, None, stat.st_mtime))
+        with self.db:
+            self.db.executemany(f"INSERT OR REPLACE INTO programs VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+        return len(rows)
+
+
+def record_program(filename, mode, project, params_hash=None, lines=None, bounds=None):
+    """Enregistre `filename` dans l'index de son dossier ; une erreur d'index n'interrompt pas la génération."""
+    try:
+        with NcIndex(os.path.dirname(os.path.abspath(filename))) as index:
+            index.record(filename, mode, project, params_hash, lines, bounds)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Débogage: Index NC non mis à jour pour {filename} : {e}")
+
+
+def latest_file(directory, mode=None, project=None):
+    """Dernier programme du dossier d'après l'index (parcours du dossier si l'index est inutilisable)."""
+    if not os.path.isdir(directory):
+        return None
+    try:
+        with NcIndex(directory) as index:
+            return index.latest(mode, project)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Débogage: Index NC indisponible ({e}), parcours du dossier")
+        files = glob.glob(os.path.join(directory, "*.nc"))
+        return max(files, key=os.path.getmtime) if files else None
@@ -0,0 +1,191 @@
+# parse_cache.py
+"""Cache disque des programmes analysés par gcode_parser.
+
+Rouvrir un programme déjà affiché ne relit ni n'analyse le texte : les
+mouvements (tableau PATH_DTYPE) sont relus depuis le cache en mémoire
+projetée (mmap), ce qui ne coûte que la lecture de l'entête du fichier. Les
+tableaux calculés ensuite pour le tracé (segments, types, mouvement source,
+temps machine cumulé, ligne source) sont aussi conservés : la réouverture ne
+refait ni le découpage des arcs ni le calcul des temps.
+
+Une entrée par fichier source, nommée par le SHA-256 de son chemin absolu :
+`<clé>.npy` (mouvements), `<clé>.<tableau>.npy` (tableaux du tracé) et
+`<clé>.json` (taille, date de modification et SHA-256 du contenu du fichier
+source, nombre de mouvements, encombrement ; réglages et encombrement des
+segments).
+L'entrée est valide si la taille et la date correspondent ; si seule la date
+a changé (copie, sauvegarde identique), l'empreinte du contenu est recalculée
+et comparée. Comme pour gcode_cache, les entrées les moins récemment utilisées
+sont évincées dès que la taille totale dépasse `max_bytes` (la date de
+modification sert de date d'accès).
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import gcode_parser
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "parsed")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Tableaux du tracé (gcode_loader), valables pour une tolérance de corde et une vitesse de rapide
+DERIVED = ("segments", "kinds", "source", "times", "lines")
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 du contenu d'un fichier, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def moves_bounds(moves):
+    """Encombrement ((min x, y, z), (max x, y, z)) des mouvements, None s'il n'y en a pas."""
+    if not len(moves):
+        return None
+    low, high = [], []
+    for start, stop in (("x0", "x"), ("y0", "y"), ("z0", "z")):
+        low.append(float(min(moves[start].min(), moves[stop].min())))
+        high.append(float(max(moves[start].max(), moves[stop].max())))
+    return tuple(low), tuple(high)
+
+
+def segment_bounds(segs):
+    """Encombrement des segments (n, 2, 3) du tracé, None s'il n'y en a pas."""
+    if not len(segs):
+        return None
+    return tuple(segs.min(axis=(0, 1)).tolist()), tuple(segs.max(axis=(0, 1)).tolist())
+
+
+class ParseCache:
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def paths(self, source):
+        key = hashlib.sha256(os.path.abspath(source).encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".npy", base + ".json"
+
+    def _derived_path(self, source, name):
+        return self.paths(source)[0][:-4] + f".{name}.npy"
+
+    def lookup(self, source):
+        """Retourne (mouvements en mmap, métadonnées) si l'entrée de `source` est valide, sinon None."""
+        data_path, meta_path = self.paths(source)
+        try:
+            stat = os.stat(source)
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["size"] != stat.st_size:
+                return None
+            if meta["mtime_ns"] != stat.st_mtime_ns:
+                if file_digest(source) != meta["sha256"]:
+                    return None
+                meta["mtime_ns"] = stat.st_mtime_ns
+                self._write_meta(meta_path, meta)
+            moves = np.load(data_path, mmap_mode="r")
+            if moves.dtype != gcode_parser.PATH_DTYPE or len(moves) != meta["moves"]:
+                return None
+            os.utime(data_path)
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        for name in ("bounds", "segment_bounds"):
+            if meta.get(name) is not None:
+                meta[name] = (tuple(meta[name][0]), tuple(meta[name][1]))
+        return moves, meta
+
+    def store(self, source, moves, stat, digest):
+        """Enregistre les mouvements de `source` (`stat` et `digest` pris avant la lecture)."""
+        data_path, meta_path = self.paths(source)
+        meta = {
+            "source": os.path.abspath(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "moves": len(moves),
+            "bounds": moves_bounds(moves),
+        }
+        with open(data_path + ".part", "wb") as f:
+            np.save(f, moves)
+        os.replace(data_path + ".part", data_path)
+        # Les métadonnées sont écrites en dernier : une entrée sans .json est ignorée
+        self._write_meta(meta_path, meta)
+        self.evict()
+        return meta
+
+    def derived(self, source, meta, chord_error, rapid_feed=gcode_parser.RAPID_FEED):
+        """Tableaux du tracé de `source` (dict de DERIVED, en mmap) s'ils ont été calculés avec ces réglages."""
+        if meta.get("derived") != {"chord_error": chord_error, "rapid_feed": rapid_feed}:
+            return None
+        try:
+            arrays = {name: np.load(self._derived_path(source, name), mmap_mode="r") for name in DERIVED}
+        except (OSError, ValueError):
+            return None
+        if len({len(array) for array in arrays.values()}) != 1:
+            return None
+        return arrays
+
+    def store_derived(self, source, meta, arrays, chord_error, rapid_feed=gcode_parser.RAPID_FEED):
+        """Ajoute à l'entrée de `source` (métadonnées `meta`) les tableaux du tracé."""
+        for name in DERIVED:
+            path = self._derived_path(source, name)
+            with open(path + ".part", "wb") as f:
+                np.save(f, arrays[name])
+            os.replace(path + ".part", path)
+        meta["derived"] = {"chord_error": chord_error, "rapid_feed": rapid_feed}
+        meta["segment_bounds"] = segment_bounds(arrays["segments"])
+        self._write_meta(self.paths(source)[1], meta)
+        self.evict()
+        return meta
+
+    def _write_meta(self, meta_path, meta):
+        with open(meta_path + ".part", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".part", meta_path)
+
+    def load(self, source):
+        """Mouvements et métadonnées de `source`, depuis le cache ou analysés (puis mis en cache)."""
+        hit = self.lookup(source)
+        if hit is not None:
+            return hit
+        stat = os.stat(source)
+        digest = hashlib.sha256()
+        moves = gcode_parser.parse_file(source, digest=digest)
+        digest = digest.hexdigest()
+        try:
+            meta = self.store(source, moves, stat, digest)
+        except OSError as e:
+            print(f"Débogage: Mise en cache impossible pour {source} : {e}")
+            meta = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest,
+                    "moves": len(moves), "bounds": moves_bounds(moves)}
+        return moves, meta
+
+    def evict(self):
+        """Supprime les entrées les plus anciennes tant que le cache dépasse `max_bytes`."""
+        entries = {}
+        total = 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(".npy") and item.is_file():
+                    stat = item.stat()
+                    key = item.name.split(".", 1)[0]
+                    mtime, size = entries.get(key, (0, 0))
+                    entries[key] = (max(mtime, stat.st_mtime), size + stat.st_size)
+                    total += stat.st_size
+        for key, (_, size) in sorted(entries.items(), key=lambda item: item[1]):
+            if total <= self.max_bytes:
+                break
+            base = os.path.join(self.directory, key)
+            paths = [base + ".json", base + ".npy"] + [f"{base}.{name}.npy" for name in DERIVED]
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
@@ -0,0 +1,97 @@
+# bench_gcode_parser.py
+"""Mesure le débit de gcode_parser (lignes par seconde).
+
+    python scripts/bench_gcode_parser.py --lines 2000000 --workers 16
+
+Le programme de test est un surfaçage généré par main_tkinter (mouvements
+G00/G01), complété d'arcs G02/G03 pour couvrir les deux familles de lignes.
+L'ancien analyseur des visualiseurs (expressions régulières ligne à ligne)
+est mesuré sur un extrait pour comparaison.
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import gcode_parallel
+import gcode_parser
+from gcode_stream import GenerationContext, stream_gcode
+
+
+def make_program(lines):
+    """Programme d'environ `lines` lignes (surfaçage + arcs)."""
+    import main_tkinter
+
+    # ~ 4 lignes par passe de surfaçage de 1 mm de large
+    width = max(lines // 8, 10)
+    config = {"surfacing": {"width_x": 100.0, "length_y": float(width), "tool_diameter": 2.0, "overlap_percent": 50.0}}
+    sink = io.StringIO()
+    stream_gcode(main_tkinter.emit_surfacing, config, GenerationContext(sink=sink))
+    arcs = "G02 X10.000 Y0.000 I5.000 J0.000 Z-1.000\nG03 X0.000 Y0.000 I-5.000 J0.000 Z-1.000\n"
+    body = sink.getvalue()
+    count = body.count("\n")
+    return body + arcs * max((lines - count) // 2, 0)
+
+
+def legacy_parse(gcode):
+    """Ancienne boucle des visualiseurs (pour comparaison)."""
+    moves = 0
+    for line in gcode.split('\n'):
+        line = line.strip()
+        if not line or line.startswith(';') or line.startswith('('):
+            continue
+        coord_dict = dict(re.findall(r'([XYZEIJ])([-+]?\d*\.?\d+)', line))
+        for k in coord_dict:
+            coord_dict[k] = float(coord_dict[k])
+        if re.search(r'G(\d+)', line):
+            moves += 1
+    return moves
+
+
+def bench(label, func, data, lines, repeat):
+    best = min(_timed(func, data) for _ in range(repeat))
+    print(f"{label:<28} {lines:>10} lignes  {best:8.3f} s  {lines / best / 1e6:7.2f} M lignes/s")
+
+
+def _timed(func, data):
+    start = time.perf_counter()
+    func(data)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processus de l'analyse parallèle (gcode_parallel)")
+    args = parser.parse_args(argv)
+
+    text = make_program(args.lines)
+    data = text.encode("utf-8")
+    lines = data.count(b"\n")
+    print(f"Programme : {lines} lignes, {len(data) / 1e6:.1f} Mo")
+    bench("tokenize", lambda d: [gcode_parser.tokenize(c) for c in gcode_parser.iter_chunks(d)], data, lines, args.repeat)
+    bench("parse_gcode", gcode_parser.parse_gcode, data, lines, args.repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.nc")
+        with open(path, "wb") as f:
+            f.write(data)
+        bench(f"parallèle ({args.workers} processus)",
+              lambda p: gcode_parallel.parse_file(p, workers=args.workers, min_bytes=0), path, lines, args.repeat)
+    moves = gcode_parser.parse_gcode(data)
+    bench("segments (écart de corde)", lambda m: gcode_parser.segments(m, chord_error=gcode_parser.CHORD_ERROR),
+          moves, lines, args.repeat)
+    sample = text[:len(text) // 20]
+    bench("ancien analyseur (5 %)", legacy_parse, sample, sample.count("\n"), 1)
+
+
+if __name__ == "__main__":
+    main()
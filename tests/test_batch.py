@@ -0,0 +1,36 @@
+# Tests de la génération en lot (gcode_batch.py)
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import gcode_batch
+
+
+def test_batch_runs_jobs_in_parallel_and_reports(tmp_path):
+    manifest = tmp_path / "jobs.json"
+    manifest.write_text(json.dumps({
+        "defaults": {"params": {"feed_rate": 400}},
+        "jobs": [
+            {"mode": "threading", "output": "a.nc", "params": {"hole_diameter": 30, "tool_diameter": 10}},
+            {"mode": "2", "output": "b.nc", "hole_diameter": 5, "tool_diameter": 6},
+            {"mode": "oblong_hole"},
+        ],
+    }))
+    jobs = gcode_batch.load_manifest(str(manifest))
+    results = gcode_batch.run_batch(jobs, workers=2, output_dir=str(tmp_path))
+
+    assert [r["status"] for r in results] == ["ok", "erreur", "ok"]
+    assert "ValueError" in results[1]["error"]
+    assert results[2]["output"].endswith("0003_oblong_hole.nc")
+    for r in (results[0], results[2]):
+        text = open(r["output"]).read()
+        assert r["lines"] == text.count("\n")
+        assert r["bytes"] == os.path.getsize(r["output"])
+
+    report = tmp_path / "report.csv"
+    gcode_batch.write_report(results, str(report))
+    assert report.read_text().splitlines()[0] == ",".join(gcode_batch.REPORT_FIELDS)
@@ -0,0 +1,77 @@
+# Tests du cache disque des programmes générés (gcode_cache.py)
+import io
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import generation
+from gcode_cache import GcodeCache, cache_key
+
+
+def _body(text):
+    # Sans les 3 premières lignes de l'entête (dont l'horodatage)
+    return text.split("\n", 3)[3]
+
+
+def test_second_generation_is_served_from_cache(tmp_path):
+    cache = GcodeCache(str(tmp_path / "cache"))
+    request = generation.GenerationRequest("6", {"hole_diameter": 30, "tool_diameter": 10})
+    events = []
+    hook = lambda event, info: events.append(event)
+
+    first, second = io.StringIO(), io.StringIO()
+    stock1, op1 = generation.write_program(request, first, hooks=[hook], cache=cache)
+    stock2, op2 = generation.write_program(request, second, hooks=[hook], cache=cache)
+
+    assert events.count("cache_hit") == 1
+    assert _body(first.getvalue()) == _body(second.getvalue())
+    assert op1 == op2
+
+
+def test_key_depends_on_settings_not_on_header():
+    base = generation.GenerationRequest("1", {"width_x": 40}, project_name="a")
+    renamed = generation.GenerationRequest("1", {"width_x": 40}, project_name="b")
+    slower = generation.GenerationRequest("1", {"width_x": 40}, percent=25)
+    legacy_label = generation.GenerationRequest("1", {"width_x": 40, "path_type": "Opposition"})
+    fixed_id = generation.GenerationRequest("1", {"width_x": 40, "path_type": "conventional"})
+    assert cache_key(base) == cache_key(renamed)
+    assert cache_key(base) != cache_key(slower)
+    assert cache_key(legacy_label) == cache_key(fixed_id)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = GcodeCache(str(tmp_path / "cache"), max_bytes=25)
+    for age, key in enumerate(("b", "a")):
+        entry = cache.entry(key)
+        entry.write("G00 X1.000\n")
+        entry.commit((0, 0, 0, 0, 0, 0, 5))
+        os.utime(cache.paths(key)[0], (1000 + age, 1000 + age))
+    entry = cache.entry("c")
+    entry.write("G00 X2.000\n")
+    entry.commit((0, 0, 0, 0, 0, 0, 5))
+    assert cache.lookup("b") is None
+    for key in ("a", "c"):
+        hit = cache.lookup(key)
+        assert hit is not None
+        hit[0].close()
+
+
+def test_looked_up_body_survives_concurrent_eviction(tmp_path):
+    cache = GcodeCache(str(tmp_path / "cache"), max_bytes=0)
+    entry = cache.entry("a")
+    entry.write("G00 X1.000\n")
+    cache.max_bytes = 1 << 20
+    entry.commit((0, 0, 0, 0, 0, 0, 5))
+    abandoned = os.path.join(cache.directory, "crash.part")
+    open(abandoned, "w").close()
+    os.utime(abandoned, (0, 0))
+    body, operation, bounds = cache.lookup("a")
+    cache.max_bytes = 0
+    cache.evict()    # autre processus du lot
+    sink = io.StringIO()
+    cache.copy_body(body, sink)
+    assert sink.getvalue() == "G00 X1.000\n"
+    assert not os.path.exists(abandoned)
@@ -0,0 +1,46 @@
+# Tests de la ligne de commande sans interface graphique (gcode_generator.py)
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import gcode_generator
+
+
+def test_generate_writes_complete_program(tmp_path):
+    output = tmp_path / "NC" / "out.nc"
+    code = gcode_generator.main(["generate", "--mode", "surfacing", "--param", "width_x=40",
+                                 "--param", "length_y=20", "--percent", "50", "-o", str(output)])
+    assert code == 0
+    text = output.read_text()
+    assert text.startswith("; NC file from Picture_CNC")
+    assert "; Surfacing operation" in text
+    assert text.endswith("G90\nM5\nM30\n")
+    assert not os.path.exists(str(output) + ".part")
+
+
+def test_invalid_parameters_exit_non_zero(tmp_path):
+    output = tmp_path / "bad.nc"
+    code = gcode_generator.main(["generate", "--mode", "threading", "--param", "tool_diameter=50", "-o", str(output)])
+    assert code == 1
+    assert not output.exists()
+
+
+def test_cli_does_not_import_gui_modules(tmp_path):
+    script = (
+        "import sys, gcode_generator\n"
+        f"code = gcode_generator.main(['generate', '--mode', 'oblong_hole', '-o', {str(tmp_path / 'o.nc')!r}])\n"
+        "assert code == 0\n"
+        "assert 'tkinter' not in sys.modules and 'matplotlib' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True, capture_output=True)
+
+
+def test_invalid_parameters_write_nothing_to_stdout():
+    result = subprocess.run([sys.executable, "gcode_generator.py", "generate", "--mode", "surfacing",
+                             "--param", "tool_diameter=-3", "-o", "-"], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert result.stdout == ""
@@ -0,0 +1,60 @@
+# Tests du chargement en arrière-plan (gcode_loader.py)
+import os
+import sys
+import threading
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import gcode_parser
+from gcode_loader import LoadJob
+from parse_cache import ParseCache
+
+
+def test_background_load_and_cache(tmp_path):
+    source = tmp_path / "piece.nc"
+    source.write_bytes(b"(entete [10.000, 20.000, 5.000])\r\nG0 X1 Y2\r\nG2 X3 Y2 I1 J0\r\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    job = LoadJob(str(source), cache=cache).start()
+    job._thread.join()
+    assert job.error is None and job.fraction == 1.0
+    assert job.result.header.startswith("(entete [10.000, 20.000, 5.000])\nG0")
+    assert job.result.moves["kind"].tolist() == [gcode_parser.RAPID, gcode_parser.ARC_CW]
+    assert len(job.result.segments) == len(job.result.kinds) > 2
+    assert cache.lookup(str(source)) is not None
+
+    # Réouverture : segments et temps relus du cache (mmap), sans nouveau découpage
+    reopened = LoadJob(str(source), cache=cache).run().result
+    assert isinstance(reopened.segments, np.memmap)
+    assert reopened.segments.tobytes() == job.result.segments.tobytes()
+    assert reopened.times.tolist() == job.result.times.tolist()
+    assert reopened.lines.tolist() == job.result.lines.tolist()
+    moves, meta = cache.lookup(str(source))
+    assert meta["segment_bounds"][1][0] == 3.0
+    assert cache.derived(str(source), meta, chord_error=0.5) is None
+
+
+def test_cancelled_parse_stops_between_chunks(tmp_path):
+    progress = []
+    cancel = threading.Event()
+
+    def on_progress(done, total):
+        progress.append(done)
+        cancel.set()
+
+    try:
+        gcode_parser.parse_gcode("G1 X1\n" * 1000, chunk_bytes=600, progress=on_progress, cancel=cancel)
+    except gcode_parser.ParseCancelled:
+        pass
+    else:
+        raise AssertionError("ParseCancelled attendu")
+    assert len(progress) == 1
+
+    source = tmp_path / "piece.nc"
+    source.write_text("G1 X1\n")
+    job = LoadJob(str(source))
+    job.cancel()
+    assert job.run().cancelled and job.result is None
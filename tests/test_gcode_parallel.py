@@ -0,0 +1,52 @@
+# Tests de l'analyse multiprocessus (gcode_parallel.py)
+import os
+import sys
+import threading
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import gcode_parallel
+import gcode_parser
+
+
+def _parse_both(tmp_path, program, range_bytes):
+    path = tmp_path / "programme.nc"
+    path.write_text(program)
+    parallel = gcode_parallel.parse_file(str(path), workers=2, range_bytes=range_bytes, chunk_bytes=40, min_bytes=0)
+    return gcode_parser.parse_gcode(program), parallel
+
+
+def test_modal_state_carried_across_ranges(tmp_path):
+    # Mouvement, avance et broche modaux, lignes d'arc sans X/Y/Z et position
+    # absolue héritée de la plage précédente
+    block = "G1 X1 Y2 F300 S8000\nX3\nI1 J0\nG2 I-1 J0\nX4 Y5 Z-1\n(commentaire G0)\nY6\n"
+    expected, parallel = _parse_both(tmp_path, "Y9\n" + block * 40, range_bytes=23)
+    assert expected.tobytes() == parallel.tobytes()
+    assert len(parallel) == 40 * 5
+
+
+def test_relative_sections_are_reparsed(tmp_path):
+    block = "G90 G0 X10 Y10\nG91\nG1 X1 F100\nY-1\nX1 Y1\n" + "X0.5\n" * 10 + "G90\nZ2\n"
+    expected, parallel = _parse_both(tmp_path, "G91 X1\n" + block * 30, range_bytes=31)
+    assert len(expected) == len(parallel)
+    for name in expected.dtype.names:
+        # Le cumul des déplacements relatifs dépend du découpage (arrondis)
+        assert np.allclose(expected[name], parallel[name], rtol=0, atol=1e-9, equal_nan=True)
+
+
+def test_parse_from_loader_thread_does_not_fork(tmp_path):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(gcode_parallel.process_context().get_start_method()))
+    thread.start()
+    thread.join()
+    assert results != ["fork"]
+    # Analyse depuis un thread, comme LoadJob : processus démarrés sans fork
+    thread = threading.Thread(target=lambda: results.append(_parse_both(tmp_path, "G1 X1 Y2 F300\nX3\n" * 50, 64)))
+    thread.start()
+    thread.join()
+    expected, parallel = results[-1]
+    assert expected.tobytes() == parallel.tobytes()
@@ -0,0 +1,89 @@
+# Tests de l'analyseur G-code commun aux visualiseurs (gcode_parser.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import gcode_parser
+from toolpath import ARC_CW, LINEAR, RAPID, Toolpath
+
+PROGRAM = (
+    "(entete X99 Y99)\n"
+    "G90 G0 X1 Y2 Z5 S1000\n"
+    "G1 Z-1 F150 ; X77\n"
+    "X10\n"
+    "g2 x10 y0 i0 j-5\n"
+    "G91\n"
+    "G0 Z3\n"
+    "G0 S1000 F400\n"
+)
+
+
+def test_modal_state_and_comments():
+    moves = gcode_parser.parse_gcode(PROGRAM)
+    assert moves["kind"].tolist() == [RAPID, LINEAR, LINEAR, ARC_CW, RAPID]
+    assert moves["line"].tolist() == [1, 2, 3, 4, 6]
+    assert moves[["x", "y", "z"]].tolist() == [(1, 2, 5), (1, 2, -1), (10, 2, -1), (10, 0, -1), (10, 0, 2)]
+    assert moves[["x0", "y0", "z0"]][3].tolist() == (10, 2, -1)
+    assert moves["f"][2] == 150 and moves["s"][4] == 1000
+    assert np.isnan(moves["f"][0])
+
+
+def test_non_motion_codes_with_axis_words_are_not_moves():
+    program = "G1 X5 Y5 F100\nG92 X0 Y0\nG04 X2.5\nG28 X0\nG91\nG92 Z0\nX1\n"
+    moves = gcode_parser.parse_gcode(program)
+    assert moves["line"].tolist() == [0, 6]
+    assert moves[["x0", "y0", "x", "y"]].tolist() == [(0, 0, 5, 5), (5, 5, 6, 5)]
+
+
+def test_chunked_parse_matches_whole_file():
+    tp = Toolpath()
+    for k in range(200):
+        tp.rapid(x=k, y=-k)
+        tp.linear(z=-0.5 * k, f=100 + k)
+        tp.arc("G03" if k % 2 else "G02", x=k + 1, y=-k, i=0.5, j=0)
+    gcode = tp.to_gcode()
+    whole = gcode_parser.parse_gcode(gcode)
+    chunked = gcode_parser.parse_gcode(gcode.encode(), chunk_bytes=97)
+    assert len(whole) == 600
+    assert whole.tobytes() == chunked.tobytes()
+    segs, kinds, source = gcode_parser.segments(whole, arc_points=10)
+    assert segs.shape == (len(kinds), 2, 3) and source[-1] == len(whole) - 1
+    # Polyligne continue : chaque segment part de la fin du précédent
+    assert np.allclose(segs[1:, 0], segs[:-1, 1])
+
+
+def test_arc_segment_count_follows_chord_error():
+    start = [[100.0, 0.0, 0.0], [1.0, 0.0, 0.0]]
+    stop = [[100.0, 0.0, -5.0], [0.0, 1.0, 0.0]]
+    segs, counts = gcode_parser.tessellate_arcs(start, stop, [[0, 0], [0, 0]], [True, False], chord_error=0.01)
+    # Cercle complet de rayon 100 (hélice G02) contre quart de cercle de rayon 1
+    assert counts.tolist() == [223, 6]
+    mid = (segs[:, 0, :2] + segs[:, 1, :2]) / 2
+    radius = np.repeat([100.0, 1.0], counts)
+    assert np.all(radius - np.hypot(mid[:, 0], mid[:, 1]) <= 0.01)
+    assert segs[0, 0].tolist() == start[0] and segs[222, 1].tolist() == stop[0]
+    assert np.all(np.diff(segs[:223, 1, 2]) < 0)
+
+
+def test_parse_file_streams_from_mmap(tmp_path):
+    path = tmp_path / "programme.nc"
+    path.write_bytes(PROGRAM.encode() * 50)
+    moves = gcode_parser.parse_file(str(path), chunk_bytes=64)
+    assert moves.tobytes() == gcode_parser.parse_gcode(PROGRAM * 50).tobytes()
+    assert moves.flags.owndata and len(moves) == 250
+    empty = tmp_path / "vide.nc"
+    empty.write_bytes(b"")
+    assert len(gcode_parser.parse_file(str(empty))) == 0
+
+
+def test_stock_dimensions_from_generated_header():
+    import main_tkinter
+    header = main_tkinter.generate_header("p", "CNC", 100, 50, 25, "mm")
+    assert gcode_parser.stock_dimensions(header) == (100.0, 50.0, 25.0)
+    assert gcode_parser.stock_dimensions("(entete [10.000, 20.000, 5.000])") == (10.0, 20.0, 5.0)
+    assert gcode_parser.stock_dimensions("G0 X1 Y2\n") is None
@@ -0,0 +1,132 @@
+# Tests du tracé par collections (gcode_render.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import gcode_parser
+import gcode_render
+
+
+def test_one_collection_per_motion_class():
+    gcode = "G0 X1 Y1\nG1 Z-1\nG1 X5\nG2 X5 Y-3 I0 J-2\nG0 Z5\nX0 Y0\n"
+    segs, kinds, _ = gcode_parser.segments(gcode_parser.parse_gcode(gcode), arc_points=5)
+    collections = gcode_render.toolpath_collections(segs, kinds)
+    assert sorted(collections) == ["arc", "feed", "rapid"]
+    # Rapides : deux runs séparés par un NaN ; travail : un seul run contigu
+    rapid = collections["rapid"]._segments3d[0]
+    assert len(rapid) == 6 and np.isnan(rapid[2]).all()
+    assert collections["feed"]._segments3d[0].tolist() == [[1, 1, 0], [1, 1, -1], [5, 1, -1]]
+    assert len(collections["arc"]._segments3d[0]) == 5
+
+
+def test_animation_draws_only_new_segments():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    gcode = "G0 X1 Y1\nG1 Z-1\nG1 X5\nG1 Y3\nG0 Z5\n"
+    segs, kinds, _ = gcode_parser.segments(gcode_parser.parse_gcode(gcode))
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection="3d")
+    anim = gcode_render.ToolpathAnimation(ax, segs, kinds)
+    fig.canvas.draw()
+    anim.draw_frame(3)
+    anim.draw_frame(4)
+    (_, _, _, feed_done, feed_head) = anim._layers[1]
+    assert feed_done._segments3d[0].tolist() == [[1, 1, 0], [1, 1, -1], [5, 1, -1], [5, 3, -1]]
+    # La tête ne contient que le dernier segment, relié au sommet précédent
+    assert feed_head._segments3d[0].tolist() == [[5, 1, -1], [5, 3, -1]]
+    anim.finish()
+    assert anim.count == len(segs)
+    plt.close(fig)
+
+
+def test_decimate_drops_aligned_and_tiny_segments():
+    # Passe rectiligne en 100 segments, suivie d'un zigzag plus petit que la tolérance
+    line = np.column_stack((np.linspace(0, 10, 101), np.zeros(101), np.zeros(101)))
+    zigzag = np.column_stack((10 + 0.001 * (np.arange(20) % 2), np.zeros(20), np.zeros(20)))
+    verts = np.vstack((line, zigzag, [[np.nan] * 3, [0, 5, 0], [0, 6, 0]]))
+    coarse = gcode_render.decimate(verts, 0.1)
+    assert np.allclose(coarse[:2], [[0, 0, 0], [10, 0, 0]])
+    assert np.isnan(coarse[2]).all() and gcode_render.polyline_segments(coarse) == 2
+
+
+def test_lod_swaps_collections_within_budget():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # Surfaçage aller-retour dense, repassé deux fois
+    lines = "".join(f"G1 X{x % 50 * 0.2:.1f} Y{x // 50}\n" for x in range(2000))
+    segs, kinds, _ = gcode_parser.segments(gcode_parser.parse_gcode(lines * 2))
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection="3d")
+    lod = gcode_render.ToolpathLOD(ax, segs, kinds, budget=500)
+    assert 0 < lod.coarse_count <= 500
+    lod.set_moving(True)
+    assert lod.coarse["feed"].get_visible() and not lod.full["feed"].get_visible()
+    fig.canvas.draw()
+    lod.set_moving(False)
+    assert lod.full["feed"].get_visible() and not lod.coarse["feed"].get_visible()
+    lod.close()
+    plt.close(fig)
+
+
+def test_playback_follows_machine_time():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    moves = gcode_parser.parse_gcode("G0 X0 Y0 Z1\nG1 X100 F600\nG1 X101\nG0 Z10\n")
+    segs, kinds, source = gcode_parser.segments(moves)
+    times = gcode_parser.segment_times(segs, kinds, moves["f"][source])
+    # Rapide 1 mm à RAPID_FEED, 100 mm puis 1 mm à 600 mm/min, rapide 9 mm
+    rapid = 60.0 / gcode_parser.RAPID_FEED
+    np.testing.assert_allclose(times, np.cumsum([rapid, 10.0, 0.1, 9 * rapid]))
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection="3d")
+    anim = gcode_render.ToolpathAnimation(ax, segs, kinds, times=times)
+    fig.canvas.draw()
+    anim.seek(5.0)
+    assert anim.count == 1
+    anim.seek(1e9)
+    assert anim.count == 4 and anim.clock == anim.duration
+    anim.seek(times[1])
+    assert anim.count == 2
+    # Vitesse x100 : 0,05 s réelles avancent l'horloge de 5 s, sans intervalle plus court
+    anim.seek(0.0)
+    anim.speed = 100
+    anim._tick = gcode_render.time.perf_counter() - 0.05
+    anim._on_timer()
+    assert 5.0 <= anim.clock < times[1] and anim.count == 1
+    plt.close(fig)
+
+
+def test_picker_finds_source_line_and_highlights_it():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    moves = gcode_parser.parse_gcode("G0 X0 Y0 Z0\nG1 X10\nG2 X10 Y10 I0 J5\nG1 X0\n")
+    segs, kinds, source = gcode_parser.segments(moves, arc_points=20)
+    lines = moves["line"][source]
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection="3d")
+    ax.set_xlim(-1, 16), ax.set_ylim(-1, 11), ax.set_zlim(-1, 1)
+    picker = gcode_render.ToolpathPicker(ax, segs, lines)
+    fig.canvas.draw()
+    for index in (1, 10, len(segs) - 1):
+        x, y = gcode_render.project(ax, segs[index].mean(axis=0, keepdims=True))[0]
+        assert picker.pick(x, y) == lines[index]
+    assert picker.pick(-1000, -1000) is None
+    assert picker.highlight_line(2) == 19  # l'arc
+    # Après une rotation, la grille est reconstruite pour la nouvelle vue
+    grid = picker.grid()
+    ax.view_init(elev=60, azim=10)
+    assert picker.grid() is not grid
+    plt.close(fig)
@@ -0,0 +1,59 @@
+# Tests de l'écriture en flux du G-code (gcode_stream.py)
+import io
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from gcode_stream import GenerationContext, stream_gcode, collect_gcode
+from main_tkinter import load_config, emit_matrix_drilling, emit_surfacing, surfacing
+
+
+class CountingSink:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+
+
+def test_stream_writes_by_chunks_and_returns_coordinates():
+    def emit(config, tp, ctx):
+        tp.comment("(a)")
+        tp.comment("(b)")
+        tp.comment("(c)")
+        return (0, 0, 0, 0, 0, 0, 5)
+
+    sink = CountingSink()
+    result = stream_gcode(emit, {}, GenerationContext(sink=sink, chunk_rows=2))
+    assert result == (0, 0, 0, 0, 0, 0, 5)
+    assert sink.writes == ["(a)\n(b)\n", "(c)\n"]
+
+
+def test_stream_matches_legacy_tuple():
+    cfg = load_config()
+    legacy = surfacing(cfg)
+    buffer = io.StringIO()
+    coords = stream_gcode(emit_surfacing, cfg, GenerationContext(percent=50, sink=buffer, chunk_rows=3))
+    assert buffer.getvalue() == legacy[0]
+    assert tuple(coords) == legacy[1:]
+    assert collect_gcode(emit_surfacing, cfg) == legacy
+
+
+def test_concurrent_contexts_do_not_share_settings():
+    from concurrent.futures import ThreadPoolExecutor
+
+    cfg = {"matrix_drilling": {"num_rows": 4, "num_cols": 4, "feed_rate": 1000}}
+
+    def run(percent):
+        events = []
+        ctx = GenerationContext(percent=percent, hooks=[lambda event, info: events.append(event)])
+        gcode = collect_gcode(emit_matrix_drilling, cfg, ctx)[0]
+        return percent, gcode, events
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for percent, gcode, events in pool.map(run, [10, 25, 50, 100] * 5):
+            assert f"F{10 * percent:.3f}" in gcode
+            assert events == ["start", "end"]
@@ -0,0 +1,84 @@
+# Tests de l'API de génération en processus (generation.py)
+import io
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import generation
+
+
+def test_generate_program_from_request(tmp_path):
+    request = generation.GenerationRequest("5", {"length_x": 30, "length_y": 10, "tool_diameter": 6},
+                                           project_name="pièce/1", percent=40)
+    result = generation.generate_program(request, output_dir=str(tmp_path))
+    assert os.path.basename(result.filename).startswith("5_pièce_1_")
+    assert result.stock == (36, 16, 7.0)
+    text = open(result.filename).read()
+    assert "; pièce/1" in text
+    assert text.endswith(generation.PROGRAM_END)
+
+
+def test_percent_comes_from_request_only():
+    params = {"width_x": 20, "length_y": 10}
+    slow = io.StringIO()
+    fast = io.StringIO()
+    generation.write_program(generation.GenerationRequest("1", params, percent=10), slow)
+    generation.write_program(generation.GenerationRequest("1", params, percent=100), fast)
+    assert "G01 Z9.000 F180.000" in slow.getvalue()
+    assert "G01 Z9.000 F1800.000" in fast.getvalue()
+
+
+def test_request_from_saved_config():
+    request = generation.request_from_config({"last_operation": "6", "global_feed_rate_percent": "75%",
+                                              "global_units": "cm", "threading": {"hole_diameter": 30}})
+    assert request.section == "threading"
+    assert request.percent == 75
+    assert request.units == "mm"
+    assert request.params == {"hole_diameter": 30}
+
+
+def test_job_concatenates_operations_and_uses_union_of_toolpaths(tmp_path):
+    from gcode_cache import GcodeCache
+
+    job = generation.job_from_dict({"project_name": "P", "operations": [
+        {"mode": "surfacing", "params": {"width_x": 100, "length_y": 60, "tool_diameter": 20, "start_z": 0}},
+        {"mode": "3", "params": {"start_x": 10, "start_y": 10, "num_rows": 2, "num_cols": 3,
+                                 "spacing_x": 20, "spacing_y": 20, "total_depth": 5}},
+    ]})
+    cache = GcodeCache(str(tmp_path / "cache"))
+    first = generation.generate_job(job, filename=str(tmp_path / "a.nc"), cache=cache)
+    second = generation.generate_job(job, filename=str(tmp_path / "b.nc"), cache=cache)
+
+    assert first.bounds == ((-10.0, -10.0, -5.0), (100.0, 50.0, 5.0))
+    assert first.stock == (130.0, 80.0, 10.0)
+    assert second.stock == first.stock
+    text = open(first.filename).read()
+    assert "; (130.000, 80.000, 10.000 mm)" in text
+    assert text.index("; Surfacing operation") < text.index("Matrix")
+    assert text.count("M30") == 1
+
+
+def test_plunge_percent_default_is_shared_by_all_entry_points():
+    from gcode_stream import context_from_config
+    config = {"last_operation": "1", "global_units": "mm"}
+    job = generation.job_from_dict({"operations": [{"mode": "1", "params": {}}]})
+    percents = {
+        generation.request_from_config(config).percent,
+        context_from_config(config).percent,
+        generation.GenerationRequest("1").percent,
+        job.operations[0].percent,
+        generation.parse_percent("illisible"),
+    }
+    assert percents == {generation.DEFAULT_PERCENT}
+
+
+def test_legacy_plunge_percent_key_is_read_by_all_entry_points():
+    from gcode_stream import context_from_config
+    config = {"last_operation": "1", "global_feed_rate_drill_percent": "75%"}
+    assert generation.request_from_config(config).percent == 75
+    assert context_from_config(config).percent == 75
+    config["global_feed_rate_percent"] = "40%"
+    assert generation.request_from_config(config).percent == context_from_config(config).percent == 40
@@ -0,0 +1,25 @@
+# Tests de la génération depuis l'interface (GUI.py, sans fenêtre)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import GUI
+import gcode_cache
+import generation
+
+
+def test_regenerating_unchanged_parameters_hits_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(GUI, "NC_DIR", str(tmp_path / "NC"))
+    monkeypatch.setattr(GUI, "program_cache", gcode_cache.GcodeCache(str(tmp_path / "cache")))
+    os.makedirs(GUI.NC_DIR)
+    request = generation.GenerationRequest("6", {"hole_diameter": 30, "tool_diameter": 10})
+    events = []
+    hook = lambda event, info: events.append(event)
+    GUI.generate(request, hooks=[hook])
+    result = GUI.generate(request, hooks=[hook])
+    assert events.count("cache_hit") == 1
+    assert os.path.dirname(result.filename) == GUI.NC_DIR
+    assert open(result.filename).read().endswith(generation.PROGRAM_END)
@@ -0,0 +1,37 @@
+# Tests du registre des modes (mode_registry.py)
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pytest
+
+import mode_registry
+
+
+def test_registry_does_not_import_generators():
+    code = "import sys, mode_registry; print('main_tkinter' in sys.modules, 'numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_lookup_by_id_or_section():
+    spec = mode_registry.get_mode("threading")
+    assert spec is mode_registry.get_mode("6")
+    assert spec.load_generator().__name__ == "emit_threading"
+    assert [s.mode_id for s in mode_registry.all_modes()] == ["1", "2", "3", "4", "5", "6"]
+    with pytest.raises(ValueError):
+        mode_registry.get_mode("maze")
+
+
+def test_stock_and_image_rules():
+    import main_tkinter
+    config = {"last_operation": "2", "contour_drilling": {"hole_diameter": 20, "tool_diameter": 6, "drilling_type": "outer"}}
+    assert main_tkinter.calculate_stock_dimensions([], config) == (32, 32, 7.0)
+    oblong = mode_registry.get_mode("5")
+    assert oblong.image_filename({"path_type": "climb", "length_x": 0, "length_y": 12}) == "images/mode521.png"
+    assert oblong.image_filename({"path_type": "alternate"}) == "images/mode514.png"
+    assert mode_registry.get_mode("4").image_filename({"corner_type": "rear_left"}) == "images/mode441.png"
@@ -0,0 +1,54 @@
+# Tests de l'index des programmes générés (nc_index.py)
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import generation
+import nc_index
+
+
+def test_generated_programs_are_indexed(tmp_path):
+    old = tmp_path / "1_ancien_20240101_120000.nc"
+    old.write_text("G0 X0\n")
+    os.utime(old, (0, 0))
+    first = generation.generate_program(generation.GenerationRequest("5", {"length_x": 30, "length_y": 10,
+                                                                           "tool_diameter": 6}, project_name="p"),
+                                        output_dir=str(tmp_path))
+    second = generation.generate_program(generation.GenerationRequest("1", {"width_x": 20, "length_y": 10},
+                                                                      project_name="q"),
+                                         output_dir=str(tmp_path), filename=str(tmp_path / "autre.nc"))
+    os.utime(second.filename, (time.time() + 60,) * 2)
+    with nc_index.NcIndex(str(tmp_path)) as index:
+        entries = index.entries()
+        assert [e["name"] for e in entries] == ["autre.nc", os.path.basename(first.filename), old.name]
+        entry = entries[1]
+        assert (entry["mode"], entry["project"]) == ("5", "p")
+        assert entry["lines"] == open(first.filename).read().count("\n")
+        assert entry["params_hash"] and entry["x_max"] > entry["x_min"]
+        assert (entries[0]["mode"], entries[0]["lines"]) == (None, None)   # nom choisi : lu par rebuild
+        assert (entries[2]["mode"], entries[2]["project"]) == ("1", "ancien")
+        assert index.latest(mode="1") == str(old)
+    assert nc_index.latest_file(str(tmp_path)) == second.filename
+    # Programme supprimé : retiré de l'index à la requête suivante
+    os.remove(second.filename)
+    assert nc_index.latest_file(str(tmp_path)) == first.filename
+
+
+def test_file_copied_into_directory_is_found(tmp_path):
+    first = generation.generate_program(generation.GenerationRequest("1", {"width_x": 20, "length_y": 10}),
+                                        output_dir=str(tmp_path))
+    assert nc_index.latest_file(str(tmp_path)) == first.filename
+    copied = tmp_path / "copie.nc"
+    copied.write_text("G0 X0\n")
+    os.utime(copied, (time.time() + 60,) * 2)
+    assert nc_index.latest_file(str(tmp_path)) == str(copied)
+    # Dossier inchangé (date ancienne, mémorisée) : pas de nouveau parcours
+    os.utime(tmp_path, (0, 0))
+    with nc_index.NcIndex(str(tmp_path)) as index:
+        assert index.refresh() == 0
+        (tmp_path / "autre.nc").write_text("G0 X0\n")
+        assert index.refresh() == 1
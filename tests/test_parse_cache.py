@@ -0,0 +1,47 @@
+# Tests du cache des programmes analysés (parse_cache.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+from parse_cache import ParseCache
+
+
+def test_reopen_uses_cache_until_content_changes(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    source = tmp_path / "piece.nc"
+    source.write_text("G0 X1 Y2\nG1 Z-1 F100\nG1 X5\n")
+
+    moves, meta = cache.load(str(source))
+    assert meta["bounds"] == ((0.0, 0.0, -1.0), (5.0, 2.0, 0.0))
+    hit = cache.lookup(str(source))
+    assert isinstance(hit[0], np.memmap) and hit[0].tobytes() == moves.tobytes()
+
+    # Même contenu, date différente : l'empreinte valide l'entrée
+    os.utime(source, ns=(1, 1))
+    assert cache.lookup(str(source)) is not None
+    source.write_text("G0 X1 Y2\nG1 Z-1 F100\nG1 X6\n")
+    os.utime(source, ns=(2, 2))
+    assert cache.lookup(str(source)) is None
+    assert cache.load(str(source))[0]["x"][-1] == 6
+
+
+def test_eviction_keeps_most_recently_used(tmp_path):
+    sources = []
+    for index in range(3):
+        source = tmp_path / f"p{index}.nc"
+        source.write_text("G1 X1\n" * 100)
+        sources.append(str(source))
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.load(sources[0])
+    cache.max_bytes = 2 * os.path.getsize(cache.paths(sources[0])[0])
+    cache.load(sources[1])
+    for path in cache.paths(sources[0]):
+        os.utime(path, (1, 1))
+    cache.load(sources[2])
+    assert cache.lookup(sources[0]) is None
+    assert cache.lookup(sources[1]) is not None and cache.lookup(sources[2]) is not None
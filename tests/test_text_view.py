@@ -0,0 +1,27 @@
+# Tests de l'index des lignes de l'onglet texte (text_view.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from text_view import LineIndex, line_offsets
+
+
+def test_line_offsets():
+    assert line_offsets(b"").tolist() == [0]
+    assert line_offsets(b"G0\r\nG1 X1\n").tolist() == [0, 4, 10]
+    assert line_offsets(b"G0\n\nG1").tolist() == [0, 3, 4, 6]
+
+
+def test_file_index_reads_only_requested_lines(tmp_path):
+    source = tmp_path / "piece.nc"
+    source.write_bytes(b"".join(b"G1 X%d\r\n" % i for i in range(1000)))
+    index = LineIndex.from_file(str(source))
+    assert len(index) == 1000 and index.is_current(str(source))
+    assert index.lines(500, 503) == ["G1 X500", "G1 X501", "G1 X502"]
+    assert index.lines(998, 2000) == ["G1 X998", "G1 X999"]
+    source.write_bytes(b"G0\n")
+    assert not index.is_current(str(source))
+    assert LineIndex.from_text("a\nb").lines(0, 5) == ["a", "b"]
@@ -0,0 +1,68 @@
+# Tests de la représentation intermédiaire des trajectoires (toolpath.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+from toolpath import Toolpath, bounds, resolve_positions
+
+
+def test_format_matches_legacy_lines():
+    tp = Toolpath()
+    tp.rapid(x=1, y=2.5)
+    tp.linear(z=-1, f=150)
+    tp.linear(x=10, f=300)
+    tp.arc("G02", x=10, y=0, i=0, j=-5)
+    tp.comment()
+    assert tp.to_gcode() == (
+        "G00 X1.000 Y2.500\n"
+        "G01 Z-1.000 F150.000\n"
+        "G01 X10.000  F300\n"
+        "G02 X10.000 Y0.000 I0.000 J-5.000\n"
+        "\n"
+    )
+
+
+def test_positions_follow_absolute_and_relative_modes():
+    tp = Toolpath()
+    tp.rapid(x=5, y=5, z=2)
+    tp.incremental()
+    tp.linear(x=1)
+    tp.linear(y=-2)
+    tp.absolute()
+    tp.linear(z=0)
+    positions = resolve_positions(tp.moves)
+    assert np.allclose(positions[-1], (6, 3, 0))
+
+
+def test_bounds_include_arc_extremes():
+    tp = Toolpath()
+    tp.rapid(x=0, y=0, z=0)
+    # Demi-cercle horaire de (0, 0) à (10, 0) centré en (5, 0) : passe par Y=5
+    tp.arc("G02", x=10, y=0, i=5, j=0)
+    low, high = bounds(tp.moves)
+    assert np.allclose(low, (0, 0, 0))
+    assert np.allclose(high, (10, 5, 0))
+
+
+def test_extend_copies_texts_across_flushes():
+    from toolpath import COMMENT, LINEAR, empty_moves
+
+    block = empty_moves(4)
+    block["kind"] = [COMMENT, LINEAR, COMMENT, LINEAR]
+    block["text"][[0, 2]] = [0, 1]
+    block["z"][[1, 3]] = [-1, -2]
+    chunks = []
+
+    class Sink:
+        def write(self, text):
+            chunks.append(text)
+
+    tp = Toolpath(sink=Sink(), chunk_rows=3)
+    tp.extend(block, ["; a", "; b"])
+    tp.flush()
+    assert "".join(chunks) == "; a\nG01 Z-1.000\n; b\nG01 Z-2.000\n"
@@ -0,0 +1,58 @@
+# Tests de l'export vidéo sans interface graphique (video_export.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+import gcode_parser
+import video_export
+
+
+def test_frame_counts():
+    assert video_export.frame_counts(3).tolist() == [0, 1, 2, 3]
+    assert video_export.frame_counts(100, 5).tolist() == [0, 25, 50, 75, 100]
+    # Temps machine : un long G01 (60 s) puis une courte corde (0,1 s)
+    times = np.array([60.0, 60.1])
+    counts = video_export.frame_counts(2, times=times, fps=1, speed=10)
+    assert counts.tolist() == [0, 0, 0, 0, 0, 0, 1, 2]
+    assert video_export.frame_counts(2, frames=3, times=times).tolist() == [0, 0, 2]
+
+
+def test_png_export_matches_serial_render(tmp_path):
+    gcode = "G0 X0 Y0 Z5\nG1 Z-1\n" + "".join(f"G1 X{i} Y{i % 3}\n" for i in range(1, 12))
+    segs, kinds, _ = gcode_parser.segments(gcode_parser.parse_gcode(gcode))
+    settings = video_export.VideoSettings(width=160, height=120, dpi=40)
+    progress = []
+    total = video_export.export(segs, kinds, str(tmp_path / "par"), settings, frames=8, workers=2,
+                                png=True, range_frames=3, progress=lambda done, count: progress.append(done))
+    assert total == 8 and progress == [3, 6, 8]
+    video_export.export(segs, kinds, str(tmp_path / "seq"), settings, frames=8, workers=1, png=True, range_frames=8)
+    names = sorted(os.listdir(tmp_path / "par"))
+    assert names == sorted(os.listdir(tmp_path / "seq")) == [f"image_{i:06d}.png" for i in range(8)]
+    import matplotlib.image
+    images = {kind: [matplotlib.image.imread(str(tmp_path / kind / name)) for name in names] for kind in ("par", "seq")}
+    assert images["par"][0].shape[:2] == (120, 160) and not np.array_equal(images["par"][0], images["par"][-1])
+    # Début de plage rendu en entier au lieu d'être complété : seul l'anticrénelage peut différer
+    for par, seq in zip(images["par"], images["seq"]):
+        assert np.abs(par - seq).mean() < 0.01
+
+
+def test_cancelled_export_stops_between_ranges(tmp_path):
+    import threading
+    segs, kinds, _ = gcode_parser.segments(gcode_parser.parse_gcode("G0 X0 Y0\nG1 X5 Y5\nG1 X9 Y0\n"))
+    cancel = threading.Event()
+    settings = video_export.VideoSettings(width=80, height=60, dpi=20)
+    progress = lambda done, count: cancel.set()
+    try:
+        video_export.export(segs, kinds, str(tmp_path / "png"), settings, frames=6, workers=1, png=True,
+                            range_frames=2, progress=progress, cancel=cancel)
+    except video_export.ExportCancelled:
+        pass
+    else:
+        raise AssertionError("ExportCancelled attendu")
+    # Plage en cours au moment de l'annulation terminée, pas la suivante
+    assert len(os.listdir(tmp_path / "png")) == 4
@@ -0,0 +1,49 @@
+# Tests de la liaison avec le visualiseur resté ouvert (viewer_link.py)
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import gcode_parser
+import viewer_link
+from gcode_loader import LoadJob
+
+
+def test_load_request_reaches_running_viewer(tmp_path):
+    rendezvous = str(tmp_path / "viewer.json")
+    source = tmp_path / "piece.nc"
+    source.write_text("G0 X1 Y2\nG1 X3 Y2\n")
+    assert not viewer_link.send_load(str(source), rendezvous=rendezvous)  # aucun visualiseur
+
+    server = viewer_link.ViewerServer(rendezvous)
+    try:
+        moves = gcode_parser.parse_gcode(source.read_text())
+        assert viewer_link.send_load(str(source), moves=moves, rendezvous=rendezvous)
+        [message] = server.pending()
+    finally:
+        server.close()
+    assert message["command"] == "load" and message["path"] == str(source)
+    job = LoadJob(message["path"], moves=message["moves"]).run()
+    assert job.error is None and job.result.moves["kind"].tolist() == [gcode_parser.RAPID, gcode_parser.LINEAR]
+
+    # Visualiseur fermé : fichier de rendez-vous retiré, on relancera un processus
+    assert not os.path.exists(rendezvous)
+    assert not viewer_link.send_load(str(source), rendezvous=rendezvous)
+
+
+def test_silent_client_does_not_block_the_viewer(tmp_path, monkeypatch):
+    import json
+    from multiprocessing.connection import Client
+    monkeypatch.setattr(viewer_link, "RECV_TIMEOUT", 0.2)
+    rendezvous = str(tmp_path / "viewer.json")
+    server = viewer_link.ViewerServer(rendezvous)
+    try:
+        with open(rendezvous) as f:
+            info = json.load(f)
+        with Client(info["address"], family=viewer_link.FAMILY, authkey=bytes.fromhex(info["authkey"])):
+            assert viewer_link.send_load(str(tmp_path / "piece.nc"), rendezvous=rendezvous)
+        assert len(server.pending()) == 1
+    finally:
+        server.close()
@@ -0,0 +1,185 @@
+# text_view.py
+"""Affichage virtualisé d'un programme G-code dans un widget Tk.
+
+LineIndex construit une fois, depuis la projection mémoire du fichier, le
+tableau des positions (en octets) du début de chaque ligne. VirtualTextView
+n'insère dans son `tk.Text` que les lignes visibles, relues à la demande
+(une lecture de quelques Ko par défilement) : l'ouverture de l'onglet, le
+défilement et le saut à une ligne ne dépendent pas de la taille du fichier.
+Le fichier n'est pas gardé ouvert entre deux lectures (sous Windows, une
+projection ouverte empêcherait de le régénérer).
+"""
+import os
+
+import numpy as np
+
+import gcode_parser
+
+
+def line_offsets(data):
+    """Début de chaque ligne de `data` (octets), suivi de la taille totale : n + 1 valeurs pour n lignes."""
+    buf = np.frombuffer(data, dtype=np.uint8) if len(data) else np.empty(0, dtype=np.uint8)
+    starts = np.flatnonzero(buf == 10) + 1
+    if len(starts) and starts[-1] == len(buf):
+        starts = starts[:-1]    # pas de ligne vide après le dernier saut de ligne
+    return np.concatenate(([0] if len(buf) else [], starts, [len(buf)])).astype(np.int64)
+
+
+class LineIndex:
+    """Index des lignes d'un fichier (`path`) ou d'un texte en mémoire (`text`)."""
+
+    def __init__(self, data, path=None, stat=None, text=None):
+        self.offsets = line_offsets(data)
+        self.path = path
+        self.text = text
+        self._stat = (stat.st_size, stat.st_mtime_ns) if stat is not None else None
+        self._data = bytes(data) if path is None else None
+
+    @classmethod
+    def from_file(cls, path):
+        stat = os.stat(path)
+        with gcode_parser.open_mapped(path) as data:
+            return cls(data, path, stat)
+
+    @classmethod
+    def from_text(cls, text):
+        return cls(text.encode("utf-8"), text=text)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def is_current(self, path):
+        """Vrai si l'index décrit toujours le fichier `path` (même taille, même date)."""
+        if self.path is None or os.path.abspath(path) != os.path.abspath(self.path):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == self._stat
+
+    def lines(self, start, stop):
+        """Lignes `start` à `stop` (exclue), décodées, sans fin de ligne."""
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return []
+        low, high = int(self.offsets[start]), int(self.offsets[stop])
+        if self._data is not None:
+            raw = self._data[low:high]
+        else:
+            with open(self.path, "rb") as f:
+                f.seek(low)
+                raw = f.read(high - low)
+        text = raw.decode("utf-8", errors="replace")
+        return [line.rstrip("\r") for line in text.split("\n")][:stop - start]
+
+
+class VirtualTextView:
+    """Texte en lecture seule d'un LineIndex, n'affichant que les lignes visibles (Tk).
+
+    Le cadre `frame` est placé par le visualiseur ; set_index() change le
+    programme affiché, goto() amène une ligne (à partir de 0) au centre et la
+    met en évidence. Un clic sur une ligne la met en évidence ; `on_select`
+    est appelé avec son numéro (à partir de 0) après un clic ou un goto().
+    """
+
+    def __init__(self, parent, font=("Courier", 10)):
+        import tkinter as tk
+        import tkinter.font as tkfont
+        from tkinter import ttk
+        self.frame = ttk.Frame(parent)
+        self.numbers = tk.Text(self.frame, width=7, wrap="none", font=font, takefocus=0,
+                               background="#eeeeee", foreground="gray", state="disabled")
+        self.text = tk.Text(self.frame, wrap="none", font=font, state="disabled")
+        self.vscroll = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        hscroll = ttk.Scrollbar(self.frame, orient="horizontal", command=self.text.xview)
+        self.text.configure(xscrollcommand=hscroll.set)
+        self.text.tag_configure("current", background="#ffff99")
+        self.numbers.grid(row=0, column=0, sticky="ns")
+        self.text.grid(row=0, column=1, sticky="nsew")
+        self.vscroll.grid(row=0, column=2, sticky="ns")
+        hscroll.grid(row=1, column=1, sticky="ew")
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(1, weight=1)
+        self._linespace = tkfont.Font(font=font).metrics("linespace")
+        self.index = None
+        self.first = 0          # première ligne affichée
+        self.current = None     # ligne mise en évidence
+        self.on_select = None
+        for widget in (self.text, self.numbers):
+            widget.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+        self.text.bind("<Up>", lambda e: self.scroll(-1))
+        self.text.bind("<Down>", lambda e: self.scroll(1))
+        self.text.bind("<Prior>", lambda e: self.scroll(-self.rows()))
+        self.text.bind("<Next>", lambda e: self.scroll(self.rows()))
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.text.bind("<Control-End>", lambda e: self.scroll_to(len(self.index or ())))
+        self.text.bind("<Button-1>", self._on_click)
+        self.text.bind("<Configure>", lambda e: self.render())
+
+    def rows(self):
+        """Nombre de lignes entières visibles."""
+        return max(self.text.winfo_height() // self._linespace, 1)
+
+    def set_index(self, index):
+        if index is not self.index:
+            self.index, self.first, self.current = index, 0, None
+        self.render()
+
+    def scroll(self, lines):
+        self.scroll_to(self.first + lines)
+        return "break"
+
+    def scroll_to(self, first):
+        self.first = first
+        self.render()
+        return "break"
+
+    def goto(self, line):
+        """Centre la ligne `line` (à partir de 0) et la met en évidence."""
+        if self.index is None or not len(self.index):
+            return
+        self.current = min(max(int(line), 0), len(self.index) - 1)
+        self.scroll_to(self.current - self.rows() // 2)
+        if self.on_select is not None:
+            self.on_select(self.current)
+
+    def _on_click(self, event):
+        self.text.focus_set()
+        if self.index is None or not len(self.index):
+            return
+        row = int(self.text.index(f"@{event.x},{event.y}").split(".")[0]) - 1
+        self.current = min(self.first + row, len(self.index) - 1)
+        self.render()
+        if self.on_select is not None:
+            self.on_select(self.current)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if self.index is None:
+            return
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.index)))
+        else:
+            self.scroll(int(value) * (self.rows() if unit == "pages" else 1))
+
+    def render(self):
+        """Remplace le contenu des widgets par les lignes visibles."""
+        total = len(self.index) if self.index is not None else 0
+        rows = self.rows()
+        self.first = min(max(self.first, 0), max(total - rows, 0))
+        lines = self.index.lines(self.first, self.first + rows) if total else []
+        width = len(str(max(total, 1)))
+        for widget, content in ((self.text, "\n".join(lines)),
+                                (self.numbers, "\n".join(str(self.first + k + 1).rjust(width) for k in range(len(lines))))):
+            widget.configure(state="normal")
+            widget.delete("1.0", "end")
+            widget.insert("1.0", content)
+        self.numbers.configure(width=width + 1)
+        if self.current is not None and self.first <= self.current < self.first + len(lines):
+            row = self.current - self.first + 1
+            self.text.tag_add("current", f"{row}.0", f"{row}.0 lineend +1c")
+        for widget in (self.text, self.numbers):
+            widget.configure(state="disabled")
+        self.vscroll.set(self.first / max(total, 1), (self.first + len(lines)) / max(total, 1))
@@ -0,0 +1,370 @@
+# toolpath.py
+"""Représentation intermédiaire compacte des trajectoires d'outil.
+
+Les générateurs de main_tkinter.py n'écrivent plus directement du texte : ils
+ajoutent leurs mouvements dans un `Toolpath`, tableau NumPy structuré contenant
+un enregistrement par ligne de programme (type de mouvement, X/Y/Z, I/J, F, S,
+mode absolu/relatif). Un formateur vectorisé unique (`format_moves`) transforme
+ces tableaux en G-code ; l'encombrement, l'aperçu ou les optimisations peuvent
+travailler directement sur les tableaux, sans repasser par le texte.
+"""
+from itertools import chain
+
+import numpy as np
+
+# Types de ligne (champ `kind`)
+RAPID = 0       # G00
+LINEAR = 1      # G01
+ARC_CW = 2      # G02
+ARC_CCW = 3     # G03
+COMMENT = 4     # commentaire ou ligne vide (texte dans Toolpath.texts)
+ABSOLUTE = 5    # G90
+RELATIVE = 6    # G91
+
+MOTION_KINDS = (RAPID, LINEAR, ARC_CW, ARC_CCW)
+G_WORDS = {RAPID: "G00", LINEAR: "G01", ARC_CW: "G02", ARC_CCW: "G03", ABSOLUTE: "G90", RELATIVE: "G91"}
+
+# Mots numériques, dans l'ordre des bits du masque de présence
+WORDS = ("x", "y", "z", "i", "j", "f", "s")
+
+MOVE_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("relative", "?"),  # True si G91 actif pour cette ligne
+    ("x", "f8"), ("y", "f8"), ("z", "f8"),
+    ("i", "f8"), ("j", "f8"),
+    ("f", "f8"), ("s", "f8"),
+    ("text", "i4"),     # index dans Toolpath.texts (commentaire / ligne brute), -1 sinon
+])
+
+# Gabarits de formatage par (type, mots présents). Ils reproduisent à l'identique
+# la mise en forme historique des générateurs ; {c} est remplacé par le format
+# des coordonnées (précision), {g} par le mot G du type de mouvement.
+_TEMPLATES = {
+    (RAPID, "fs"): "G0 S%.0f  F%.0f",
+    (LINEAR, "zf"): "{g} Z{c} F%.3f",
+    (ARC_CW, "xyzij"): "{g} X{c} Y{c} I{c} J{c} Z{c}",
+    (ARC_CCW, "xyzij"): "{g} X{c} Y{c} I{c} J{c} Z{c}",
+}
+# Ordre des champs dans chaque gabarit spécial (les autres suivent WORDS)
+_FIELD_ORDER = {
+    (RAPID, "fs"): ("s", "f"),
+    (ARC_CW, "xyzij"): ("x", "y", "i", "j", "z"),
+    (ARC_CCW, "xyzij"): ("x", "y", "i", "j", "z"),
+}
+
+
+def _template(kind, words, precision):
+    """Retourne (format %, champs) pour une ligne de mouvement."""
+    coord = f"%.{precision}f"
+    template = _TEMPLATES.get((kind, words))
+    fields = _FIELD_ORDER.get((kind, words), tuple(words))
+    if template is None:
+        # Gabarit générique : coordonnées séparées par un espace, F et S par deux
+        parts = ["{g}"]
+        for word in words:
+            if word in "xyzij":
+                parts.append(f" {word.upper()}{{c}}")
+            elif word == "f":
+                parts.append("  F%.0f")
+            else:
+                parts.append(" S%.0f")
+        template = "".join(parts)
+    return template.replace("{g}", G_WORDS[kind]).replace("{c}", coord), fields
+
+
+def format_moves(moves, texts, precision=3):
+    """Formate un tableau de mouvements en liste de lignes G-code (sans saut de ligne).
+
+    Les lignes sont regroupées par gabarit et formatées en bloc : le coût Python
+    dépend du nombre de gabarits distincts, pas du nombre de lignes.
+    """
+    count = len(moves)
+    lines = np.empty(count, dtype=object)
+    if count == 0:
+        return []
+    kind = moves["kind"]
+    text_index = moves["text"]
+
+    with_text = text_index >= 0
+    if with_text.any():
+        rows = np.flatnonzero(with_text)
+        lines[rows] = [texts[t] for t in text_index[rows].tolist()]
+    for modal_kind in (ABSOLUTE, RELATIVE):
+        lines[~with_text & (kind == modal_kind)] = G_WORDS[modal_kind]
+
+    motion = ~with_text & (kind <= ARC_CCW)
+    if motion.any():
+        present = np.zeros(count, dtype=np.uint16)
+        for bit, word in enumerate(WORDS):
+            present |= (~np.isnan(moves[word])).astype(np.uint16) << bit
+        key = (kind.astype(np.uint16) << 8) | present
+        for value in np.unique(key[motion]).tolist():
+            rows = np.flatnonzero(motion & (key == value))
+            row_kind, mask = value >> 8, value & 0xFF
+            words = "".join(w for bit, w in enumerate(WORDS) if mask & (1 << bit))
+            fmt, fields = _template(row_kind, words, precision)
+            columns = [moves[w][rows].tolist() for w in fields]
+            block = ((fmt + "\n") * len(rows)) % tuple(chain.from_iterable(zip(*columns)))
+            lines[rows] = block.split("\n")[:-1]
+    return lines.tolist()
+
+
+class Toolpath:
+    """Liste de mouvements stockée dans un tableau NumPy structuré extensible.
+
+    Sans `sink`, le tableau grandit jusqu'à contenir tout le programme (analyse,
+    aperçu). Avec `sink` (objet possédant `write(str)`), les lignes sont formatées
+    et écrites par blocs de `chunk_rows` : la mémoire reste bornée quelle que
+    soit la taille du programme.
+    """
+
+    def __init__(self, capacity=1024, sink=None, chunk_rows=65536, precision=3):
+        self._data = np.empty(max(int(capacity), 16), dtype=MOVE_DTYPE)
+        self._count = 0
+        self.texts = []
+        self.relative = False
+        self.sink = sink
+        self.chunk_rows = chunk_rows
+        self.precision = precision
+        self.rows_written = 0
+        self.on_flush = None  # rappel on_flush(rows_written) après chaque écriture
+        self.tracker = None   # BoundsTracker mis à jour avant chaque écriture
+        self._tracked = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def moves(self):
+        """Vue sur les mouvements non encore écrits."""
+        return self._data[:self._count]
+
+    def _reserve(self, extra):
+        needed = self._count + extra
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=MOVE_DTYPE)
+            grown[:self._count] = self._data[:self._count]
+            self._data = grown
+
+    def _append(self, kind, x=None, y=None, z=None, i=None, j=None, f=None, s=None, text=-1):
+        if self._count >= len(self._data):
+            self._reserve(1)
+        nan = np.nan
+        self._data[self._count] = (
+            kind, self.relative,
+            nan if x is None else x, nan if y is None else y, nan if z is None else z,
+            nan if i is None else i, nan if j is None else j,
+            nan if f is None else f, nan if s is None else s,
+            text,
+        )
+        self._count += 1
+        if self.sink is not None and self._count >= self.chunk_rows:
+            self.flush()
+
+    # --- Construction ---------------------------------------------------
+    def rapid(self, x=None, y=None, z=None, f=None, s=None):
+        self._append(RAPID, x, y, z, f=f, s=s)
+
+    def linear(self, x=None, y=None, z=None, f=None):
+        self._append(LINEAR, x, y, z, f=f)
+
+    def arc(self, code, x=None, y=None, i=None, j=None, z=None, f=None):
+        """Arc G02/G03 (`code` = "G02" ou "G03"), I/J relatifs au point de départ."""
+        self._append(ARC_CW if code == "G02" else ARC_CCW, x, y, z, i, j, f)
+
+    def comment(self, text=""):
+        """Ligne de commentaire (ou ligne vide si `text` est vide)."""
+        self.texts.append(text)
+        self._append(COMMENT, text=len(self.texts) - 1)
+
+    def raw(self, line, kind, **words):
+        """Mouvement écrit tel quel (`line`) mais dont les mots restent analysables."""
+        self.texts.append(line)
+        self._append(kind, text=len(self.texts) - 1, **words)
+
+    def absolute(self):
+        self.relative = False
+        self._append(ABSOLUTE)
+
+    def incremental(self):
+        self.relative = True
+        self._append(RELATIVE)
+
+    def extend(self, block, texts=()):
+        """Ajoute un bloc de mouvements déjà construit (tableau MOVE_DTYPE).
+
+        Le champ `text` du bloc indexe la séquence `texts` ; les textes sont
+        recopiés dans `self.texts` au fur et à mesure de l'ajout.
+        """
+        start = 0
+        while start < len(block):
+            stop = len(block)
+            if self.sink is not None:
+                stop = min(stop, start + max(self.chunk_rows - self._count, 1))
+            part = block[start:stop]
+            with_text = part["text"] >= 0
+            if with_text.any():
+                part = part.copy()
+                indices = part["text"][with_text]
+                part["text"][with_text] = np.arange(len(self.texts), len(self.texts) + len(indices))
+                self.texts.extend(texts[k] for k in indices.tolist())
+            self._reserve(len(part))
+            self._data[self._count:self._count + len(part)] = part
+            self._count += len(part)
+            if self.sink is not None and self._count >= self.chunk_rows:
+                self.flush()
+            start = stop
+        if len(block):
+            self.relative = bool(block["relative"][-1])
+
+    # --- Sortie ---------------------------------------------------------
+    def to_gcode(self):
+        """Texte G-code des mouvements en mémoire (une ligne par mouvement)."""
+        lines = format_moves(self.moves, self.texts, self.precision)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def flush(self):
+        """Écrit les mouvements en attente dans `sink` puis vide le tampon."""
+        if self.tracker is not None and self._tracked < self._count:
+            self.tracker.update(self._data[self._tracked:self._count])
+            self._tracked = self._count
+        if self.sink is None or self._count == 0:
+            return
+        self.sink.write(self.to_gcode())
+        self.rows_written += self._count
+        self._count = 0
+        self._tracked = 0
+        self.texts = []
+        if self.on_flush is not None:
+            self.on_flush(self.rows_written)
+
+
+def empty_moves(count):
+    """Bloc de `count` mouvements vides (mots absents, pas de texte)."""
+    block = np.zeros(count, dtype=MOVE_DTYPE)
+    for word in WORDS:
+        block[word] = np.nan
+    block["text"] = -1
+    return block
+
+
+def resolve_positions(moves, origin=(0.0, 0.0, 0.0)):
+    """Positions absolues (n, 3) de l'outil après chaque ligne.
+
+    Les mots absents conservent la position courante ; en G91 les mots sont
+    cumulés. Les lignes sans mouvement (commentaires, G90/G91) ne bougent pas.
+    """
+    count = len(moves)
+    positions = np.empty((count, 3))
+    if count == 0:
+        return positions
+    relative = moves["relative"]
+    motion = moves["kind"] <= ARC_CCW
+    cuts = np.flatnonzero(relative[1:] != relative[:-1]) + 1
+    starts = np.concatenate(([0], cuts))
+    stops = np.concatenate((cuts, [count]))
+    current = np.array(origin, dtype=float)
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        for axis, word in enumerate("xyz"):
+            values = np.where(motion[start:stop], moves[word][start:stop], np.nan)
+            if relative[start]:
+                column = current[axis] + np.cumsum(np.nan_to_num(values))
+            else:
+                index = np.where(np.isnan(values), -1, np.arange(stop - start))
+                np.maximum.accumulate(index, out=index)
+                column = np.where(index >= 0, values[np.maximum(index, 0)], current[axis])
+            positions[start:stop, axis] = column
+            current[axis] = column[-1]
+    return positions
+
+
+def _extent(moves, origin):
+    """(min, max, position finale) des mouvements ; min/max valent NaN si inconnus."""
+    positions = resolve_positions(moves, origin)
+    end = positions[-1] if len(moves) else np.asarray(origin, dtype=float)
+    motion = moves["kind"] <= ARC_CCW
+    if not motion.any():
+        return None, None, end
+    previous = np.vstack((np.asarray(origin, dtype=float), positions[:-1]))
+    points = [positions[motion], previous[motion]]
+
+    kind = moves["kind"]
+    arcs = (kind == ARC_CW) | (kind == ARC_CCW)
+    if arcs.any():
+        start = previous[arcs]
+        stop = positions[arcs]
+        center_x = start[:, 0] + np.nan_to_num(moves["i"][arcs])
+        center_y = start[:, 1] + np.nan_to_num(moves["j"][arcs])
+        radius = np.hypot(start[:, 0] - center_x, start[:, 1] - center_y)
+        angle_start = np.arctan2(start[:, 1] - center_y, start[:, 0] - center_x)
+        angle_end = np.arctan2(stop[:, 1] - center_y, stop[:, 0] - center_x)
+        ccw = kind[arcs] == ARC_CCW
+        # Balayage dans le sens de l'arc, tour complet si départ = arrivée
+        sweep = np.where(ccw, angle_end - angle_start, angle_start - angle_end) % (2 * np.pi)
+        sweep[np.isclose(sweep, 0.0)] = 2 * np.pi
+        for quadrant in range(4):
+            angle = quadrant * np.pi / 2
+            offset = np.where(ccw, angle - angle_start, angle_start - angle) % (2 * np.pi)
+            hit = offset <= sweep
+            if hit.any():
+                extreme = np.column_stack((
+                    center_x[hit] + radius[hit] * np.cos(angle),
+                    center_y[hit] + radius[hit] * np.sin(angle),
+                    start[hit, 2],
+                ))
+                points.append(extreme)
+    stacked = np.vstack(points)
+    # fmin/fmax ignorent les NaN (axes dont la position de départ est inconnue)
+    return np.fmin.reduce(stacked, axis=0), np.fmax.reduce(stacked, axis=0), end
+
+
+def bounds(moves, origin=(0.0, 0.0, 0.0)):
+    """Encombrement ((xmin, ymin, zmin), (xmax, ymax, zmax)) des mouvements.
+
+    Les arcs G02/G03 sont pris en compte avec leurs extrêmes sur X/Y, pas
+    seulement leurs extrémités. Retourne None s'il n'y a aucun mouvement.
+    Une origine NaN signifie « position inconnue » : l'axe n'est compté qu'à
+    partir de son premier déplacement.
+    """
+    low, high, _ = _extent(moves, origin)
+    if low is None:
+        return None
+    return tuple(low.tolist()), tuple(high.tolist())
+
+
+class BoundsTracker:
+    """Encombrement cumulé de mouvements reçus par blocs successifs.
+
+    Branché sur un Toolpath (`tp.tracker`), il est mis à jour à chaque écriture
+    de bloc : l'encombrement d'un programme écrit en flux est connu sans
+    conserver ses mouvements en mémoire.
+    """
+
+    def __init__(self, origin=(np.nan, np.nan, np.nan)):
+        self.position = np.array(origin, dtype=float)
+        self.low = None
+        self.high = None
+
+    def update(self, moves):
+        if len(moves) == 0:
+            return
+        low, high, self.position = _extent(moves, self.position)
+        if low is None:
+            return
+        self.low = low if self.low is None else np.fmin(self.low, low)
+        self.high = high if self.high is None else np.fmax(self.high, high)
+
+    def merge(self, box):
+        """Ajoute un encombrement ((min), (max)) déjà calculé (ex. opération en cache)."""
+        if box is None:
+            return
+        low, high = np.array(box[0], dtype=float), np.array(box[1], dtype=float)
+        self.low = low if self.low is None else np.fmin(self.low, low)
+        self.high = high if self.high is None else np.fmax(self.high, high)
+
+    @property
+    def box(self):
+        """((xmin, ymin, zmin), (xmax, ymax, zmax)), ou None si aucun mouvement."""
+        if self.low is None:
+            return None
+        return tuple(self.low.tolist()), tuple(self.high.tolist())
@@ -0,0 +1,298 @@
+# video_export.py
+"""Export vidéo (ou images PNG) de la simulation, sans interface graphique.
+
+    python video_export.py programme.nc -o simulation.mp4 [--fps 30] [--speed 8 | --duration 600] [-j 8]
+    python video_export.py programme.nc -o images/ --png
+
+Comme dans les visualiseurs animés, la vidéo suit le temps machine
+(LoadResult.times) : l'image k montre les segments terminés à l'instant
+k / fps × vitesse.
+
+Les segments sont calculés une fois (gcode_loader, avec le cache d'analyse)
+puis enregistrés en .npy ; les images sont réparties par plages consécutives
+sur un `ProcessPoolExecutor`. Chaque processus relit les segments en mémoire
+projetée et trace ses plages avec Agg : un rendu complet au début de la
+plage, puis seuls les segments ajoutés par image (ToolpathAnimation.draw_frame).
+Les images brutes (RGBA) d'une plage sont écrites dans un fichier temporaire
+que le processus principal transmet, dans l'ordre, à un unique ffmpeg ; au
+plus `workers + 1` plages sont en cours à la fois. En mode PNG, chaque
+processus écrit directement ses images.
+
+Avec --cancel-from-stdin (visualiseur), la ligne « cancel » ou la fin de
+l'entrée standard arrêtent l'export entre deux plages : le pool et ffmpeg
+sont arrêtés proprement et la vidéo partielle est supprimée. Sous Windows,
+terminate() ne laisserait ni l'un ni l'autre s'arrêter.
+"""
+import argparse
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+# Images rendues par tâche du pool (5 s de vidéo à 30 images/s)
+RANGE_FRAMES = 150
+
+
+class ExportCancelled(Exception):
+    """Export interrompu à la demande de l'appelant."""
+
+
+@dataclass(frozen=True)
+class VideoSettings:
+    fps: int = 30
+    width: int = 1200           # pixels (pairs pour l'encodage yuv420p)
+    height: int = 800
+    dpi: int = 100
+    elev: float = 30
+    azim: float = -60
+    stock_z: float = 10.0       # hauteur du brut (limite haute de l'axe Z)
+    linewidth: float = 1.5
+    bitrate: str = "3000k"
+
+
+def stock_height(header):
+    """Hauteur du brut lue dans l'entête du programme (10 mm par défaut)."""
+    import gcode_parser
+    dimensions = gcode_parser.stock_dimensions(header)
+    return dimensions[2] if dimensions is not None else 10.0
+
+
+def frame_counts(total, frames=None, times=None, fps=30, speed=1.0):
+    """Nombre de segments tracés à chaque image.
+
+    Avec `times` (temps machine cumulé à la fin de chaque segment), l'image k
+    correspond à l'instant k / fps × `speed`, ou `frames` images couvrent tout
+    le programme. Sans `times` : un segment de plus par image, ou `frames`
+    images régulières en nombre de segments.
+    """
+    if times is not None and len(times) and times[-1] > 0:
+        duration = float(times[-1])
+        if frames is not None:
+            clocks = np.linspace(0, duration, max(int(frames), 1))
+        else:
+            clocks = np.arange(math.ceil(duration * fps / speed) + 1) * (speed / fps)
+        counts = np.searchsorted(times, clocks, side="right")
+        counts[-1] = total
+        return counts
+    if frames is None:
+        return np.arange(total + 1)
+    return np.round(np.linspace(0, total, max(int(frames), 1))).astype(np.int64)
+
+
+def _figure(segs, settings):
+    """Figure Agg de l'export (mêmes références et limites que l'export du visualiseur)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(settings.width / settings.dpi, settings.height / settings.dpi), dpi=settings.dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    x_min, y_min = (float(segs[:, :, axis].min()) for axis in (0, 1))
+    x_max, y_max = (float(segs[:, :, axis].max()) for axis in (0, 1))
+    max_span = max(x_max - x_min, y_max - y_min)
+    ax.plot([x_min, x_min + max_span], [y_min, y_min], [0, 0], 'g-', linewidth=2)
+    ax.plot([x_min, x_min], [y_min, y_min + max_span], [0, 0], 'g-', linewidth=2)
+    margin = 0.1
+    ax.set_xlim(x_min - margin*max_span, x_min + max_span + margin*max_span)
+    ax.set_ylim(y_min - margin*max_span, y_min + max_span + margin*max_span)
+    ax.set_zlim(-5, settings.stock_z + 5)
+    ax.view_init(elev=settings.elev, azim=settings.azim)
+    return canvas, ax
+
+
+# Figure et animation de chaque processus du pool, réutilisées d'une plage à l'autre
+_renderers = {}
+
+
+def _renderer(arrays, settings):
+    key = (arrays, settings)
+    if key not in _renderers:
+        import gcode_render
+        _renderers.clear()
+        segs = np.load(arrays[0], mmap_mode="r")
+        canvas, ax = _figure(segs, settings)
+        anim = gcode_render.ToolpathAnimation(ax, segs, np.load(arrays[1]), linewidth=settings.linewidth)
+        _renderers[key] = canvas, anim
+    return _renderers[key]
+
+
+def render_range(arrays, settings, counts, first, target, png=False):
+    """Trace les images `first`, `first + 1`... (`counts` : segments tracés de chacune).
+
+    `arrays` : fichiers .npy (segments, types). Écrit les images brutes RGBA
+    dans le fichier `target`, ou des PNG `image_000123.png` dans le dossier
+    `target` si `png`. Retourne `target`.
+    """
+    import matplotlib.image
+    canvas, anim = _renderer(arrays, settings)
+    # Rendu complet jusqu'au début de la plage : il sert de fond aux images suivantes
+    anim.advance(counts[0])
+    canvas.draw()
+    with open(os.devnull if png else target, "wb") as out:
+        for offset, count in enumerate(counts):
+            anim.draw_frame(count)
+            if png:
+                name = os.path.join(target, f"image_{first + offset:06d}.png")
+                matplotlib.image.imsave(name, np.asarray(canvas.buffer_rgba()))
+            else:
+                out.write(canvas.buffer_rgba())
+    return target
+
+
+def _encoder(ffmpeg, output, settings, size):
+    return subprocess.Popen([ffmpeg, "-y", "-loglevel", "error",
+                             "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{size[0]}x{size[1]}",
+                             "-r", str(settings.fps), "-i", "-",
+                             "-c:v", "libx264", "-pix_fmt", "yuv420p", "-b:v", settings.bitrate, output],
+                            stdin=subprocess.PIPE)
+
+
+def export(segs, kinds, output, settings=VideoSettings(), frames=None, workers=None, png=False,
+           range_frames=RANGE_FRAMES, progress=None, cancel=None, times=None, speed=1.0):
+    """Exporte l'animation des segments `segs` (n, 2, 3) vers `output` (vidéo, ou dossier PNG si `png`).
+
+    `frames`, `times` et `speed` : voir frame_counts. `progress(done, total)`
+    est appelé après chaque plage d'images ; si `cancel` (threading.Event) est
+    levé, l'export s'arrête par ExportCancelled. Retourne le nombre d'images.
+    """
+    counts = frame_counts(len(segs), frames, times, settings.fps, speed)
+    if not len(segs):
+        raise ValueError("Aucun mouvement à exporter.")
+    ffmpeg = shutil.which("ffmpeg") if not png else None
+    if not png and ffmpeg is None:
+        raise FileNotFoundError("ffmpeg introuvable (installez-le ou exportez en PNG avec --png)")
+    import gcode_parallel
+    workers = workers or os.cpu_count() or 1
+    starts = range(0, len(counts), range_frames)
+    with tempfile.TemporaryDirectory(prefix="gcode_video_") as tmp:
+        arrays = (os.path.join(tmp, "segments.npy"), os.path.join(tmp, "kinds.npy"))
+        np.save(arrays[0], np.ascontiguousarray(segs, dtype=np.float64))
+        np.save(arrays[1], np.asarray(kinds))
+        if png:
+            os.makedirs(output, exist_ok=True)
+            targets = [output] * len(starts)
+        else:
+            targets = [os.path.join(tmp, f"range_{first:06d}.rgba") for first in starts]
+        encoder = None
+        tasks = [(arrays, settings, counts[first:first + range_frames], first, target, png)
+                 for first, target in zip(starts, targets)]
+        pool = None
+        if workers > 1 and len(tasks) > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=gcode_parallel.process_context())
+        pending = []
+        done = 0
+        try:
+            for index in range(len(tasks) + 1):
+                # Au plus workers + 1 plages en cours : les fichiers bruts restent bornés
+                while pending and (len(pending) > workers or index == len(tasks)):
+                    future, count = pending.pop(0)
+                    target = future.result() if pool is not None else future
+                    if not png:
+                        if encoder is None:
+                            # Lancé après les processus du pool : sinon ceux-ci (fork) hériteraient
+                            # de l'entrée de ffmpeg, qui n'en verrait jamais la fin
+                            canvas, _ = _figure(np.load(arrays[0], mmap_mode="r"), settings)
+                            encoder = _encoder(ffmpeg, output, settings, canvas.get_width_height(physical=True))
+                        with open(target, "rb") as f:
+                            shutil.copyfileobj(f, encoder.stdin, 1 << 22)
+                        os.remove(target)
+                    done += count
+                    if progress is not None:
+                        progress(done, len(counts))
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                if index < len(tasks):
+                    task = tasks[index]
+                    future = pool.submit(render_range, *task) if pool is not None else render_range(*task)
+                    pending.append((future, len(task[2])))
+            if encoder is not None:
+                encoder.stdin.close()
+                if encoder.wait() != 0:
+                    raise RuntimeError(f"ffmpeg a échoué (code {encoder.returncode})")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if encoder is not None and encoder.poll() is None:
+                encoder.kill()
+                encoder.wait()
+    return len(counts)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="video_export", description="Export vidéo de la simulation d'un programme G-code (sans interface graphique).")
+    parser.add_argument("program", help="fichier .nc")
+    parser.add_argument("-o", "--output", required=True, help="vidéo à écrire (.mp4), ou dossier des images avec --png")
+    parser.add_argument("--png", action="store_true", help="écrire une suite d'images PNG au lieu d'une vidéo")
+    parser.add_argument("--fps", type=int, default=30, help="images par seconde (défaut : 30)")
+    parser.add_argument("--speed", type=float, default=1.0, help="multiple du temps machine réel (défaut : 1)")
+    parser.add_argument("--duration", type=float, help="durée de la vidéo en secondes (remplace --speed)")
+    parser.add_argument("--size", default="1200x800", help="taille des images en pixels (défaut : 1200x800)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--cancel-from-stdin", action="store_true",
+                        help="annuler à la lecture de « cancel » ou à la fin de l'entrée standard")
+    return parser
+
+
+def _watch_stdin(cancel):
+    # Lecture directe du descripteur : un thread bloqué dans sys.stdin en
+    # garderait le verrou, que les processus du pool reprennent au démarrage
+    received = b""
+    while b"cancel" not in received:
+        block = os.read(sys.stdin.fileno(), 64)
+        if not block:
+            break
+        received = received[-8:] + block
+    cancel.set()
+
+
+def main(argv=None):
+    import gcode_loader
+    args = build_parser().parse_args(argv)
+    # Arrêt par SIGTERM (hors Windows) : libérer le pool et ffmpeg
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    cancel = threading.Event()
+    if args.cancel_from_stdin:
+        threading.Thread(target=_watch_stdin, args=(cancel,), name="cancel", daemon=True).start()
+    try:
+        width, height = (int(value) // 2 * 2 for value in args.size.lower().split("x"))
+        if args.speed <= 0:
+            raise ValueError("--speed doit être positif")
+        job = gcode_loader.LoadJob(args.program, cache=gcode_loader.default_cache()).run()
+        if job.error is not None:
+            raise job.error
+        result = job.result
+        settings = VideoSettings(fps=args.fps, width=width, height=height, stock_z=stock_height(result.header))
+        frames = round(args.duration * args.fps) if args.duration else None
+        total = export(result.segments, result.kinds, args.output, settings, frames, args.jobs, args.png,
+                       progress=lambda done, count: print(f"Images : {done}/{count}", flush=True), cancel=cancel,
+                       times=result.times, speed=args.speed)
+    except ExportCancelled:
+        _remove_partial(args)
+        print("Export annulé", file=sys.stderr)
+        return 1
+    except (OSError, ValueError, RuntimeError) as e:
+        _remove_partial(args)
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    print(f"{total} images exportées vers {args.output}")
+    return 0
+
+
+def _remove_partial(args):
+    """Supprime la vidéo incomplète (les images PNG déjà écrites restent valables)."""
+    if not args.png and os.path.isfile(args.output):
+        try:
+            os.remove(args.output)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# viewer_link.py
+"""Liaison avec le visualiseur 3D resté ouvert entre deux générations.
+
+display_gcode_3d.py écoute sur une connexion locale (multiprocessing.connection :
+tube nommé sous Windows, socket Unix ailleurs) dont l'adresse et la clé
+d'authentification sont écrites dans un fichier de rendez-vous. Après une
+génération, launch_viewer (main_tkinter) y envoie un message « charger ce
+fichier » ; si aucun visualiseur n'écoute, il en lance un comme avant.
+
+Les messages sont des dict : {"command": "load", "path": ..., "moves": ...},
+`moves` (tableau PATH_DTYPE, facultatif) évitant l'analyse du fichier.
+"""
+import json
+import os
+import queue
+import secrets
+import sys
+import threading
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+RENDEZVOUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "viewer.json")
+FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+# Délai (s) accordé à un client connecté pour envoyer son message
+RECV_TIMEOUT = 2.0
+
+
+class ViewerServer:
+    """Écoute les messages des générateurs (thread d'acceptation).
+
+    Les messages reçus sont mis en file ; le visualiseur les lit avec
+    pending() depuis le thread de l'interface.
+    """
+
+    def __init__(self, rendezvous=RENDEZVOUS):
+        self.rendezvous = rendezvous
+        authkey = secrets.token_bytes(32)
+        self.listener = Listener(family=FAMILY, authkey=authkey)
+        self._messages = queue.Queue()
+        self._info = {"address": self.listener.address, "authkey": authkey.hex(), "pid": os.getpid()}
+        directory = os.path.dirname(rendezvous)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Fichier lisible par l'utilisateur seul (il contient la clé)
+        fd = os.open(rendezvous + ".part", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._info, f)
+        os.replace(rendezvous + ".part", rendezvous)
+        self._thread = threading.Thread(target=self._serve, name="viewer-link", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                continue    # client refusé ou parti : on attend le suivant
+            except OSError:
+                return      # écoute fermée (close)
+            with conn:
+                try:
+                    if not conn.poll(RECV_TIMEOUT):
+                        continue    # client muet : il ne bloque pas les suivants
+                    message = conn.recv()
+                    # En file avant l'accusé de réception : pending() le voit dès que send() a répondu
+                    self._messages.put(message)
+                    conn.send({"ok": True})
+                except (OSError, EOFError):
+                    continue
+
+    def pending(self):
+        """Messages reçus depuis le dernier appel."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        """Arrête l'écoute et retire le fichier de rendez-vous s'il est toujours le nôtre."""
+        try:
+            with open(self.rendezvous, "r") as f:
+                if json.load(f) == self._info:
+                    os.remove(self.rendezvous)
+        except (OSError, ValueError):
+            pass
+        self.listener.close()
+
+
+def send(message, rendezvous=RENDEZVOUS, timeout=2.0):
+    """Envoie `message` au visualiseur à l'écoute ; False s'il n'y en a pas (ou s'il ne répond pas)."""
+    try:
+        with open(rendezvous, "r") as f:
+            info = json.load(f)
+        conn = Client(info["address"], family=FAMILY, authkey=bytes.fromhex(info["authkey"]))
+    except (OSError, ValueError, KeyError, TypeError, EOFError, AuthenticationError):
+        return False
+    with conn:
+        try:
+            conn.send(message)
+            return conn.poll(timeout) and conn.recv().get("ok", False)
+        except (OSError, EOFError):
+            return False
+
+
+def send_load(path, moves=None, rendezvous=RENDEZVOUS):
+    """Demande au visualiseur ouvert de charger `path` (mouvements déjà analysés facultatifs)."""
+    return send({"command": "load", "path": os.path.abspath(path), "moves": moves}, rendezvous)